@@ -0,0 +1,167 @@
+import sys
+import json
+import time
+import argparse
+import itertools
+import statistics
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import config
+
+# One HeadlessRace per worker process, created by _init_worker and reused for every race
+_race = None
+
+def _init_worker(timestep):
+    """
+    Builds the headless race (ShowBase, track, player kart) once per worker process
+    """
+    global _race
+    from headless import HeadlessRace
+    _race = HeadlessRace(timestep=timestep)
+
+def _run_job(job):
+    """
+    Runs one race in the worker and returns its job description with the result.
+    Optional 'turn_handling' and 'path_deviation' override the AI tuning tables for
+    the race's difficulty.
+    """
+    difficulty = job['difficulty']
+    # The worker runs many jobs: the tables are put back after the race so that
+    # one job's overrides do not leak into the next
+    saved_turn_handling = dict(config.AI_TURN_HANDLING)
+    saved_path_deviation = dict(config.AI_PATH_DEVIATION)
+    if job.get('turn_handling') is not None:
+        config.AI_TURN_HANDLING[difficulty] = job['turn_handling']
+    if job.get('path_deviation') is not None:
+        config.AI_PATH_DEVIATION[difficulty] = job['path_deviation']
+    try:
+        result = _race.run_race(job['num_ai_karts'], difficulty, job['laps'], job['max_time'], seed=job['seed'])
+    finally:
+        config.AI_TURN_HANDLING.clear()
+        config.AI_TURN_HANDLING.update(saved_turn_handling)
+        config.AI_PATH_DEVIATION.clear()
+        config.AI_PATH_DEVIATION.update(saved_path_deviation)
+    ai_finish_times = [r['finish_time'] for r in result['rankings']
+                       if not r['is_player'] and r['finish_time'] is not None and r['finish_time'] >= 0]
+    return dict(job,
+                outcome=result['outcome'],
+                race_time=result['race_time'],
+                position=result['position'],
+                ai_finish_times=ai_finish_times,
+                wall_time=result['wall_time'])
+
+def make_jobs(difficulties, ai_counts, seeds, laps=1, max_time=300.0, turn_handling=None, path_deviation=None):
+    """
+    Builds one job per combination of difficulty, AI count and seed
+    """
+    return [
+        {
+            'difficulty': difficulty,
+            'num_ai_karts': num_ai_karts,
+            'seed': seed,
+            'laps': laps,
+            'max_time': max_time,
+            'turn_handling': turn_handling,
+            'path_deviation': path_deviation,
+        }
+        for difficulty, num_ai_karts, seed in itertools.product(difficulties, ai_counts, seeds)
+    ]
+
+def run_batch(jobs, workers=None, timestep=None):
+    """
+    Runs the jobs on a pool of worker processes.
+
+    Args:
+        jobs: List of job dicts (see make_jobs)
+        workers: Number of processes (default: one per CPU)
+        timestep: Fixed simulation step (default: headless.DEFAULT_TIMESTEP)
+
+    Returns:
+        list: One result dict per job, in job order
+    """
+    from headless import DEFAULT_TIMESTEP
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(timestep or DEFAULT_TIMESTEP,)) as pool:
+        futures = {pool.submit(_run_job, job): i for i, job in enumerate(jobs)}
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            print(f"\r{done}/{len(jobs)} races", end='', file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    return results
+
+def summarize(results):
+    """
+    Aggregates race results per (difficulty, AI count).
+
+    Returns:
+        list: One dict per group with race, finish, lawn-timeout and timeout counts,
+              the player's finish times and positions, and the AI finish times
+    """
+    groups = {}
+    for result in results:
+        groups.setdefault((result['difficulty'], result['num_ai_karts']), []).append(result)
+
+    summary = []
+    for (difficulty, num_ai_karts), group in sorted(groups.items()):
+        finish_times = [r['race_time'] for r in group if r['outcome'] == 'finished']
+        positions = [r['position'] for r in group]
+        ai_finish_times = [t for r in group for t in r['ai_finish_times']]
+        summary.append({
+            'difficulty': difficulty,
+            'num_ai_karts': num_ai_karts,
+            'races': len(group),
+            'finished': len(finish_times),
+            'lawn_timeouts': sum(r['outcome'] == 'lawn' for r in group),
+            'timeouts': sum(r['outcome'] == 'timeout' for r in group),
+            'wins': sum(r['position'] == 1 for r in group),
+            'mean_position': statistics.mean(positions),
+            'mean_finish_time': statistics.mean(finish_times) if finish_times else None,
+            'median_finish_time': statistics.median(finish_times) if finish_times else None,
+            'mean_ai_finish_time': statistics.mean(ai_finish_times) if ai_finish_times else None,
+        })
+    return summary
+
+def print_summary(summary):
+    """
+    Prints the summary as a table
+    """
+    def fmt(value):
+        return f"{value:8.2f}" if value is not None else "       -"
+
+    print(f"{'difficulty':<10} {'AI':>3} {'races':>6} {'done':>5} {'lawn':>5} {'t/o':>4} {'wins':>5} {'pos':>5} "
+          f"{'mean t':>8} {'median t':>8} {'AI t':>8}")
+    for row in summary:
+        print(f"{row['difficulty']:<10} {row['num_ai_karts']:>3} {row['races']:>6} {row['finished']:>5} "
+              f"{row['lawn_timeouts']:>5} {row['timeouts']:>4} {row['wins']:>5} {row['mean_position']:>5.2f} "
+              f"{fmt(row['mean_finish_time'])} {fmt(row['median_finish_time'])} {fmt(row['mean_ai_finish_time'])}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many headless races in parallel and summarize the results.")
+    parser.add_argument('--difficulties', nargs='+', default=sorted(config.AI_SPEED_MODIFIERS),
+                        choices=sorted(config.AI_SPEED_MODIFIERS))
+    parser.add_argument('--ai-counts', nargs='+', type=int, default=[3])
+    parser.add_argument('--seeds', type=int, default=10, help="Races per difficulty and AI count (seeds 0..N-1)")
+    parser.add_argument('--laps', type=int, default=1)
+    parser.add_argument('--max-time', type=float, default=300.0)
+    parser.add_argument('--turn-handling', type=float, help="Override AI_TURN_HANDLING for the raced difficulties")
+    parser.add_argument('--path-deviation', type=float, help="Override AI_PATH_DEVIATION for the raced difficulties")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--json', help="Write every race result and the summary to this file")
+    args = parser.parse_args(argv)
+
+    jobs = make_jobs(args.difficulties, args.ai_counts, range(args.seeds), args.laps, args.max_time,
+                     args.turn_handling, args.path_deviation)
+    started = time.perf_counter()
+    results = run_batch(jobs, args.workers)
+    summary = summarize(results)
+    print_summary(summary)
+    print(f"{len(results)} races in {time.perf_counter() - started:.1f}s")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'results': results, 'summary': summary}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
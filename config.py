@@ -7,6 +7,31 @@ LAPS_TO_FINISH = 1  # Number of laps required to finish the race
 ROAD_WIDTH = 15.0
 SAND_BORDER_WIDTH = 12.0
 STRIPE_WIDTH = 1.0
+TERRAIN_RASTER_RESOLUTION = 0.5  # World units per cell of the baked terrain raster
+# How karts collide with the barrier fence:
+# "solids" - collision polygons tested by the collision traverser
+# "analytic" - the kart's signed distance from the centerline (no barrier collision solids)
+BARRIER_COLLISION_MODE = "solids"
+# Draw the scenery props with hardware instancing when the graphics card supports it
+# (otherwise, and in headless races, they are flattened into a few Geoms)
+SCENERY_INSTANCING = True
+
+# Minimap settings
+MINIMAP_TEXTURE_SIZE = 256  # Resolution of the minimap texture, in pixels per side (e.g. 512 or 1024 for large displays)
+MINIMAP_SHOW_ROAD = False  # Fill the road and sand bands on the minimap instead of drawing only the centerline
+
+# UI refresh rates, in updates per second (None to update every frame)
+HUD_REFRESH_RATE = 10
+MINIMAP_REFRESH_RATE = 30
+
+# Frame profiler: times each stage of the frame (see utils/frame_profiler.py)
+FRAME_PROFILER = False  # Enable the profiler
+FRAME_PROFILER_OVERLAY = True  # Show the rolling percentiles on screen while profiling
+FRAME_PROFILER_LOG = None  # File to append the percentiles to every second, as JSON lines (e.g. "frame_profile.jsonl")
+FRAME_PROFILER_WINDOW = 300  # Number of frames the percentiles are computed over
+
+# Cache settings
+CACHE_DIR = "cache"  # Directory for generated data reused between runs
 
 # Game rules
 MAX_LAWN_TIME = 3  # Maximum time allowed on lawn before game over
@@ -1,22 +1,90 @@
 from panda3d.core import Vec3, LPoint3f
-import random
-import time
-from config import LAPS_TO_FINISH, get_ai_speed_modifier, get_ai_turn_factor, get_ai_path_deviation
+import numpy as np
+import config
+from config import get_ai_speed_modifier, get_ai_turn_factor, get_ai_path_deviation
+from physics.track_index import get_track_index
+from utils.racing_line import get_racing_line
+
+# Layout of one AI kart's driving state. Controllers keep their state in a record
+# of this type so that an AIFleet can hold the state of every AI kart in one array.
+AI_STATE_DTYPE = np.dtype([
+    ('speed', 'f8'),
+    ('target_speed', 'f8'),
+    ('max_speed', 'f8'),
+    ('target_index', 'i8'),
+    ('target_point', 'f8', 3),
+    ('path_offset', 'f8'),
+    ('switch_distance', 'f8'),
+    ('turn_reduction', 'f8'),
+])
+
+# Per-frame driving noise is drawn from each kart's generator in blocks of this many
+# frames. Each row holds one frame's values, in [-1, 1], for the NOISE_* channels.
+NOISE_BLOCK_SIZE = 256
+NOISE_SPEED, NOISE_ACCELERATION, NOISE_LOOK_X, NOISE_LOOK_Y, NOISE_TARGET_Z = range(5)
+NOISE_CHANNELS = 5
+
+def _state_field(name):
+    """
+    Creates a property that reads and writes one field of the controller's state record
+    """
+    def getter(self):
+        return self.state[name]
+
+    def setter(self, value):
+        self.state[name] = value
+
+    return property(getter, setter)
 
 class AIController:
-    def __init__(self, app, kart_data, track_points):
+    # Number of segments searched on each side of the last known segment for progress
+    PROGRESS_SEARCH_WINDOW = 8
+
+    # Driving state, stored in self.state (see AI_STATE_DTYPE)
+    current_speed = _state_field('speed')
+    target_speed = _state_field('target_speed')
+    max_speed = _state_field('max_speed')
+    current_target_index = _state_field('target_index')
+    path_offset = _state_field('path_offset')
+    target_switch_distance = _state_field('switch_distance')
+    turn_speed_reduction = _state_field('turn_reduction')
+
+    def __init__(self, app, kart_data, track_points, seed=None):
         """
         Initializes the AI Controller for a single kart.
         - app: Reference to the main application.
         - kart_data: The dictionary containing the AI kart's 'node' and other properties.
         - track_points: A list of LPoint3f representing the centerline of the track.
+        - seed: Seed (or numpy SeedSequence) of this kart's random generator.
+          The same seed always produces the same driving; None gives a random kart.
         """
-        # Reset the random seed to ensure a new random offset each time
-        random.seed(time.time())
-        
         self.app = app
         self.kart_node = kart_data['node']
         self.track_points = track_points
+        
+        # Acceleration and deceleration rates (units per second²)
+        self.acceleration = 10.0  # Same as player kart
+        self.braking = 20.0       # Faster deceleration when needed
+        
+        self.kart_data = kart_data # Store kart_data to update progress
+        # Baked terrain raster (if the app has one) for constant-time surface lookups
+        self.terrain_raster = getattr(app, 'terrain_raster', None)
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """
+        Puts the controller back in its starting state for a new race, with a new
+        random generator and the current difficulty settings, so a pooled kart
+        drives exactly like a newly created one with the same seed.
+        - seed: Seed (or numpy SeedSequence) of this kart's random generator
+        """
+        # Own generator, so karts never share or reseed a global random state
+        self.rng = np.random.default_rng(seed)
+        self.noise_block = self.generate_noise_block()
+        self.noise_cursor = 0
+        
+        # Standalone state record; an AIFleet rebinds it to a row of its shared array
+        self.state = np.zeros(1, dtype=AI_STATE_DTYPE)[0]
         self.current_target_index = 0
         
         # Use same max speed as player (50.0) with difficulty modifier
@@ -27,66 +95,136 @@ class AIController:
         # Current actual speed (starts at 0 and accelerates)
         self.current_speed = 0.0
         
-        # Acceleration and deceleration rates (units per second²)
-        self.acceleration = 10.0  # Same as player kart
-        self.braking = 20.0       # Faster deceleration when needed
-        
         # Get the difficulty-based path deviation range
         max_deviation = get_ai_path_deviation()
         # Randomize the path offset within the allowed deviation range
-        self.path_offset = random.uniform(-max_deviation, max_deviation)
+        self.path_offset = self.rng.uniform(-max_deviation, max_deviation)
         # Add some randomness to target switching distance
-        self.target_switch_distance = random.uniform(1.8, 2.5)
+        self.target_switch_distance = self.rng.uniform(1.8, 2.5)
         
         # Get the difficulty-based turn speed reduction factor
         self.turn_speed_reduction = get_ai_turn_factor()
+
+        # Precomputed track geometry and the recommended speed at every track point
+        self.racing_line = get_racing_line(self.track_points)
+        if self.racing_line is not None:
+            self.speed_profile, self.brake_zone = self.racing_line.speed_profile(
+                self.target_speed, self.max_speed * get_ai_speed_modifier(), self.turn_speed_reduction, self.braking
+            )
         
-        self.kart_data = kart_data # Store kart_data to update progress
+        self.last_segment_index = None  # Closest track segment found last frame
 
         if not self.track_points:
             print("Warning: AIController initialized with no track points.")
             self.current_target_point = LPoint3f(0,0,0) # Default target
         else:
-            self.current_target_point = self._get_offset_target_point(self.track_points[self.current_target_index])
+            self.current_target_point = self._get_offset_target_point(self.current_target_index)
 
-    def _get_offset_target_point(self, target_center_point):
+    @property
+    def current_target_point(self):
         """
-        Calculates the actual target point for the kart, including its random path offset.
-        This requires knowing the track's orientation to apply the offset correctly (e.g., to the side).
-        For simplicity, we'll initially apply a simple offset, which might not always be perfectly perpendicular.
-        A more robust solution would calculate the perpendicular vector at that point on the track.
+        The point the kart is currently driving towards (with its path offset applied)
         """
-        # Simplified: find direction to next point to estimate 'right' vector
-        if self.current_target_index + 1 < len(self.track_points):
-            next_point = self.track_points[self.current_target_index + 1]
-            direction = (next_point - target_center_point).normalized()
-            # Assuming Z is up, a simple cross product can give a 'right' vector
-            # This is a simplification; for a non-flat track, this is more complex.
-            track_right_dir = direction.cross(Vec3.up())
-            if track_right_dir.length_squared() < 0.001: # If direction is vertical
-                track_right_dir = Vec3(1,0,0) # Default if direction is up/down
-        else: # At the end of the track
-            track_right_dir = Vec3(1,0,0) # Default if no next point
+        return LPoint3f(*self.state['target_point'])
 
-        # Apply the random offset
-        offset_vector = track_right_dir * self.path_offset
+    @current_target_point.setter
+    def current_target_point(self, point):
+        self.state['target_point'] = (point[0], point[1], point[2])
+
+    def generate_noise_block(self):
+        """
+        Draws the next NOISE_BLOCK_SIZE frames of driving noise from this kart's generator
+        """
+        return self.rng.uniform(-1.0, 1.0, (NOISE_BLOCK_SIZE, NOISE_CHANNELS))
+
+    def next_noise(self):
+        """
+        Returns this frame's row of driving noise (see NOISE_* channels)
+        """
+        if self.noise_cursor >= NOISE_BLOCK_SIZE:
+            self.noise_block = self.generate_noise_block()
+            self.noise_cursor = 0
+        row = self.noise_block[self.noise_cursor]
+        self.noise_cursor += 1
+        return row
+
+    def _get_offset_target_point(self, index, z_noise=None):
+        """
+        Calculates the actual target point for the kart at a track point, including
+        its random path offset along the precomputed track normal at that point.
+        - z_noise: Noise value in [-1, 1] for the Z variation; drawn from the
+          kart's generator when not given
+        """
+        offset_vector = Vec3(*self.racing_line.normals[index]) * self.path_offset
         
         # Add small Z variation for more natural movement
-        z_variation = random.uniform(-0.1, 0.1)
-        offset_vector.addZ(z_variation)
+        if z_noise is None:
+            z_noise = self.rng.uniform(-1.0, 1.0)
+        offset_vector.addZ(0.1 * z_noise)
         
-        return target_center_point + offset_vector
+        return self.track_points[index] + offset_vector
 
+    def set_track_state(self, terrain, segment_index, progress):
+        """
+        Stores the kart's surface and lap progress in its kart_data.
+        While the kart is still in the first half of its targets but projects onto
+        the second half of the track, it has not crossed the start line yet.
+        - terrain: 'road', 'sand' or 'lawn' (None keeps the previous value)
+        - segment_index: Closest track segment, used as a hint for the next search
+        - progress: Arc-length progress along the track (0.0 to 1.0)
+        """
+        self.last_segment_index = segment_index
+        if progress > 0.5 and self.current_target_index < len(self.track_points) / 2:
+            progress = 0.0
+        self.kart_data['lap_progress'] = progress
+        if terrain is not None:
+            self.kart_data['terrain'] = terrain
 
-    def update(self, dt):
+    def _update_track_state(self, kart_pos):
+        """
+        Computes the kart's surface and lap progress on its own, searching only
+        around the last known track segment
+        """
+        track_index = get_track_index(self.track_points)
+        if track_index is None:
+            return
+        segment_index, t, _ = track_index.closest_segment_near(
+            kart_pos.x, kart_pos.y, self.last_segment_index, self.PROGRESS_SEARCH_WINDOW
+        )
+        terrain = None
+        if self.terrain_raster is not None:
+            terrain = self.terrain_raster.get_terrain(kart_pos.x, kart_pos.y)
+        self.set_track_state(terrain, segment_index, track_index.progress_at(segment_index, t))
+
+    def complete_lap(self):
+        """
+        Counts a completed lap for this AI kart and records its finish time
+        the first time it completes the required lap(s). The lap count is read
+        from config here, as races set it after this module is imported
+        """
+        self.kart_data['current_lap'] += 1
+        if self.kart_data['current_lap'] >= config.LAPS_TO_FINISH and self.kart_data['finish_time'] is None:
+            # Use the official race timer if available and running
+            if hasattr(self.app, 'run_timer') and self.app.run_timer and hasattr(self.app, 'timer_elapsed'):
+                self.kart_data['finish_time'] = self.app.timer_elapsed
+            else:
+                # Fallback if official timer isn't suitable (e.g., player hasn't moved)
+                # This case needs careful consideration for fairness.
+                # For now, mark as finished but without a comparable time if player hasn't started timer.
+                self.kart_data['finish_time'] = -1 # Indicates finished but timing might be off
+
+    def update(self, dt, update_track_state=True):
         """
         Updates the AI kart's state.
         - dt: Delta time since the last frame.
+        - update_track_state: Whether to compute surface and lap progress here. Callers
+          that query all karts at once (see GameLoop) pass False and call set_track_state.
         """
         if not self.track_points:
             return
 
         kart_pos = self.kart_node.getPos()
+        noise = self.next_noise()
         distance_to_target = (self.current_target_point - kart_pos).length()
 
         # Check if target is reached using the randomized distance threshold
@@ -95,69 +233,34 @@ class AIController:
             if self.current_target_index >= len(self.track_points):
                 # Lap completed for this AI
                 self.current_target_index = 0 
-                self.kart_data['current_lap'] += 1
-                # Record finish time if this is the first time completing the required lap(s)
-                if self.kart_data['current_lap'] >= LAPS_TO_FINISH and self.kart_data['finish_time'] is None:
-                    # Use the official race timer if available and running
-                    if hasattr(self.app, 'run_timer') and self.app.run_timer and hasattr(self.app, 'timer_elapsed'):
-                        self.kart_data['finish_time'] = self.app.timer_elapsed
-                    else:
-                        # Fallback if official timer isn't suitable (e.g., player hasn't moved)
-                        # This case needs careful consideration for fairness.
-                        # For now, mark as finished but without a comparable time if player hasn't started timer.
-                        self.kart_data['finish_time'] = -1 # Indicates finished but timing might be off
+                self.complete_lap()
 
             # Update target point with offset
-            self.current_target_point = self._get_offset_target_point(self.track_points[self.current_target_index])
+            self.current_target_point = self._get_offset_target_point(self.current_target_index, noise[NOISE_TARGET_Z])
 
 
         # Move towards the target point
         direction_to_target = (self.current_target_point - kart_pos).normalized()
         
-        # --- Calculate target speed based on turns and difficulty ---
-        target_speed = self.target_speed
-        
-        # Look ahead to the next segment to adjust speed for turns
-        if self.current_target_index + 1 < len(self.track_points):
-            next_target_center_point = self.track_points[self.current_target_index + 1]
-            
-            vec_current_segment = (self.current_target_point - kart_pos).normalized()
-            vec_next_segment = (next_target_center_point - self.current_target_point).normalized()
-            
-            if vec_current_segment.length_squared() > 0.001 and vec_next_segment.length_squared() > 0.001:
-                # Dot product gives cosine of angle; smaller value means sharper turn
-                dot_product = vec_current_segment.dot(vec_next_segment)
-                turn_sharpness_factor = (1.0 + dot_product) / 2.0 # Normalize to 0 (sharp turn) - 1 (straight)
-                
-                # Apply difficulty-based speed reduction on turns
-                # self.turn_speed_reduction is higher on easy difficulty (more slowing down)
-                target_speed *= (1.0 - self.turn_speed_reduction * (1.0 - turn_sharpness_factor**2))
-                
-                # On straightaways, allow AI to reach full max speed when turn_sharpness_factor is close to 1
-                if turn_sharpness_factor > 0.95:
-                    target_speed = min(target_speed * 1.1, self.max_speed * get_ai_speed_modifier())
-                
-                # Add slight randomness to the minimum speed to create more varied behavior
-                min_speed_factor = 0.3 + random.uniform(-0.05, 0.05)
-                target_speed = max(target_speed, self.target_speed * min_speed_factor)
+        # --- Target speed from the precomputed speed profile (turns and braking points) ---
+        target_speed = self.speed_profile[self.current_target_index]
 
         # Apply slight random speed variation for more natural movement
-        speed_variation = 1.0 + random.uniform(-0.05, 0.05)
+        speed_variation = 1.0 + 0.05 * noise[NOISE_SPEED]
         target_speed *= speed_variation
         
         # --- Apply acceleration/deceleration to gradually approach target speed ---
         # If current speed is less than target speed, accelerate
         if self.current_speed < target_speed:
             # Apply acceleration with some randomness to make each AI slightly different
-            accel_factor = 1.0 + random.uniform(-0.1, 0.1)
+            accel_factor = 1.0 + 0.1 * noise[NOISE_ACCELERATION]
             self.current_speed += self.acceleration * accel_factor * dt
             # Cap at target speed
             self.current_speed = min(self.current_speed, target_speed)
         # If current speed is greater than target speed, decelerate
         elif self.current_speed > target_speed:
-            # Brake harder when approaching sharp turns
-            if 'turn_sharpness_factor' in locals() and turn_sharpness_factor < 0.6:
-                # Sharp turn ahead, brake harder
+            # Brake harder in the braking zone before (and through) sharp turns
+            if self.brake_zone[self.current_target_index]:
                 self.current_speed -= self.braking * dt
             else:
                 # Normal deceleration
@@ -177,14 +280,15 @@ class AIController:
         # Add small random offset to look direction for more natural turning
         if (look_target - new_pos).length_squared() > 0.01:
             small_offset = Vec3(
-                random.uniform(-0.2, 0.2),
-                random.uniform(-0.2, 0.2),
+                0.2 * noise[NOISE_LOOK_X],
+                0.2 * noise[NOISE_LOOK_Y],
                 0
             )
             self.kart_node.lookAt(look_target + small_offset)
         
-        # Update AI kart progress
-        self.kart_data['lap_progress'] = self.current_target_index / float(len(self.track_points)) 
+        # Update AI kart progress and surface
+        if update_track_state:
+            self._update_track_state(new_pos)
 
     def handle_barrier_collision(self):
         """
@@ -198,7 +302,7 @@ class AIController:
         target_point_index = self.current_target_index
         if target_point_index > 0:
             target_point_index -= 1
-        self.current_target_point = self._get_offset_target_point(self.track_points[target_point_index])
+        self.current_target_point = self._get_offset_target_point(target_point_index)
 
     def handle_kart_collision(self, collision_direction, is_frontal=False, is_rear=False, is_side=False):
         """
@@ -224,13 +328,13 @@ class AIController:
             lateral_vector.normalize()
             
             # Escolher aleatoriamente entre esquerda e direita
-            if random.random() < 0.5:
+            if self.rng.random() < 0.5:
                 lateral_vector *= -1
             
             # Modificar o ponto alvo para desviar
-            deviation_strength = 2.0 + random.random() * 1.0  # Desvio de 2-3 unidades
+            deviation_strength = 2.0 + self.rng.random() * 1.0  # Desvio de 2-3 unidades
             target_point_index = min(self.current_target_index + 1, len(self.track_points) - 1)
-            base_target = self._get_offset_target_point(self.track_points[target_point_index])
+            base_target = self._get_offset_target_point(target_point_index)
             
             # Aplicar desvio lateral para contornar
             self.current_target_point = base_target + lateral_vector * deviation_strength
@@ -279,7 +383,7 @@ class AIController:
             # Avançar para o melhor ponto encontrado
             if best_index != self.current_target_index:
                 self.current_target_index = best_index
-                self.current_target_point = self._get_offset_target_point(self.track_points[best_index])
+                self.current_target_point = self._get_offset_target_point(best_index)
         
         # Fallback para colisões não classificadas
         else:
@@ -291,11 +395,11 @@ class AIController:
             perp_vector.normalize()
             
             # Escolher aleatoriamente entre esquerda e direita
-            if random.random() < 0.5:
+            if self.rng.random() < 0.5:
                 perp_vector *= -1
             
             # Aplicar um desvio moderado
-            deviation_amount = random.uniform(1.5, 2.5)
+            deviation_amount = self.rng.uniform(1.5, 2.5)
             target_point_index = self.current_target_index
-            base_target = self._get_offset_target_point(self.track_points[target_point_index])
+            base_target = self._get_offset_target_point(target_point_index)
             self.current_target_point = base_target + perp_vector * deviation_amount 
\ No newline at end of file
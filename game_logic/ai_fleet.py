@@ -0,0 +1,161 @@
+import numpy as np
+import config
+from physics.track_detection import get_karts_track_state
+from physics.terrain_raster import TERRAIN_NAMES
+from utils.spline import normalize_rows
+from game_logic.ai_controller import AI_STATE_DTYPE, NOISE_BLOCK_SIZE, NOISE_SPEED, NOISE_ACCELERATION, NOISE_LOOK_X, NOISE_LOOK_Y, NOISE_TARGET_Z
+
+class AIFleet:
+    def __init__(self, app, controllers):
+        """
+        Advances every AI kart in one vectorized step.
+        The fleet adopts the state records of the given controllers into a single
+        structured array, so collision handlers that act on an individual
+        AIController keep working on the same data the fleet updates.
+        - app: Reference to the main application.
+        - controllers: The AIController of every AI kart in the race.
+        """
+        self.app = app
+        self.controllers = list(controllers)
+        self.nodes = [c.kart_node for c in self.controllers]
+        self.state = np.zeros(len(self.controllers), dtype=AI_STATE_DTYPE)
+        for i, controller in enumerate(self.controllers):
+            self.state[i] = controller.state
+            controller.state = self.state[i]
+        self.acceleration = np.array([c.acceleration for c in self.controllers])
+        self.braking = np.array([c.braking for c in self.controllers])
+        # Each kart's remaining noise block, continued from its own generator
+        self.noise_blocks = np.stack([c.noise_block for c in self.controllers]) if self.controllers else None
+        self.noise_cursors = np.array([c.noise_cursor for c in self.controllers], dtype=np.int64)
+        self.segment_indices = np.full(len(self.controllers), -1)
+        self._build_track_tables()
+        self._read_transforms()
+
+    def _build_track_tables(self):
+        """
+        Gathers the racing line tables shared by all karts and each kart's speed profile
+        """
+        racing_line = self.controllers[0].racing_line if self.controllers else None
+        if racing_line is None:
+            self.points = np.zeros((0, 3))
+            return
+        self.points = racing_line.points
+        self.right = racing_line.normals
+        self.speed_profiles = np.stack([c.speed_profile for c in self.controllers])
+        self.brake_zones = np.stack([c.brake_zone for c in self.controllers])
+
+    def _read_transforms(self):
+        """
+        Reads the current position and orientation of every kart node
+        """
+        self.positions = np.array([tuple(node.getPos()) for node in self.nodes], dtype=np.float64).reshape(-1, 3)
+        self.headings = np.array([node.getH() for node in self.nodes], dtype=np.float64)
+        self.pitches = np.array([node.getP() for node in self.nodes], dtype=np.float64)
+
+    def _write_transforms(self):
+        """
+        Writes the new position and orientation of every kart back to its node
+        """
+        for node, (x, y, z), h, p in zip(self.nodes, self.positions, self.headings, self.pitches):
+            node.setPosHpr(x, y, z, h, p, 0)
+
+    def _next_noise(self):
+        """
+        Returns this frame's noise row of every kart, (N, NOISE_CHANNELS), refilling
+        exhausted blocks from the karts' own generators
+        """
+        exhausted = np.nonzero(self.noise_cursors >= NOISE_BLOCK_SIZE)[0]
+        for row in exhausted:
+            self.noise_blocks[row] = self.controllers[row].generate_noise_block()
+            self.noise_cursors[row] = 0
+        noise = self.noise_blocks[np.arange(len(self.controllers)), self.noise_cursors]
+        self.noise_cursors += 1
+        return noise
+
+    def _offset_targets(self, indices, rows, z_noise):
+        """
+        Returns the target points (with path offset and a small Z variation) for the given karts
+        """
+        targets = self.points[indices] + self.right[indices] * self.state['path_offset'][rows, None]
+        targets[:, 2] += 0.1 * z_noise
+        return targets
+
+    def _advance_targets(self, noise):
+        """
+        Moves karts that reached their target on to the next track point, counting laps on wrap-around
+        """
+        distance = np.linalg.norm(self.state['target_point'] - self.positions, axis=1)
+        reached = np.nonzero(distance < self.state['switch_distance'])[0]
+        if len(reached) == 0:
+            return
+        indices = self.state['target_index'][reached] + 1
+        wrapped = indices >= len(self.points)
+        indices[wrapped] = 0
+        self.state['target_index'][reached] = indices
+        for row in reached[wrapped]:
+            self.controllers[row].complete_lap()
+        self.state['target_point'][reached] = self._offset_targets(indices, reached, noise[reached, NOISE_TARGET_Z])
+
+    def _apply_acceleration(self, dt, noise):
+        """
+        Accelerates or brakes every kart towards the speed recommended by its
+        speed profile at its current target point
+        """
+        rows = np.arange(len(self.controllers))
+        indices = self.state['target_index']
+        target_speeds = self.speed_profiles[rows, indices] * (1.0 + 0.05 * noise[:, NOISE_SPEED])
+        speed = self.state['speed']
+        accelerating = speed < target_speeds
+        braking = speed > target_speeds
+        accel_factor = 1.0 + 0.1 * noise[:, NOISE_ACCELERATION]
+        faster = np.minimum(speed + self.acceleration * accel_factor * dt, target_speeds)
+        deceleration = np.where(self.brake_zones[rows, indices], self.braking, self.acceleration)
+        slower = np.maximum(speed - deceleration * dt, target_speeds)
+        self.state['speed'] = np.where(accelerating, faster, np.where(braking, slower, speed))
+
+    def _look_at_targets(self, noise):
+        """
+        Turns each kart towards its target point, with a small random offset
+        """
+        look = self.state['target_point'] - self.positions
+        facing = np.einsum('ij,ij->i', look, look) > 0.01
+        look[:, 0] += 0.2 * noise[:, NOISE_LOOK_X]
+        look[:, 1] += 0.2 * noise[:, NOISE_LOOK_Y]
+        horizontal = np.hypot(look[:, 0], look[:, 1])
+        self.headings[facing] = np.degrees(np.arctan2(-look[:, 0], look[:, 1]))[facing]
+        self.pitches[facing] = np.degrees(np.arctan2(look[:, 2], horizontal))[facing]
+
+    def update_track_state(self):
+        """
+        Refreshes every kart's surface and lap progress with one vectorized track
+        query, searching around each kart's segment from the previous frame
+        """
+        if not self.controllers or len(self.points) == 0:
+            return
+        track_width = config.ROAD_WIDTH + (config.SAND_BORDER_WIDTH * 2)
+        terrain_codes, self.segment_indices, progress = get_karts_track_state(
+            self.positions[:, :2], self.controllers[0].track_points,
+            config.ROAD_WIDTH, track_width, config.STRIPE_WIDTH, hint_indices=self.segment_indices
+        )
+        for controller, code, segment_index, kart_progress in zip(self.controllers, terrain_codes, self.segment_indices.tolist(), progress.tolist()):
+            controller.set_track_state(TERRAIN_NAMES[code], segment_index, kart_progress)
+
+    def update(self, dt, update_track_state=True):
+        """
+        Advances every AI kart by dt seconds: target switching, acceleration along
+        the speed profile, movement and orientation, then writes the transforms to the kart nodes.
+        - update_track_state: Whether to refresh the karts' surface and lap progress
+          here; callers timing that query on its own pass False and call update_track_state
+        """
+        if not self.controllers or len(self.points) == 0:
+            return
+        self._read_transforms()
+        noise = self._next_noise()
+        self._advance_targets(noise)
+        to_target = self.state['target_point'] - self.positions
+        self._apply_acceleration(dt, noise)
+        self.positions += normalize_rows(to_target) * (self.state['speed'] * dt)[:, None]
+        self._look_at_targets(noise)
+        self._write_transforms()
+        if update_track_state:
+            self.update_track_state()
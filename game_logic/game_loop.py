@@ -2,11 +2,16 @@ import time
 from direct.task import Task
 from utils.camera import update_camera # Assuming update_camera is in utils
 import config  # Import the config module directly
+from physics.track_detection import get_karts_track_state
+from physics.terrain_raster import TERRAIN_NAMES
+from utils.frame_profiler import FrameProfiler
 
 class GameLoop:
     def __init__(self, app):
         self.app = app
         self.MAX_LAWN_TIME = config.MAX_LAWN_TIME  # Using the constant from config
+        # Times the stages of update (a disabled profiler when the app has none)
+        self.profiler = getattr(app, 'frame_profiler', None) or FrameProfiler(enabled=False)
 
     def calculate_race_positions(self):
         """
@@ -51,14 +56,41 @@ class GameLoop:
         total_racers = len(racers)
         return player_position, total_racers
 
+    def update_ai_track_state(self):
+        """
+        Refreshes the surface and lap progress of every AI kart with a single
+        vectorized track query instead of one search per kart
+        """
+        controllers = self.app.ai_controllers
+        if not controllers:
+            return
+        positions = [(c.kart_node.getX(), c.kart_node.getY()) for c in controllers]
+        track_width = config.ROAD_WIDTH + (config.SAND_BORDER_WIDTH * 2)
+        terrain_codes, segment_indices, progress = get_karts_track_state(
+            positions, self.app.trackCurvePoints, config.ROAD_WIDTH, track_width, config.STRIPE_WIDTH
+        )
+        for i, controller in enumerate(controllers):
+            controller.set_track_state(TERRAIN_NAMES[terrain_codes[i]], int(segment_indices[i]), float(progress[i]))
+
     def update(self, task):
         # This method is called by the task manager ONLY when state is 'playing'
         dt = globalClock.getDt()
 
+        profiler = self.profiler
+
         # --- Update AI Karts ---
-        if hasattr(self.app, 'ai_controllers'):
-            for controller in self.app.ai_controllers:
-                controller.update(dt)
+        # (their surface and lap progress query is timed as the 'terrain' stage)
+        if getattr(self.app, 'ai_fleet', None) is not None:
+            with profiler.measure('ai'):
+                self.app.ai_fleet.update(dt, update_track_state=False)
+            with profiler.measure('terrain'):
+                self.app.ai_fleet.update_track_state()
+        elif hasattr(self.app, 'ai_controllers'):
+            with profiler.measure('ai'):
+                for controller in self.app.ai_controllers:
+                    controller.update(dt, update_track_state=False)
+            with profiler.measure('terrain'):
+                self.update_ai_track_state()
 
         # --- TIMER LOGIC ---
         # Start timer when kart first moves (velocity > 0.1 and timer not started)
@@ -80,14 +112,20 @@ class GameLoop:
         self.app.game_time = time.time() - self.app.game_start_time
 
         # Update physics with correct track dimensions
-        # These values should match those used in track.py
-        road_width = 15.0  # Width of the actual drivable road from track.py
-        sand_border_width = 12.0  # Width of the sand border on each side from track.py
+        # These values are shared with track.py through config
+        road_width = config.ROAD_WIDTH  # Width of the actual drivable road
+        sand_border_width = config.SAND_BORDER_WIDTH  # Width of the sand border on each side
         track_width = road_width + (sand_border_width * 2)  # Total width including sand borders
-        stripe_width = 1.0  # Width of the warning stripes from track.py
+        stripe_width = config.STRIPE_WIDTH  # Width of the warning stripes
         
-        self.app.physics.update(dt, self.app.track.getZ(), self.app.trackCurvePoints, 
-                                road_width, track_width, stripe_width)
+        with profiler.measure('physics'):
+            self.app.physics.update(dt, self.app.track.getZ(), self.app.trackCurvePoints, 
+                                    road_width, track_width, stripe_width)
+
+        # Analytic barrier collision (the collision traverser handles barrier solids otherwise)
+        if getattr(self.app, 'barrier_pusher', None) is not None:
+            with profiler.measure('collision'):
+                self.app.barrier_pusher.update()
 
         # Check terrain and update lawn timer
         if self.app.physics.current_terrain == 'lawn':
@@ -100,7 +138,8 @@ class GameLoop:
             self.app.lawn_timer = 0 # Reset timer
 
         # Update Kart Progress and check for lap completion
-        lap_just_completed = self.app.progress_tracker.update()
+        with profiler.measure('progress'):
+            lap_just_completed = self.app.progress_tracker.update()
         
         # Print debug info about laps when one is completed
         if lap_just_completed:
@@ -114,19 +153,22 @@ class GameLoop:
             return Task.done # Stop the loop
 
         # Calculate current race positions
-        player_position, total_racers = self.calculate_race_positions()
+        with profiler.measure('positions'):
+            player_position, total_racers = self.calculate_race_positions()
 
         # Update camera
-        update_camera(self.app.cam, self.app.kart, dt)
+        with profiler.measure('camera'):
+            update_camera(self.app.cam, self.app.kart, dt)
 
         # Update HUD display with speed, timer, position, and lap info
-        self.app.hud_display.update(
-            velocity=self.app.physics.velocity, 
-            timer_seconds=self.app.timer_elapsed if self.app.run_timer else 0.0,
-            position=player_position,
-            total_racers=total_racers,
-            current_lap=self.app.progress_tracker.current_lap,
-            total_laps=config.LAPS_TO_FINISH
-        )
+        with profiler.measure('hud'):
+            self.app.hud_display.update(
+                velocity=self.app.physics.velocity, 
+                timer_seconds=self.app.timer_elapsed if self.app.run_timer else 0.0,
+                position=player_position,
+                total_racers=total_racers,
+                current_lap=self.app.progress_tracker.current_lap,
+                total_laps=config.LAPS_TO_FINISH
+            )
 
         return Task.cont # Continue task next frame
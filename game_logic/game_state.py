@@ -1,5 +1,6 @@
 import sys
 import time
+import numpy as np
 from panda3d.core import Vec3, Vec4
 from direct.task import Task
 import config
@@ -7,8 +8,9 @@ import config
 # Import necessary components from the main game or other modules
 # Assuming these are accessible or passed in
 from utils.camera import setup_camera_transition, set_view_mode
-from game_objects.kart import create_kart
 from game_logic.ai_controller import AIController
+from game_logic.ai_fleet import AIFleet
+from game_logic.kart_pool import KartPool
 
 class GameStateManager:
     def __init__(self, app):
@@ -16,6 +18,8 @@ class GameStateManager:
         self.current_state = 'menu' # Initial state
         self.app.ai_karts = [] # Initialize ai_karts list
         self.app.ai_controllers = [] # Initialize ai_controllers list
+        self.app.ai_fleet = None # Vectorized updater for all AI karts (created per race)
+        self.app.kart_pool = KartPool(app) # AI karts kept alive across races
 
     def change_state(self, new_state):
         print(f"Changing state from {self.current_state} to {new_state}")
@@ -65,12 +69,7 @@ class GameStateManager:
                 self.app.menu_manager.config_menu.hide()
 
             # Clean up any existing AI karts before creating new ones
-            if hasattr(self.app, 'ai_karts') and self.app.ai_karts:
-                for ai_kart in self.app.ai_karts:
-                    if 'node' in ai_kart and ai_kart['node']:
-                        ai_kart['node'].removeNode()
-                    if 'collider' in ai_kart and ai_kart['collider']:
-                        ai_kart['collider'].removeNode()
+            remove_ai_racers(self.app)
 
             # Reset timers and progress
             self.app.game_start_time = time.time()
@@ -100,105 +99,19 @@ class GameStateManager:
             )
 
             # --- Kart Starting Position ---
-            start_pos_on_track = self.app.trackCurvePoints[0]
-            # Ensure we look towards a point further along the track for initial orientation
-            look_at_point = self.app.trackCurvePoints[1] if len(self.app.trackCurvePoints) > 1 else self.app.trackCurvePoints[0] + Vec3(0, -1, 0)
-
-
-            # Calculate the forward direction of the track at the start
-            track_forward_dir = (look_at_point - start_pos_on_track).normalized()
-            
-            # Calculate a right vector (perpendicular to forward and up)
-            # Assuming standard Z-up coordinate system
-            track_right_dir = track_forward_dir.cross(Vec3.up()) 
-            if track_right_dir.length_squared() < 0.001: # If forward is (nearly) up/down
-                 track_right_dir = Vec3(1,0,0) # Default to X-axis
-
-
-            # Player kart positioning (slightly behind the actual starting line for visual appeal)
-            player_start_offset = track_forward_dir * -2 # Offset slightly behind the line
-            player_kart_start_pos = start_pos_on_track + player_start_offset
-            player_kart_start_pos.setZ(self.app.track.getZ() + 0.5) # Adjust Z based on track height
+            player_kart_start_pos, ai_start_positions, look_at_point = get_start_grid(
+                self.app.trackCurvePoints, self.app.track.getZ(), num_ai_karts
+            )
 
             # Update player kart color from configuration
             self.app.kart.setColor(player_kart_color)
             
             self.app.kart.setPos(player_kart_start_pos)
-            self.app.kart.lookAt(start_pos_on_track + track_forward_dir * 10) # Look further down the track
+            self.app.kart.lookAt(look_at_point) # Look further down the track
 
 
             # --- AI Karts Setup ---
-            self.app.ai_karts = [] # Clear previous AI karts if any
-            self.app.ai_controllers = [] # Clear previous AI controllers
-            
-            # Use AI colors from the configuration 
-            # If we have more AI karts than colors, we'll cycle through the available colors
-            spacing = 3.0 # Increased spacing between karts for better starting positions
-            
-            # Karts will be positioned in a grid-like formation, with none directly behind the player
-            # Calculate positions differently to avoid center spot (player position)
-            for i in range(num_ai_karts):
-                # Get color for this AI kart
-                ai_color = ai_colors[i % len(ai_colors)]
-                
-                # Create AI kart
-                ai_kart_node, ai_collider = create_kart(self.app.gameRoot, self.app.loader, color=ai_color, show_collider=False)
-                
-                # Configurar colisão para AI karts
-                ai_collider.node().setFromCollideMask(0x1 | 0x2)  # AI Karts will test for collisions with barriers and other karts
-                ai_collider.node().setIntoCollideMask(0x2)  # Other karts can collide with this kart
-                
-                # Configurar o pusher para o kart da AI para evitar atravessamento
-                self.app.pusher.add_collider(ai_collider, ai_kart_node)
-                self.app.cTrav.add_collider(ai_collider, self.app.pusher)
-                
-                # Registrar o evento de colisão específico para este kart AI
-                ai_kart_index = len(self.app.ai_karts)
-                if hasattr(self.app, 'accept'):
-                    # Registrar tanto colisões com barreiras quanto com outros karts
-                    barrier_event_name = f'pusher_kart_collision-into-barrier_collision'
-                    kart_event_name = f'pusher_kart_collision-into-kart_collision'
-                    self.app.accept(barrier_event_name, self.app.on_kart_barrier_collision)
-                    self.app.accept(kart_event_name, self.app.on_kart_kart_collision)
-                
-                # Position AI karts
-                # Determine the row and column for a grid-like arrangement
-                # Calculate lateral position - alternate left and right sides
-                if i % 2 == 0:  # Even indices: position on the left
-                    lateral_offset = -spacing * (1 + i // 2)  # Increasing distance to the left
-                else:  # Odd indices: position on the right
-                    lateral_offset = spacing * (1 + i // 2)  # Increasing distance to the right
-                
-                # Stagger rows (distance behind the player)
-                row = (i // 2) + 1  # Each left-right pair forms a row
-                row_offset = -3.0 - (row * 2.0)  # Each row is further back
-                
-                # Apply calculated offsets
-                ai_start_offset_forward = track_forward_dir * row_offset
-                ai_kart_start_pos = start_pos_on_track + ai_start_offset_forward + (track_right_dir * lateral_offset)
-                ai_kart_start_pos.setZ(self.app.track.getZ() + 0.5) # Adjust Z
-                
-                ai_kart_node.setPos(ai_kart_start_pos)
-                ai_kart_node.lookAt(start_pos_on_track + track_forward_dir * 10) # Look further down the track
-                
-                ai_kart_data = {
-                    'node': ai_kart_node, 
-                    'collider': ai_collider, 
-                    'color': ai_color,
-                    'name': f'AI Racer {i+1}',
-                    'lap_progress': 0,
-                    'lap_times': [],
-                    'current_lap': 0,
-                    'finish_time': None
-                }
-                self.app.ai_karts.append(ai_kart_data)
-
-                # Create and store AI Controller for this kart
-                if hasattr(self.app, 'trackCurvePoints') and self.app.trackCurvePoints:
-                    controller = AIController(self.app, ai_kart_data, self.app.trackCurvePoints)
-                    self.app.ai_controllers.append(controller)
-                else:
-                    print(f"Warning: Could not create AIController for {ai_kart_data['name']} due to missing track points.")
+            create_ai_racers(self.app, ai_colors, ai_start_positions, look_at_point)
 
             # Reset physics for player (AI kart physics will need to be handled)
             self.app.physics.reset()
@@ -293,8 +206,6 @@ class GameStateManager:
             self.change_state('game_won')
 
             # --- Determine Rankings ---
-            all_racers = []
-            # Player data
             player_data = {
                 'name': 'Player',
                 'laps': self.app.progress_tracker.current_lap, # Show actual number of completed laps
@@ -302,60 +213,7 @@ class GameStateManager:
                 'finish_time': player_finish_time,
                 'is_player': True
             }
-            all_racers.append(player_data)
-
-            # AI data
-            if hasattr(self.app, 'ai_karts'):
-                for ai_kart_info in self.app.ai_karts:
-                    ai_laps = ai_kart_info.get('current_lap', 0)
-                    ai_finish_time = ai_kart_info.get('finish_time', None)
-                    ai_progress = ai_kart_info.get('lap_progress', 0)
-                    
-                    # If AI finished the lap before player, its finish_time is already recorded.
-                    # If AI is still racing, its finish_time is None.
-                    # If AI finished after player, its finish_time might be recorded by its controller
-                    # just before or after this game_won state change, ensure it's captured if available.
-                    
-                    all_racers.append({
-                        'name': ai_kart_info.get('name', 'AI Racer'),
-                        'laps': ai_laps,
-                        'progress': ai_progress if ai_finish_time is None else 1.0,
-                        'finish_time': ai_finish_time,
-                        'is_player': False
-                    })
-            
-            # Sort racers: 
-            # 1. By laps completed (descending).
-            # 2. By finish_time (ascending, None means not finished, so they come after). Handle -1 for AI early finish. 
-            # 3. By progress on current lap (descending for those not finished).
-            def sort_key(racer):
-                laps = racer['laps']
-                time = racer['finish_time']
-                progress = racer['progress']
-
-                # Primary sort: Laps (higher is better)
-                sort_laps = -laps 
-
-                # Secondary sort: Finish Time (lower is better for finished racers)
-                # Racers who haven't finished (time is None) are ranked lower than those who have.
-                # AI karts with finish_time == -1 finished but their time might not be comparable, rank them after timed finishers.
-                if time is None:
-                    sort_time = float('inf') # Not finished, rank last among same-lap racers
-                elif time == -1: # AI finished, but timer context might be off (e.g. player didn't move)
-                    sort_time = float('inf') -1 # Rank just above those who didn't finish at all
-                else:
-                    sort_time = time
-                
-                # Tertiary sort: Progress (higher is better for those on the same lap and not finished)
-                sort_progress = -progress if time is None else 0
-
-                return (sort_laps, sort_time, sort_progress)
-
-            all_racers.sort(key=sort_key)
-            
-            # Assign positions
-            for i, racer in enumerate(all_racers):
-                racer['position'] = i + 1
+            all_racers = rank_racers(player_data, self.app.ai_karts)
 
             # Hide game elements
             self.app.minimap.hide()
@@ -370,3 +228,193 @@ class GameStateManager:
             self.app.menu_manager.show_game_won_menu()
             # Stop game loop
             self.app.taskMgr.remove("updateGameTask")
+
+def get_start_grid(track_curve_points, track_z, num_ai_karts, spacing=3.0):
+    """
+    Computes the starting grid behind the start line (the first track point).
+    The player starts just behind the line; AI karts are placed in rows behind it,
+    alternating left and right so that none sits directly behind the player.
+
+    Args:
+        track_curve_points: List of points defining the track centerline
+        track_z: Height of the track surface
+        num_ai_karts: Number of AI karts to place
+        spacing: Lateral distance between AI karts
+
+    Returns:
+        tuple: (player_pos, ai_positions, look_at_point) where look_at_point is the
+               point every kart should face at the start
+    """
+    start_pos_on_track = track_curve_points[0]
+    # Ensure we look towards a point further along the track for initial orientation
+    look_at_point = track_curve_points[1] if len(track_curve_points) > 1 else track_curve_points[0] + Vec3(0, -1, 0)
+
+    # Calculate the forward direction of the track at the start
+    track_forward_dir = (look_at_point - start_pos_on_track).normalized()
+    
+    # Calculate a right vector (perpendicular to forward and up)
+    # Assuming standard Z-up coordinate system
+    track_right_dir = track_forward_dir.cross(Vec3.up()) 
+    if track_right_dir.length_squared() < 0.001: # If forward is (nearly) up/down
+         track_right_dir = Vec3(1,0,0) # Default to X-axis
+
+    # Player kart positioning (slightly behind the actual starting line for visual appeal)
+    player_start_offset = track_forward_dir * -2 # Offset slightly behind the line
+    player_pos = start_pos_on_track + player_start_offset
+    player_pos.setZ(track_z + 0.5) # Adjust Z based on track height
+
+    ai_positions = []
+    for i in range(num_ai_karts):
+        # Calculate lateral position - alternate left and right sides
+        if i % 2 == 0:  # Even indices: position on the left
+            lateral_offset = -spacing * (1 + i // 2)  # Increasing distance to the left
+        else:  # Odd indices: position on the right
+            lateral_offset = spacing * (1 + i // 2)  # Increasing distance to the right
+        
+        # Stagger rows (distance behind the player)
+        row = (i // 2) + 1  # Each left-right pair forms a row
+        row_offset = -3.0 - (row * 2.0)  # Each row is further back
+        
+        # Apply calculated offsets
+        ai_pos = start_pos_on_track + track_forward_dir * row_offset + (track_right_dir * lateral_offset)
+        ai_pos.setZ(track_z + 0.5) # Adjust Z
+        ai_positions.append(ai_pos)
+
+    return player_pos, ai_positions, start_pos_on_track + track_forward_dir * 10
+
+def create_ai_racers(app, ai_colors, start_positions, look_at_point, seed=None):
+    """
+    Places one AI kart (with its collider and AIController) per start position,
+    taken from app.kart_pool, and creates the AIFleet that advances them.
+    - app: The application; fills app.ai_karts, app.ai_controllers and app.ai_fleet
+    - ai_colors: Kart colors, cycled if there are more karts than colors
+    - start_positions: Grid position of each AI kart (see get_start_grid)
+    - look_at_point: Point every AI kart faces at the start
+    - seed: Race seed; each kart gets its own independent stream derived from it.
+      None gives every kart a random stream.
+    """
+    app.ai_karts = []
+    app.ai_controllers = []
+    if seed is None:
+        kart_seeds = [None] * len(start_positions)
+    else:
+        kart_seeds = np.random.SeedSequence(seed).spawn(len(start_positions))
+    for i, start_pos in enumerate(start_positions):
+        # Get color for this AI kart
+        ai_color = ai_colors[i % len(ai_colors)]
+        
+        # Pooled AI kart (created, with its collider, the first time it is needed)
+        entry = app.kart_pool.acquire(ai_color)
+        ai_kart_node, ai_collider = entry['node'], entry['collider']
+        
+        # Registrar tanto colisões com barreiras quanto com outros karts
+        if hasattr(app, 'accept'):
+            app.accept('pusher_kart_collision-into-barrier_collision', app.on_kart_barrier_collision)
+            app.accept('pusher_kart_collision-into-kart_collision', app.on_kart_kart_collision)
+        
+        ai_kart_node.setPos(start_pos)
+        ai_kart_node.lookAt(look_at_point) # Look further down the track
+        
+        # The pooled dict is refilled, as its controller keeps a reference to it
+        ai_kart_data = entry['kart_data'] if entry['kart_data'] is not None else {}
+        ai_kart_data.clear()
+        ai_kart_data.update({
+            'node': ai_kart_node, 
+            'collider': ai_collider, 
+            'color': ai_color,
+            'name': f'AI Racer {i+1}',
+            'lap_progress': 0,
+            'lap_times': [],
+            'current_lap': 0,
+            'finish_time': None,
+            'terrain': 'road'
+        })
+        entry['kart_data'] = ai_kart_data
+        app.ai_karts.append(ai_kart_data)
+
+        # Create (or reset the pooled) AI Controller for this kart
+        if getattr(app, 'trackCurvePoints', None):
+            if entry['controller'] is None:
+                entry['controller'] = AIController(app, ai_kart_data, app.trackCurvePoints, kart_seeds[i])
+            else:
+                entry['controller'].reset(kart_seeds[i])
+            app.ai_controllers.append(entry['controller'])
+        else:
+            print(f"Warning: Could not create AIController for {ai_kart_data['name']} due to missing track points.")
+
+    # Advance all AI karts together in one vectorized step
+    app.ai_fleet = AIFleet(app, app.ai_controllers)
+
+def remove_ai_racers(app):
+    """
+    Removes the AI karts of the previous race from the scene and the collision
+    system, returning them to the kart pool
+    """
+    app.kart_pool.release_all()
+    app.ai_karts = []
+    app.ai_controllers = []
+    app.ai_fleet = None
+
+def rank_racers(player_data, ai_karts):
+    """
+    Builds the final race rankings from the player's result and the AI kart data.
+
+    Args:
+        player_data: Dict with the player's 'name', 'laps', 'progress', 'finish_time' and 'is_player'
+        ai_karts: List of AI kart data dicts
+
+    Returns:
+        list: Racer dicts sorted by rank, each with its 1-based 'position'
+    """
+    all_racers = [player_data]
+    for ai_kart_info in ai_karts:
+        ai_laps = ai_kart_info.get('current_lap', 0)
+        ai_finish_time = ai_kart_info.get('finish_time', None)
+        ai_progress = ai_kart_info.get('lap_progress', 0)
+        
+        # If AI finished the lap before player, its finish_time is already recorded.
+        # If AI is still racing, its finish_time is None.
+        # If AI finished after player, its finish_time might be recorded by its controller
+        # just before or after this game_won state change, ensure it's captured if available.
+        
+        all_racers.append({
+            'name': ai_kart_info.get('name', 'AI Racer'),
+            'laps': ai_laps,
+            'progress': ai_progress if ai_finish_time is None else 1.0,
+            'finish_time': ai_finish_time,
+            'is_player': False
+        })
+    
+    # Sort racers: 
+    # 1. By laps completed (descending).
+    # 2. By finish_time (ascending, None means not finished, so they come after). Handle -1 for AI early finish. 
+    # 3. By progress on current lap (descending for those not finished).
+    def sort_key(racer):
+        laps = racer['laps']
+        time = racer['finish_time']
+        progress = racer['progress']
+
+        # Primary sort: Laps (higher is better)
+        sort_laps = -laps 
+
+        # Secondary sort: Finish Time (lower is better for finished racers)
+        # Racers who haven't finished (time is None) are ranked lower than those who have.
+        # AI karts with finish_time == -1 finished but their time might not be comparable, rank them after timed finishers.
+        if time is None:
+            sort_time = float('inf') # Not finished, rank last among same-lap racers
+        elif time == -1: # AI finished, but timer context might be off (e.g. player didn't move)
+            sort_time = float('inf') -1 # Rank just above those who didn't finish at all
+        else:
+            sort_time = time
+        
+        # Tertiary sort: Progress (higher is better for those on the same lap and not finished)
+        sort_progress = -progress if time is None else 0
+
+        return (sort_laps, sort_time, sort_progress)
+
+    all_racers.sort(key=sort_key)
+    
+    # Assign positions
+    for i, racer in enumerate(all_racers):
+        racer['position'] = i + 1
+    return all_racers
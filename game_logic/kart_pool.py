@@ -0,0 +1,59 @@
+from game_objects.kart import create_kart
+
+class KartPool:
+    def __init__(self, app):
+        """
+        Keeps AI kart nodes, colliders and AIControllers alive across races.
+        Karts released at the end of a race are detached from the scene and the
+        collision system, and handed out again (reset) by the next race, so a
+        restart creates no nodes and the traverser only ever holds the colliders
+        of the karts currently racing.
+        - app: The application; provides gameRoot, loader, cTrav, pusher and
+          (optionally) barrier_pusher
+        """
+        self.app = app
+        self.free = {}  # Kart color -> released entries of that color
+        self.in_use = []
+
+    def acquire(self, color):
+        """
+        Returns a pooled kart of the given color, attached to the scene and
+        registered with the collision system.
+
+        Returns:
+            dict: Pool entry with the kart's 'node', 'collider' and 'color', plus the
+                  'kart_data' and 'controller' stored by its previous race (None for
+                  a new kart)
+        """
+        entries = self.free.get(color)
+        if entries:
+            entry = entries.pop()
+            entry['node'].reparentTo(self.app.gameRoot)
+        else:
+            kart_node, collider = create_kart(self.app.gameRoot, self.app.loader, color=color, show_collider=False)
+            # Configurar colisão para AI karts
+            collider.node().setFromCollideMask(0x1 | 0x2)  # AI Karts will test for collisions with barriers and other karts
+            collider.node().setIntoCollideMask(0x2)  # Other karts can collide with this kart
+            entry = {'node': kart_node, 'collider': collider, 'color': color, 'kart_data': None, 'controller': None}
+
+        # Configurar o pusher para o kart da AI para evitar atravessamento
+        self.app.pusher.add_collider(entry['collider'], entry['node'])
+        self.app.cTrav.add_collider(entry['collider'], self.app.pusher)
+        if getattr(self.app, 'barrier_pusher', None) is not None:
+            self.app.barrier_pusher.add_collider(entry['collider'], entry['node'])
+        self.in_use.append(entry)
+        return entry
+
+    def release_all(self):
+        """
+        Takes every kart in use out of the scene and the collision system, keeping
+        it for the next race
+        """
+        for entry in self.in_use:
+            self.app.cTrav.remove_collider(entry['collider'])
+            self.app.pusher.remove_collider(entry['collider'])
+            if getattr(self.app, 'barrier_pusher', None) is not None:
+                self.app.barrier_pusher.remove_collider(entry['collider'])
+            entry['node'].detachNode()
+            self.free.setdefault(entry['color'], []).append(entry)
+        self.in_use = []
@@ -0,0 +1,159 @@
+import numpy as np
+from panda3d.core import (GeomVertexFormat, Geom, GeomLines, GeomNode, CollisionNode, CollisionPolygon, Point3,
+                          RenderState, ColorAttrib, RenderModeAttrib, BoundingVolume)
+from utils.mesh_arrays import make_vertex_data, make_primitive
+
+# Number of consecutive barriers merged into one geometry and collision chunk
+BARRIER_CHUNK_SIZE = 16
+# Number of children per node of the chunk hierarchy (consecutive chunks along the track)
+CHUNK_GROUP_SIZE = 4
+# Extra size added around each barrier's collision faces
+COLLISION_PADDING = 0.05
+
+# 8 corners of a unit box, scaled by the half size of the barrier
+BOX_CORNERS = np.array([
+    (-1, -1, -1), (1, -1, -1), (1, 1, -1), (-1, 1, -1),
+    (-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1)
+], dtype=np.float64)
+# Faces of the box, each split into two triangles
+BOX_FACES = [
+    (0, 1, 2, 3),  # bottom
+    (4, 5, 6, 7),  # top
+    (0, 1, 5, 4),  # front
+    (2, 3, 7, 6),  # back
+    (1, 2, 6, 5),  # right
+    (3, 0, 4, 7)   # left
+]
+# The two triangles of each face
+BOX_TRIANGLES = np.array([((a, b, c), (a, c, d)) for a, b, c, d in BOX_FACES])
+# Vertical sides, wound counter-clockwise seen from outside so their normals point out
+BOX_SIDES = BOX_FACES[2:]
+# Edges drawn as the black border
+BOX_EDGES = [
+    (0, 1), (1, 2), (2, 3), (3, 0),  # bottom
+    (4, 5), (5, 6), (6, 7), (7, 4),  # top
+    (0, 4), (1, 5), (2, 6), (3, 7)   # verticals
+]
+
+def box_corners(placements, size):
+    """
+    Computes the world corners of every barrier box.
+
+    Args:
+        placements: List of ((x, y, z) center, heading) tuples
+        size: (width, depth, height) of one barrier
+
+    Returns:
+        (N, 8, 3) array of corner positions
+    """
+    centers = np.array([center for center, _ in placements], dtype=np.float64).reshape(-1, 3)
+    headings = np.radians([heading for _, heading in placements])
+    local = BOX_CORNERS * (np.array(size, dtype=np.float64) / 2.0)
+    cos_h, sin_h = np.cos(headings)[:, None], np.sin(headings)[:, None]
+    corners = np.empty((len(centers), 8, 3))
+    corners[:, :, 0] = centers[:, None, 0] + local[None, :, 0] * cos_h - local[None, :, 1] * sin_h
+    corners[:, :, 1] = centers[:, None, 1] + local[None, :, 0] * sin_h + local[None, :, 1] * cos_h
+    corners[:, :, 2] = centers[:, None, 2] + local[None, :, 2]
+    return corners
+
+def barrier_footprints(placements, size):
+    """
+    Returns the (N, 4, 2) X/Y corners of every barrier's collision box, as used by
+    the analytic barrier collision (physics.barrier_collision)
+    """
+    padded_size = tuple(s + 2 * COLLISION_PADDING for s in size)
+    return box_corners(placements, padded_size)[:, :4, :2]
+
+def _create_chunk_geom(corners, face_color, border_color):
+    """
+    Creates one GeomNode holding the boxes and black borders of a chunk of barriers
+    """
+    vdata = make_vertex_data('barrier_chunk', GeomVertexFormat.getV3c4(), {
+        'vertex': corners.reshape(-1, 3), 'color': face_color
+    })
+    base = (np.arange(len(corners)) * 8)[:, None]
+    boxes = Geom(vdata)
+    boxes.addPrimitive(make_primitive(base + BOX_TRIANGLES.reshape(-1)))
+    borders = Geom(vdata)
+    borders.addPrimitive(make_primitive(base + np.array(BOX_EDGES).reshape(-1), GeomLines))
+
+    node = GeomNode('barrier_chunk_geom')
+    node.addGeom(boxes)
+    # The borders reuse the box vertices, drawn in the border color as thick lines
+    node.addGeom(borders, RenderState.make(
+        ColorAttrib.makeFlat(border_color),
+        RenderModeAttrib.make(RenderModeAttrib.MUnchanged, 3.0)
+    ))
+    return node
+
+def _create_chunk_collision(corners):
+    """
+    Creates one CollisionNode with the four vertical sides of every barrier in a chunk
+    """
+    cnode = CollisionNode('barrier_collision')
+    for box in corners:
+        for a, b, c, d in BOX_SIDES:
+            cnode.addSolid(CollisionPolygon(Point3(*box[a]), Point3(*box[b]), Point3(*box[c]), Point3(*box[d])))
+    # A barreira deve ser colidida mas não testar colisão com outros objetos
+    cnode.setIntoCollideMask(0x1)  # Objects can collide into this barrier
+    cnode.setFromCollideMask(0)    # Barrier won't test for collisions itself
+    return cnode
+
+def _group_chunks(parent, chunks, group_size=CHUNK_GROUP_SIZE):
+    """
+    Arranges consecutive chunks into a tree of 'barrier_group' nodes. Each group
+    covers a stretch of the track, so its bounding box lets the collision traverser
+    (and the renderer's culling) skip all the chunks in that stretch with one test.
+    - parent: NodePath the top of the tree is attached to
+    - chunks: Chunk NodePaths in order along the track
+    """
+    if len(chunks) <= group_size:
+        for chunk_np in chunks:
+            chunk_np.reparentTo(parent)
+        return
+    per_group = -(-len(chunks) // group_size)
+    for start in range(0, len(chunks), per_group):
+        group_np = parent.attachNewNode('barrier_group')
+        group_np.node().setBoundsType(BoundingVolume.BT_box)
+        _group_chunks(group_np, chunks[start:start + per_group], group_size)
+
+def build_barriers(parent, placements, size=(2, 0.5, 1), face_color=(0.36, 0.23, 0.13, 1), border_color=(0, 0, 0, 1), chunk_size=BARRIER_CHUNK_SIZE, collision=True):
+    """
+    Builds a row of barrier blocks as a few merged chunks instead of one node per
+    block. Each chunk of consecutive barriers gets a single GeomNode (boxes and
+    borders) and a single 'barrier_collision' CollisionNode, so the barriers cost
+    a few draw calls. The chunks are grouped into a hierarchy along the track, so
+    the collision traverser only reaches the chunks near each kart and its cost
+    grows with the log of the track length rather than the number of barriers.
+
+    Args:
+        parent: NodePath to attach the barriers to
+        placements: List of ((x, y, z) center, heading) tuples, in order along the track
+        size: (width, depth, height) of one barrier
+        face_color: RGBA color of the box faces
+        border_color: RGBA color of the box edges
+        chunk_size: Number of barriers per chunk
+        collision: Whether to create the 'barrier_collision' nodes (False when the
+                   barriers are handled by physics.barrier_collision instead)
+
+    Returns:
+        NodePath: The 'barriers' node at the top of the chunk hierarchy
+    """
+    barriers_np = parent.attachNewNode('barriers')
+    barriers_np.setTransparency(True)
+    if not placements:
+        return barriers_np
+    visual_corners = box_corners(placements, size)
+    padded_size = tuple(s + 2 * COLLISION_PADDING for s in size)
+    collision_corners = box_corners(placements, padded_size)
+
+    chunks = []
+    for start in range(0, len(placements), chunk_size):
+        chunk_np = barriers_np.attachNewNode('barrier_chunk')
+        chunk_np.node().setBoundsType(BoundingVolume.BT_box)
+        chunk_np.attachNewNode(_create_chunk_geom(visual_corners[start:start + chunk_size], face_color, border_color))
+        if collision:
+            chunk_np.attachNewNode(_create_chunk_collision(collision_corners[start:start + chunk_size]))
+        chunks.append(chunk_np)
+    _group_chunks(barriers_np, chunks)
+    return barriers_np
@@ -35,14 +35,17 @@ def create_building(start_pos, building_height=10.0, building_width=1.5, buildin
     border_scale = 1.04  # 4% larger for even more visibility
     half = (building_width * border_scale) / 2
     h = building_height * border_scale
-    # The box model is centered at building_pos, so we must center the border as well
-    z_center = building_pos.getZ()
-    z_bottom = z_center - h/2
-    z_top = z_center + h/2
+    # The box model spans from building_pos to building_pos + (width, width, height),
+    # so the border is centered on the middle of the box
+    center = building_pos + Vec3(building_width / 2, building_width / 2, building_height / 2)
+    z_bottom = center.getZ() - h/2
+    z_top = center.getZ() + h/2
+    x0, x1 = center.getX() - half, center.getX() + half
+    y0, y1 = center.getY() - half, center.getY() + half
     # 8 corners of the box (centered)
     corners = [
-        Vec3(-half, -half, z_bottom), Vec3(half, -half, z_bottom), Vec3(half, half, z_bottom), Vec3(-half, half, z_bottom),
-        Vec3(-half, -half, z_top), Vec3(half, -half, z_top), Vec3(half, half, z_top), Vec3(-half, half, z_top)
+        Vec3(x0, y0, z_bottom), Vec3(x1, y0, z_bottom), Vec3(x1, y1, z_bottom), Vec3(x0, y1, z_bottom),
+        Vec3(x0, y0, z_top), Vec3(x1, y0, z_top), Vec3(x1, y1, z_top), Vec3(x0, y1, z_top)
     ]
     edges = [
         (0,1),(1,2),(2,3),(3,0), # bottom
@@ -0,0 +1,135 @@
+import numpy as np
+from panda3d.core import Shader, Texture, GeomEnums, BoundingBox, Point3
+
+# Lights read by the instancing shader (the game uses one ambient and one directional light)
+MAX_LIGHTS = 4
+
+# Draws every instance of a prop from one Geom: the instance's transform is read from
+# a buffer texture holding one (x, y, z, heading in radians) texel per instance
+INSTANCE_VERTEX_SHADER = """
+#version 140
+
+uniform mat4 p3d_ModelViewProjectionMatrix;
+uniform mat3 p3d_NormalMatrix;
+uniform samplerBuffer instance_transforms;
+
+in vec4 p3d_Vertex;
+in vec3 p3d_Normal;
+in vec4 p3d_Color;
+in vec2 p3d_MultiTexCoord0;
+
+out vec3 view_normal;
+out vec4 vertex_color;
+out vec2 texcoord;
+
+void main() {
+    vec4 transform = texelFetch(instance_transforms, gl_InstanceID);
+    float c = cos(transform.w);
+    float s = sin(transform.w);
+    mat3 rotation = mat3(c, s, 0.0, -s, c, 0.0, 0.0, 0.0, 1.0);
+    gl_Position = p3d_ModelViewProjectionMatrix * vec4(rotation * p3d_Vertex.xyz + transform.xyz, 1.0);
+    view_normal = p3d_NormalMatrix * (rotation * p3d_Normal);
+    vertex_color = p3d_Color;
+    texcoord = p3d_MultiTexCoord0;
+}
+"""
+
+# Same shading as the fixed-function pipeline for the props (no material): the
+# color, textured, lit by the ambient light plus the diffuse term of each light
+INSTANCE_FRAGMENT_SHADER = """
+#version 140
+
+#define MAX_LIGHTS %d
+
+uniform sampler2D p3d_Texture0;
+uniform vec4 p3d_ColorScale;
+uniform struct p3d_LightModelParameters {
+    vec4 ambient;
+} p3d_LightModel;
+uniform struct p3d_LightSourceParameters {
+    vec4 color;
+    vec4 position;
+} p3d_LightSource[MAX_LIGHTS];
+
+in vec3 view_normal;
+in vec4 vertex_color;
+in vec2 texcoord;
+
+out vec4 p3d_FragColor;
+
+void main() {
+    vec3 normal = normalize(view_normal);
+    vec3 light = p3d_LightModel.ambient.rgb;
+    for (int i = 0; i < MAX_LIGHTS; ++i) {
+        // Directional lights: position.xyz points towards the light (not normalized)
+        vec3 light_direction = p3d_LightSource[i].position.xyz;
+        if (dot(light_direction, light_direction) > 0.0) {
+            light += p3d_LightSource[i].color.rgb * max(dot(normal, normalize(light_direction)), 0.0);
+        }
+    }
+    vec4 color = vertex_color * texture(p3d_Texture0, texcoord) * p3d_ColorScale;
+    p3d_FragColor = vec4(color.rgb * min(light, vec3(1.0)), color.a);
+}
+""" % MAX_LIGHTS
+
+_instance_shader = None
+
+def supports_instancing(gsg):
+    """
+    Returns whether a GraphicsStateGuardian can draw instanced props (GLSL, hardware
+    instancing and buffer textures). False without a GSG, as in headless races, and
+    for the software renderer.
+    """
+    return (gsg is not None and gsg.getSupportsGlsl() and gsg.getSupportsGeometryInstancing()
+            and gsg.getSupportsBufferTexture())
+
+def get_instance_shader():
+    """
+    Returns the shared instancing shader
+    """
+    global _instance_shader
+    if _instance_shader is None:
+        _instance_shader = Shader.make(Shader.SL_GLSL, INSTANCE_VERTEX_SHADER, INSTANCE_FRAGMENT_SHADER)
+    return _instance_shader
+
+def create_instanced_prop(parent, prototype, transforms, name='instanced_prop'):
+    """
+    Draws a prop at many places with one draw call per Geom of the prop, using
+    hardware instancing. Only works where supports_instancing() is True.
+
+    Args:
+        parent: NodePath to attach the instanced prop to
+        prototype: NodePath of the prop built at the origin; it is flattened and
+                   moved under the new node
+        transforms: (N, 4) array-like of (x, y, z, heading in degrees) per instance
+        name: Name of the new node
+
+    Returns:
+        NodePath: The node drawing all instances
+    """
+    transforms = np.array(transforms, dtype=np.float32).reshape(-1, 4)
+    transforms[:, 3] = np.radians(transforms[:, 3])
+    prop_np = parent.attachNewNode(name)
+    prototype.reparentTo(prop_np)
+    prototype.flattenStrong()
+
+    buffer = Texture(f'{name}_transforms')
+    buffer.setupBufferTexture(len(transforms), Texture.T_float, Texture.F_rgba32, GeomEnums.UH_static)
+    np.frombuffer(memoryview(buffer.modifyRamImage()), dtype=np.float32)[:] = transforms.reshape(-1)
+    prop_np.setShader(get_instance_shader())
+    prop_np.setShaderInput('instance_transforms', buffer)
+    prop_np.setInstanceCount(len(transforms))
+
+    # The computed bounds only cover the prop at the origin: give the node bounds
+    # enclosing every instance (the prop rotated to any heading), and stop culling there
+    prototype_bounds = prototype.getTightBounds()
+    if prototype_bounds is not None and len(transforms):
+        low, high = prototype_bounds
+        radius = max(abs(low.x), abs(low.y), abs(high.x), abs(high.y)) * np.sqrt(2.0)
+        positions = transforms[:, :3]
+        prop_np.node().setBounds(BoundingBox(
+            Point3(*(positions.min(axis=0) + (-radius, -radius, low.z))),
+            Point3(*(positions.max(axis=0) + (radius, radius, high.z)))
+        ))
+        prop_np.node().setFinal(True)
+    return prop_np
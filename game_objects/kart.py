@@ -1,4 +1,5 @@
 from panda3d.core import CardMaker, Vec4, CollisionNode, CollisionBox, Point3, NodePath
+from game_objects.kart_models import load_kart_model, KART_MODEL_FILES, DEFAULT_KART_MODEL
 
 def create_kart(game_root, loader, color=Vec4(1, 0, 0, 1), show_collider=False):
     """
@@ -14,27 +15,14 @@ def create_kart(game_root, loader, color=Vec4(1, 0, 0, 1), show_collider=False):
         tuple: (kart_node, collider_node)
     """
     
-    # Map colors to model files
-    color_to_model = {
-        Vec4(0, 0, 1, 1): "models/car-blue.egg",
-        Vec4(0, 0.8, 0, 1): "models/car-green.egg",
-        Vec4(1, 0, 0, 1): "models/car-red.egg",
-        Vec4(1, 1, 0, 1): "models/car-yellow.egg",
-        Vec4(0.8, 0, 0.8, 1): "models/car-purple.egg",
-        Vec4(1, 0.5, 0, 1): "models/car-orange.egg",
-    }
-    
-    # Get the appropriate model file based on color
-    model_file = color_to_model.get(color, "models/car-orange.egg")  # Default to orange if color not found
-    
     try:
-        # Try loading the car model from .egg file
-        kart = loader.loadModel(model_file)
-        kart.reparentTo(game_root)
+        # Copy of the color's prototype, loaded once from its .bam conversion
+        kart = load_kart_model(loader, color, game_root)
         kart.setScale(1.0, 1.0, 1.0)  # Set scale back to 1.0 to make the car larger
         
     except OSError:
         # Fallback if model file is not found
+        model_file = KART_MODEL_FILES.get(color, DEFAULT_KART_MODEL)
         print(f"Warning: {model_file} not found. Using CardMaker fallback for kart.")
         cm = CardMaker("kart-card")  # Use CardMaker to create a flat card initially
         cm.setFrame(-0.5, 0.5, -0.5, 0.5)  # Set the size of the card
@@ -0,0 +1,84 @@
+import os
+import sys
+from panda3d.core import Vec4, Filename, Loader, LoaderOptions, NodePath, PandaSystem
+from utils.disk_cache import hash_key, get_cache_path
+from utils.mesh_lod import add_lod
+
+# Model file of each kart color offered by the game
+KART_MODEL_FILES = {
+    Vec4(0, 0, 1, 1): "models/car-blue.egg",
+    Vec4(0, 0.8, 0, 1): "models/car-green.egg",
+    Vec4(1, 0, 0, 1): "models/car-red.egg",
+    Vec4(1, 1, 0, 1): "models/car-yellow.egg",
+    Vec4(0.8, 0, 0.8, 1): "models/car-purple.egg",
+    Vec4(1, 0.5, 0, 1): "models/car-orange.egg",
+}
+# Used for colors without a model of their own
+DEFAULT_KART_MODEL = "models/car-orange.egg"
+# (decimation cell size, camera distance) of each level of detail of the kart models:
+# full detail up close, then vertex-clustered copies (about 1/2 and 1/17 of the triangles)
+KART_LOD_LEVELS = [(None, 25.0), (0.1, 60.0), (0.25, 1000.0)]
+# Point of the kart the LOD distance is measured from
+KART_LOD_CENTER = (0, 0, 0.35)
+
+# Loaded model of each model file, copied for every kart that uses it
+_prototypes = {}
+
+def get_kart_bam_path(egg_file):
+    """
+    Returns the path of the .bam conversion of a kart .egg model, converting it
+    first when it is missing or older than the .egg file. The conversion holds the
+    model's levels of detail (KART_LOD_LEVELS).
+    The cache key includes the Panda3D version, as .bam files are tied to it.
+
+    Raises:
+        OSError: If the .egg file does not exist or cannot be loaded
+    """
+    stat = os.stat(egg_file)
+    key = hash_key(os.path.basename(egg_file), stat.st_size, stat.st_mtime_ns, PandaSystem.getVersionString(), KART_LOD_LEVELS, KART_LOD_CENTER)
+    bam_path = get_cache_path('kart', key, 'bam')
+    if not os.path.exists(bam_path):
+        # Panda's own model cache is skipped: the .bam written here replaces it
+        options = LoaderOptions(LoaderOptions.LF_search | LoaderOptions.LF_report_errors | LoaderOptions.LF_no_cache)
+        model_node = Loader.getGlobalPtr().loadSync(Filename.fromOsSpecific(os.path.abspath(egg_file)), options)
+        if model_node is None:
+            raise OSError(f"Could not load {egg_file}")
+        model = NodePath(model_node)
+        add_lod(model, KART_LOD_LEVELS, KART_LOD_CENTER)
+        if not model.writeBamFile(Filename.fromOsSpecific(os.path.abspath(bam_path))):
+            print(f"Warning: could not cache kart model {egg_file}")
+            return egg_file
+    return bam_path
+
+def convert_kart_models():
+    """
+    Converts every kart model to .bam ahead of time, so the first race does not
+    parse the .egg text files
+    """
+    for egg_file in sorted(set(KART_MODEL_FILES.values())):
+        print(f"{egg_file} -> {get_kart_bam_path(egg_file)}")
+
+def load_kart_model(loader, color, parent):
+    """
+    Returns a copy of the kart model for a color, attached to parent. Each model
+    is loaded (from its .bam conversion) only once; later karts copy the loaded
+    prototype's nodes, sharing its geometry.
+
+    Args:
+        loader: The asset loader
+        color: The color of the kart (Vec4)
+        parent: NodePath to attach the copy to
+
+    Raises:
+        OSError: If the model file is not found
+    """
+    model_file = KART_MODEL_FILES.get(color, DEFAULT_KART_MODEL)
+    prototype = _prototypes.get(model_file)
+    if prototype is None:
+        prototype = loader.loadModel(Filename.fromOsSpecific(os.path.abspath(get_kart_bam_path(model_file))))
+        _prototypes[model_file] = prototype
+    return prototype.copyTo(parent)
+
+if __name__ == "__main__":
+    convert_kart_models()
+    sys.exit(0)
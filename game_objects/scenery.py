@@ -0,0 +1,119 @@
+import math
+import numpy as np
+from panda3d.core import Vec3, ModelNode, GeomVertexData, GeomVertexFormat, GeomVertexArrayFormat, GeomEnums, InternalName
+from game_objects.tree import create_tree
+from game_objects.building import create_building
+from game_objects.instanced_props import create_instanced_prop
+from utils.mesh_lod import add_lod
+
+# Function creating each kind of prop at a given position
+PROP_BUILDERS = {
+    'tree': create_tree,
+    'building': create_building,
+}
+
+# Props are flattened together in square cells of this size (world units)
+SCENERY_CELL_SIZE = 100.0
+# (decimation cell size, camera distance) of each level of detail of a scenery cell
+SCENERY_LOD_LEVELS = [(None, 150.0), (0.3, 2000.0)]
+
+# Static props placed around the circuit: (kind, (x, y, z) position)
+TRACK_SCENERY = [
+    ('tree', (273.61, -136.40, 0.50)),  # At the starting line
+    ('tree', (296.24, 40.10, 0.50)),
+    ('tree', (284.63, 169.95, 0.50)),
+    ('tree', (52.04, 187.09, 0.50)),
+    ('building', (294.69, -107.00, 0.50)),
+]
+
+def _add_missing_normals(prop_np):
+    """
+    Gives an up-facing normal to every vertex of the prop's Geoms that have none
+    (e.g. the sphere model). Without normals the fixed-function pipeline lights a
+    Geom as if it faced up, but once flattened together with Geoms that do have
+    normals its vertices would get zero normals and lose all diffuse light.
+    The Geoms are copied, as loaded models share them with the loader's cache.
+    """
+    for geom_np in prop_np.findAllMatches('**/+GeomNode'):
+        geom_node = geom_np.node()
+        for i in range(geom_node.getNumGeoms()):
+            vdata = geom_node.getGeom(i).getVertexData()
+            if vdata.hasColumn(InternalName.getNormal()):
+                continue
+            normal_array = GeomVertexArrayFormat(InternalName.getNormal(), 3, GeomEnums.NT_float32, GeomEnums.C_normal)
+            vertex_format = GeomVertexFormat(vdata.getFormat())
+            vertex_format.addArray(normal_array)
+            vdata = GeomVertexData(vdata.convertTo(GeomVertexFormat.registerFormat(vertex_format)))
+            array_index = vdata.getFormat().getNumArrays() - 1
+            np.frombuffer(memoryview(vdata.modifyArray(array_index)).cast('B'), dtype=np.float32).reshape(-1, 3)[:] = (0, 0, 1)
+            geom = geom_node.getGeom(i).makeCopy()
+            geom.setVertexData(vdata)
+            geom_node.setGeom(i, geom)
+
+def _build_prototype(kind):
+    """
+    Builds one prop of a kind at the origin, ready to be flattened
+    """
+    prototype = PROP_BUILDERS[kind](Vec3(0, 0, 0))
+    _add_missing_normals(prototype)
+    # Loaded models keep their ModelRoot through a flatten unless told otherwise
+    for model_np in prototype.findAllMatches('**/+ModelNode'):
+        model_np.node().setPreserveTransform(ModelNode.PT_drop_node)
+    return prototype
+
+def build_scenery(parent, props, flatten=True, instanced=False, lod_levels=SCENERY_LOD_LEVELS):
+    """
+    Places static props under a single 'scenery' node.
+    Each kind of prop is built once, at the origin, and every placement is an
+    instance of that prototype moved to its position. The props are grouped into
+    square cells of SCENERY_CELL_SIZE and each cell is flattened, so hundreds of
+    props end up as a handful of Geoms per cell (one per color and render state)
+    instead of several nodes per prop. Each cell is drawn through an LODNode that
+    switches to a decimated copy of it far from the camera, and cells out of view
+    are culled as a whole.
+    With instanced=True, each kind is instead drawn with hardware instancing (see
+    game_objects.instanced_props): its Geoms are drawn once per placement with one
+    draw call each, so the geometry is not duplicated for every prop.
+
+    Args:
+        parent: NodePath to attach the scenery to
+        props: List of (kind, (x, y, z) position) tuples; kinds are keys of PROP_BUILDERS
+        flatten: Whether to flatten the props (False keeps one instance node per prop)
+        instanced: Whether to use hardware instancing; only if the GSG supports it
+                   (see instanced_props.supports_instancing)
+        lod_levels: Levels of detail of the flattened cells (see utils.mesh_lod.add_lod);
+                    None or empty for no LOD
+
+    Returns:
+        NodePath: The 'scenery' node
+    """
+    scenery_np = parent.attachNewNode('scenery')
+    if instanced:
+        transforms = {}
+        for kind, (x, y, z) in props:
+            transforms.setdefault(kind, []).append((x, y, z, 0.0))
+        for kind, kind_transforms in transforms.items():
+            create_instanced_prop(scenery_np, _build_prototype(kind), kind_transforms, kind)
+        return scenery_np
+
+    prototypes = {}
+    cells = {}
+    for kind, position in props:
+        if kind not in prototypes:
+            prototypes[kind] = _build_prototype(kind)
+        cell = (math.floor(position[0] / SCENERY_CELL_SIZE), math.floor(position[1] / SCENERY_CELL_SIZE))
+        if cell not in cells:
+            # Flattening stops at ModelNodes kept with PT_local, so the cells are not
+            # merged together. Everything is flattened at once: flattening the shared
+            # prototypes again for each cell would corrupt them.
+            cells[cell] = scenery_np.attachNewNode(ModelNode('scenery_cell'))
+            cells[cell].node().setPreserveTransform(ModelNode.PT_local)
+        placement_np = cells[cell].attachNewNode(kind)
+        placement_np.setPos(*position)
+        prototypes[kind].instanceTo(placement_np)
+    if flatten:
+        scenery_np.flattenStrong()
+        if lod_levels:
+            for cell_np in cells.values():
+                add_lod(cell_np, lod_levels, center=cell_np.getBounds().getApproxCenter())
+    return scenery_np
@@ -1,26 +1,37 @@
-from panda3d.core import Point3, Vec3, Vec4, GeomVertexFormat, GeomVertexData, GeomVertexWriter, Geom, GeomTriangles, GeomNode, LineSegs, NodePath
+from panda3d.core import Point3, Vec3, Vec4, GeomVertexFormat, GeomVertexData, GeomVertexWriter, Geom, GeomTriangles, GeomNode, LineSegs, NodePath, PandaSystem
 import math
-from utils.spline import eval_catmull_rom, tangent_catmull_rom
-from game_objects.barrier_block import BarrierBlock  # Import BarrierBlock
-from game_objects.tree import create_tree
-from game_objects.building import create_building
+import numpy as np
+from utils.spline import sample_catmull_rom, normalize_rows
+from utils.mesh_arrays import make_vertex_data, make_primitive
+from game_objects.barrier_builder import build_barriers, barrier_footprints
+from game_objects.scenery import build_scenery, TRACK_SCENERY
+from game_objects.instanced_props import supports_instancing
+from physics.terrain_raster import load_or_build_terrain_raster
+from physics.barrier_collision import BarrierLine
+from utils.disk_cache import hash_key, get_cache_path
+import config
+from config import ROAD_WIDTH, SAND_BORDER_WIDTH, STRIPE_WIDTH
 
-def create_track(game_root):
+# Bump when the generated track geometry changes, so older cache files are not loaded
+TRACK_CACHE_VERSION = 6
+
+def create_track(game_root, gsg=None):
     """
     Creates the track for the game with a road surface and sand border
-    Returns track object and track curve points for kart positioning
+    Returns track object and track curve points for kart positioning.
+    The baked terrain raster is attached to the track node as the
+    'terrain_raster' Python tag, and the barrier fence layout as 'barrier_line'.
+    The generated geometry is cached on disk (in `cache/`) as a .bam file keyed
+    by the control points and widths, so later launches load it instead of
+    rebuilding it. The scenery is built on every launch, as the instancing
+    shader cannot be stored in a .bam file.
+    - gsg: The window's GraphicsStateGuardian, to check for instancing support
+      (None draws the scenery without instancing)
     """
-    track_node = game_root.attachNewNode("Track")
-    track_color = Vec4(0.3, 0.3, 0.3, 1)  # Dark gray for the road surface
-    start_line_color = Vec4(0.9, 0.9, 0.9, 1)  # White for the start line
-    sand_color = Vec4(0.87, 0.77, 0.54, 1)  # Beige/sand color for the border
-    warning_stripe_white = Vec4(1.0, 1.0, 1.0, 1)  # White for warning stripes
-    warning_stripe_red = Vec4(1.0, 0.2, 0.2, 1)  # Red for warning stripes
-    road_width = 15.0  # Width of the actual drivable road
-    sand_border_width = 12.0  # Width of the sand border on each side (increased for difficult curves)
+    road_width = ROAD_WIDTH  # Width of the actual drivable road
+    sand_border_width = SAND_BORDER_WIDTH  # Width of the sand border on each side (increased for difficult curves)
     track_width = road_width + (sand_border_width * 2)  # Total width including sand borders
     segments_per_curve = 30  # Further increased for smoother curves
-    world_up = Vec3(0, 0, 1)
 
     # Define the control points for the Catmull-Rom spline.
     # We need points before the start and after the end for the spline calculation.
@@ -46,116 +57,84 @@ def create_track(game_root):
     track_points.append(raw_track_points[0])  # Add P0 as P_{n}
     track_points.append(raw_track_points[1])  # Add P1 as P_{n+1}
 
-    # --- Generate Spline Points and Track Vertices ---
-    track_curve_points = []  # Store centerline points for kart positioning
-    road_vertex_list = []  # Stores vertices for the road surface
-    sand_vertex_list = []  # Stores vertices for the sand borders
-
-    # We'll place the barrier after generating the track_curve_points
+    # The barrier collision mode decides whether the barrier collision nodes exist
+    key = hash_key(TRACK_CACHE_VERSION, PandaSystem.getVersionString(), raw_track_points, road_width,
+                   sand_border_width, STRIPE_WIDTH, segments_per_curve, config.BARRIER_COLLISION_MODE)
+    cached = load_cached_track(key)
+    if cached is not None:
+        track_node, track_curve_points, footprints = cached
+        track_node.reparentTo(game_root)
+    else:
+        track_node = game_root.attachNewNode("Track")
+        track_curve_points, footprints = build_track_geometry(track_node, track_points, segments_per_curve)
+        save_track_cache(key, track_node, track_curve_points, footprints)
 
-    # --- Place a tree at the starting line ---
-    # The starting line is at the first point of the track_curve_points (after generation)
-    # We'll add the tree after generating the track_curve_points below, before returning
+    # --- Static scenery (trees, buildings) under one node, instanced or flattened ---
+    build_scenery(track_node, TRACK_SCENERY, instanced=config.SCENERY_INSTANCING and supports_instancing(gsg))
 
-    for i in range(1, num_points + 1):
-        p0 = track_points[i - 1]
-        p1 = track_points[i]    # Segment starts here
-        p2 = track_points[i + 1]  # Segment ends here
-        p3 = track_points[i + 2]
+    # --- Bake (or load) the terrain raster used for O(1) surface queries ---
+    terrain_raster = load_or_build_terrain_raster(
+        raw_track_points, track_curve_points, road_width, track_width, STRIPE_WIDTH
+    )
+    track_node.setPythonTag('terrain_raster', terrain_raster)
+    # Fence layout for the analytic barrier collision
+    track_node.setPythonTag('barrier_line', BarrierLine(footprints))
 
-        is_start_segment = (i == 1)  # Is this the first segment (for start line color)?
-
-        # Generate points along this segment
-        for j in range(segments_per_curve):
-            t = float(j) / segments_per_curve
-            point = eval_catmull_rom(p0, p1, p2, p3, t)
-            tangent = tangent_catmull_rom(p0, p1, p2, p3, t)
-            tangent.normalize()
+    return track_node, track_curve_points, track_points
 
-            if j == 0 and i == 1:
-                track_curve_points.append(point)  # Add first point
+def build_track_geometry(track_node, track_points, segments_per_curve):
+    """
+    Generates the road, warning stripes, start line and barriers under
+    track_node from the spline control points (with their wraparound points).
 
-            # Calculate the perpendicular vector (binormal)
-            binormal = tangent.cross(world_up)
-            binormal.normalize()
+    Returns:
+        tuple: (track_curve_points, barrier footprints) where the footprints are the
+               (N, 4, 2) array used by BarrierLine
+    """
+    track_color = Vec4(0.3, 0.3, 0.3, 1)  # Dark gray for the road surface
+    start_line_color = Vec4(0.9, 0.9, 0.9, 1)  # White for the start line
+    sand_color = Vec4(0.87, 0.77, 0.54, 1)  # Beige/sand color for the border
+    warning_stripe_white = Vec4(1.0, 1.0, 1.0, 1)  # White for warning stripes
+    warning_stripe_red = Vec4(1.0, 0.2, 0.2, 1)  # Red for warning stripes
+    road_width = ROAD_WIDTH  # Width of the actual drivable road
+    sand_border_width = SAND_BORDER_WIDTH  # Width of the sand border on each side (increased for difficult curves)
+    track_width = road_width + (sand_border_width * 2)  # Total width including sand borders
+    world_up = Vec3(0, 0, 1)
+    num_points = len(track_points) - 3
 
-            # Calculate road vertices (inner part of the track)
-            v_road_left = point - binormal * road_width / 2.0
-            v_road_right = point + binormal * road_width / 2.0
-            
-            # Add stripes to all track sections, not just difficult curves
-            stripe_width = 1.0
-            v_stripe_left = v_road_left - binormal * stripe_width
-            v_stripe_right = v_road_right + binormal * stripe_width
-            stripe_color = warning_stripe_white if (j % 2 == 0) else warning_stripe_red
-            
-            # Store vertices
-            road_vertex_list.append({
-                'left': v_road_left, 
-                'right': v_road_right, 
-                'start_line': is_start_segment,
-                'stripe_color': stripe_color,
-                'stripe_left': v_stripe_left,
-                'stripe_right': v_stripe_right
-            })
-            
-            # Calculate sand border vertices (outer part of the track)
-            v_sand_left = point - binormal * track_width / 2.0
-            v_sand_right = point + binormal * track_width / 2.0
-            
-            # Store vertices
-            sand_vertex_list.append({
-                'inner_left': v_road_left,
-                'outer_left': v_sand_left,
-                'inner_right': v_road_right,
-                'outer_right': v_sand_right
-            })
+    # --- Generate Spline Points and Track Vertices ---
+    # Each control segment is sampled at t = 0, 1/S, ..., (S-1)/S and again at t = 1,
+    # all segments at once. Cross-section k = (segment i - 1) * (S + 1) + sample j.
+    samples_t = np.append(np.arange(segments_per_curve) / segments_per_curve, 1.0)
+    control = np.array([(p.x, p.y, p.z) for p in track_points], dtype=np.float32)
+    sample_points, sample_tangents = sample_catmull_rom(control, samples_t)
+    points = sample_points.reshape(-1, 3)
+    tangents = normalize_rows(sample_tangents.reshape(-1, 3))
+    # Perpendicular vector (binormal): tangent x world_up
+    binormals = normalize_rows(np.stack([tangents[:, 1], -tangents[:, 0], np.zeros(len(tangents), dtype=np.float32)], axis=1))
 
-            # Store centerline point (except the very last duplicate)
-            if not (j == segments_per_curve - 1 and i == num_points):
-                track_curve_points.append(point)
+    # Road vertices (inner part of the track)
+    road_left = points - binormals * road_width / 2.0
+    road_right = points + binormals * road_width / 2.0
+    # Add stripes to all track sections, not just difficult curves
+    stripe_left = road_left - binormals * STRIPE_WIDTH
+    stripe_right = road_right + binormals * STRIPE_WIDTH
+    # Stripes alternate with j; the closing sample of each segment follows the segment number
+    stripe_red = np.empty((num_points, segments_per_curve + 1), dtype=bool)
+    stripe_red[:, :-1] = np.arange(segments_per_curve) % 2 == 1
+    stripe_red[:, -1] = np.arange(1, num_points + 1) % 2 == 1
+    stripe_colors = np.where(stripe_red.reshape(-1, 1), tuple(warning_stripe_red), tuple(warning_stripe_white))
+    # Sand border vertices (outer part of the track)
+    sand_left = points - binormals * track_width / 2.0
+    sand_right = points + binormals * track_width / 2.0
 
-        # Add the final point of the segment explicitly (t=1)
-        point = eval_catmull_rom(p0, p1, p2, p3, 1.0)
-        tangent = tangent_catmull_rom(p0, p1, p2, p3, 1.0)
-        tangent.normalize()
-        binormal = tangent.cross(world_up)
-        binormal.normalize()
-        
-        # Road vertices
-        v_road_left = point - binormal * road_width / 2.0
-        v_road_right = point + binormal * road_width / 2.0
-        
-        # Add stripes to all track sections, not just difficult curves
-        stripe_width = 1.0
-        v_stripe_left = v_road_left - binormal * stripe_width
-        v_stripe_right = v_road_right + binormal * stripe_width
-        stripe_color = warning_stripe_white if (i % 2 == 0) else warning_stripe_red
-        
-        # Store vertices
-        road_vertex_list.append({
-            'left': v_road_left, 
-            'right': v_road_right, 
-            'start_line': is_start_segment,
-            'stripe_color': stripe_color,
-            'stripe_left': v_stripe_left,
-            'stripe_right': v_stripe_right
-        })
-        
-        # Sand border vertices
-        v_sand_left = point - binormal * track_width / 2.0
-        v_sand_right = point + binormal * track_width / 2.0
-        
-        # Store vertices
-        sand_vertex_list.append({
-            'inner_left': v_road_left,
-            'outer_left': v_sand_left,
-            'inner_right': v_road_right,
-            'outer_right': v_sand_right
-        })
-        # Don't add final centerline point here, it's the start of the next segment
+    # Centerline points for kart positioning: the first point twice, then every
+    # sample except the closing (t = 1) ones and the very last one
+    centerline = sample_points[:, :-1].reshape(-1, 3)[:-1]
+    track_curve_points = [Point3(*p) for p in np.concatenate([centerline[:1], centerline]).tolist()]
 
     # --- Place a sequence of Barrier Blocks along the inside ground ---
+    footprints = np.zeros((0, 4, 2))
     if len(track_curve_points) > 0:
         barrier_length = 4.0  # Length of each barrier
         barrier_depth = 1.0   # Depth (thickness)
@@ -163,113 +142,77 @@ def create_track(game_root):
         spacing = 0.001         # No gap between barriers
         arc_step = barrier_length + spacing
         # Calculate arc-lengths for the curve
-        arc_lengths = [0.0]
-        for i in range(1, len(track_curve_points)):
-            arc_lengths.append(arc_lengths[-1] + (track_curve_points[i] - track_curve_points[i-1]).length())
+        curve = np.array([(p.x, p.y, p.z) for p in track_curve_points], dtype=np.float32)
+        deltas = curve[1:] - curve[:-1]
+        segment_lengths = np.sqrt(deltas[:, 0] * deltas[:, 0] + deltas[:, 1] * deltas[:, 1] + deltas[:, 2] * deltas[:, 2])
+        arc_lengths = np.concatenate([[0.0], np.cumsum(segment_lengths.astype(np.float64))])
         total_length = arc_lengths[-1]
         # Place barriers at constant arc-length intervals, skipping first/last few
-        barrier_positions = []
-        t = 0.0
-        while t < total_length:
-            # Find segment index for this arc-length
-            for i in range(1, len(arc_lengths)):
-                if arc_lengths[i] >= t:
-                    break
-            else:
-                break
-            # Interpolate between points i-1 and i
-            seg_len = arc_lengths[i] - arc_lengths[i-1]
-            if seg_len == 0:
-                alpha = 0
-            else:
-                alpha = (t - arc_lengths[i-1]) / seg_len
-            pos = track_curve_points[i-1] * (1-alpha) + track_curve_points[i] * alpha
-            # Compute tangent and binormal
-            tangent = track_curve_points[i] - track_curve_points[i-1]
-            tangent_2d = Vec3(tangent.x, tangent.y, 0)
-            tangent_2d.normalize()
-            perp = Vec3(-tangent_2d.y, tangent_2d.x, 0)
-            perp.normalize()
-            heading = math.degrees(math.atan2(-perp.x, perp.y))
-            inner_offset = (road_width / 2.0) + (barrier_depth / 2.0) + 4.2
-            barrier_pos = pos - perp * inner_offset
-            barrier_positions.append((barrier_pos, heading))
-            t += arc_step
+        arc_positions = np.concatenate([[0.0], np.cumsum(np.full(int(total_length / arc_step) + 1, arc_step))])
+        arc_positions = arc_positions[arc_positions < total_length]
+        # Segment (points i-1 to i) holding each barrier
+        i = np.maximum(np.searchsorted(arc_lengths, arc_positions, side='left'), 1)
+        seg_len = arc_lengths[i] - arc_lengths[i - 1]
+        alpha = np.where(seg_len == 0, 0.0, (arc_positions - arc_lengths[i - 1]) / np.where(seg_len == 0, 1.0, seg_len))
+        pos = curve[i - 1] * (1 - alpha).astype(np.float32)[:, None] + curve[i] * alpha.astype(np.float32)[:, None]
+        # Compute tangent and binormal
+        tangent = curve[i] - curve[i - 1]
+        tangent_2d = normalize_rows(np.stack([tangent[:, 0], tangent[:, 1], np.zeros(len(tangent), dtype=np.float32)], axis=1))
+        perp = normalize_rows(np.stack([-tangent_2d[:, 1], tangent_2d[:, 0], np.zeros(len(tangent), dtype=np.float32)], axis=1))
+        # math.atan2 rather than np.arctan2, whose SIMD version can differ in the last bit
+        headings = np.array([math.degrees(math.atan2(-x, y)) for x, y in perp[:, :2].tolist()])
+        inner_offset = (road_width / 2.0) + (barrier_depth / 2.0) + 4.2
+        barrier_positions = pos - perp * np.float32(inner_offset)
         # Remove some barriers to hide contour details
-        barrier_positions = barrier_positions[0:-8]
+        barrier_positions, headings = barrier_positions[0:-8], headings[0:-8]
         # Get starting line position for exclusion
-        starting_line_pos = track_curve_points[0]
+        from_start = barrier_positions - curve[0]
         skip_radius = 8.0
-        for barrier_pos, heading in barrier_positions:
-            if (barrier_pos - starting_line_pos).length() < skip_radius:
-                continue
-            b = BarrierBlock(
-                track_node,
-                (barrier_pos.x, barrier_pos.y, barrier_pos.z + barrier_height / 2),
-                size=(barrier_length, barrier_depth, barrier_height),
-                hpr=(heading, 0, 0),
-                face_color=(0.32, 0.23, 0.13, 1),  # brown
-                border_color=(0, 0, 0, 1)          # black
-            )
+        keep = np.sqrt(from_start[:, 0] * from_start[:, 0] + from_start[:, 1] * from_start[:, 1] + from_start[:, 2] * from_start[:, 2]) >= skip_radius
+        barrier_placements = [
+            ((x, y, z + barrier_height / 2), heading)
+            for (x, y, z), heading in zip(barrier_positions[keep].tolist(), headings[keep].tolist())
+        ]
+        # All barriers are merged into a few chunks (geometry and collision)
+        build_barriers(
+            track_node,
+            barrier_placements,
+            size=(barrier_length, barrier_depth, barrier_height),
+            face_color=(0.32, 0.23, 0.13, 1),  # brown
+            border_color=(0, 0, 0, 1),         # black
+            collision=config.BARRIER_COLLISION_MODE != "analytic"
+        )
+        footprints = barrier_footprints(barrier_placements, (barrier_length, barrier_depth, barrier_height))
 
         # The barriers now form a continuous fence on the inside lawn
 
+    def strip_indices(num_sections, columns, left, right):
+        """
+        Triangle indices joining consecutive cross-sections of a strip, where each
+        section has `columns` vertices and (left, right) are the columns of the edges.
+        Returns one row of two triangles (6 indices) per segment.
+        """
+        base = (np.arange(num_sections - 1) * columns)[:, None]
+        return np.concatenate([
+            # First triangle (left_i, right_i, left_{i+1})
+            base + (left, right, left + columns),
+            # Second triangle (right_i, right_{i+1}, left_{i+1})
+            base + (right, right + columns, left + columns),
+        ], axis=1)
+
     # --- Create Sand Border Geometry ---
     def create_border_geometry():
         format = GeomVertexFormat.getV3n3c4()  # Vertex, Normal, Color
-        vdata = GeomVertexData('sand_border_geom', format, Geom.UHStatic)
         # Each cross-section has 4 vertices (inner_left, outer_left, inner_right, outer_right)
-        num_vertices = len(sand_vertex_list)
-        vdata.setNumRows(num_vertices * 4)
-        
-        vertex = GeomVertexWriter(vdata, 'vertex')
-        normal = GeomVertexWriter(vdata, 'normal')
-        color = GeomVertexWriter(vdata, 'color')
-        
-        for i in range(num_vertices):
-            v_info = sand_vertex_list[i]
-            
-            # Add vertices for left border (inner_left to outer_left)
-            # Inner left
-            vertex.addData3(v_info['inner_left'])
-            normal.addData3(world_up)
-            color.addData4(sand_color)
-            # Outer left
-            vertex.addData3(v_info['outer_left'])
-            normal.addData3(world_up)
-            color.addData4(sand_color)
-            
-            # Add vertices for right border (inner_right to outer_right)
-            # Inner right
-            vertex.addData3(v_info['inner_right'])
-            normal.addData3(world_up)
-            color.addData4(sand_color)
-            # Outer right
-            vertex.addData3(v_info['outer_right'])
-            normal.addData3(world_up)
-            color.addData4(sand_color)
-        
-        tris = GeomTriangles(Geom.UHStatic)
-        # Add triangles for the left and right sand borders
-        for i in range(num_vertices - 1):
-            # Base index for this segment
-            idx = i * 4
-            
-            # Left sand border - Two triangles
-            # First triangle: (inner_left_i, outer_left_i, inner_left_{i+1})
-            tris.addVertices(idx, idx + 1, idx + 4)
-            # Second triangle: (outer_left_i, outer_left_{i+1}, inner_left_{i+1})
-            tris.addVertices(idx + 1, idx + 5, idx + 4)
-            
-            # Right sand border - Two triangles
-            # First triangle: (inner_right_i, outer_right_i, inner_right_{i+1})
-            tris.addVertices(idx + 2, idx + 3, idx + 6)
-            # Second triangle: (outer_right_i, outer_right_{i+1}, inner_right_{i+1})
-            tris.addVertices(idx + 3, idx + 7, idx + 6)
-        
-        tris.closePrimitive()
+        num_sections = len(points)
+        vertices = np.stack([road_left, sand_left, road_right, sand_right], axis=1).reshape(-1, 3)
+        vdata = make_vertex_data('sand_border_geom', format, {
+            'vertex': vertices, 'normal': tuple(world_up), 'color': tuple(sand_color)
+        })
+        # Left and right sand borders, two triangles each per segment
+        indices = np.concatenate([strip_indices(num_sections, 4, 0, 1), strip_indices(num_sections, 4, 2, 3)], axis=1)
         geom = Geom(vdata)
-        geom.addPrimitive(tris)
+        geom.addPrimitive(make_primitive(indices))
         
         node = GeomNode('sand_border_geom_node')
         node.addGeom(geom)
@@ -278,53 +221,15 @@ def create_track(game_root):
     # --- Create Warning Stripes Geometry ---
     def create_warning_stripes_geometry():
         format = GeomVertexFormat.getV3n3c4()  # Vertex, Normal, Color
-        vdata = GeomVertexData('warning_stripes_geom', format, Geom.UHStatic)
-        
-        # Count vertices needed (2 vertices per stripe section)
-        num_stripe_vertices = len(road_vertex_list)
-        vdata.setNumRows(num_stripe_vertices * 2)
-        
-        vertex = GeomVertexWriter(vdata, 'vertex')
-        normal = GeomVertexWriter(vdata, 'normal')
-        color = GeomVertexWriter(vdata, 'color')
-        
-        # Keep track of vertex indices for triangles
-        vertex_indices = []
-        current_idx = 0
-        
-        for i in range(len(road_vertex_list) - 1):
-            v_info = road_vertex_list[i]
-            next_v_info = road_vertex_list[i + 1]
-            
-            # Left stripe
-            vertex.addData3(v_info['stripe_left'])
-            normal.addData3(world_up)
-            color.addData4(v_info['stripe_color'])
-            
-            # Right stripe
-            vertex.addData3(v_info['stripe_right'])
-            normal.addData3(world_up)
-            color.addData4(v_info['stripe_color'])
-            
-            vertex_indices.append((current_idx, current_idx + 1))
-            current_idx += 2
-        
-        tris = GeomTriangles(Geom.UHStatic)
-        
-        # Create triangles connecting consecutive stripe sections
-        for i in range(len(vertex_indices) - 1):
-            curr_left, curr_right = vertex_indices[i]
-            next_left, next_right = vertex_indices[i + 1]
-            
-            # Left stripe triangle
-            tris.addVertices(curr_left, curr_right, next_left)
-            # Right stripe triangle
-            tris.addVertices(curr_right, next_right, next_left)
-        
-        tris.closePrimitive()
-        
+        # 2 vertices per stripe section (the last cross-section has no stripe)
+        num_sections = len(points) - 1
+        vertices = np.stack([stripe_left[:-1], stripe_right[:-1]], axis=1).reshape(-1, 3)
+        vdata = make_vertex_data('warning_stripes_geom', format, {
+            'vertex': vertices, 'normal': tuple(world_up), 'color': np.repeat(stripe_colors[:-1], 2, axis=0)
+        })
+        # Triangles connecting consecutive stripe sections
         geom = Geom(vdata)
-        geom.addPrimitive(tris)
+        geom.addPrimitive(make_primitive(strip_indices(num_sections, 2, 0, 1)))
         
         node = GeomNode('warning_stripes_geom_node')
         node.addGeom(geom)
@@ -333,43 +238,15 @@ def create_track(game_root):
     # --- Create Road Geometry ---
     def create_road_geometry():
         format = GeomVertexFormat.getV3n3c4()  # Vertex, Normal, Color
-        vdata = GeomVertexData('road_geom', format, Geom.UHStatic)
-        # Pre-allocate rows (2 vertices per cross-section * num cross-sections)
-        num_vertices = len(road_vertex_list)
-        vdata.setNumRows(num_vertices * 2)
-        
-        vertex = GeomVertexWriter(vdata, 'vertex')
-        normal = GeomVertexWriter(vdata, 'normal')
-        color = GeomVertexWriter(vdata, 'color')
-        
-        for i in range(num_vertices):
-            v_info = road_vertex_list[i]
-            
-            # Left edge - use regular track color for all sections
-            vertex.addData3(v_info['left'])
-            normal.addData3(world_up)
-            color.addData4(track_color)
-            
-            # Right edge - use regular track color for all sections
-            vertex.addData3(v_info['right'])
-            normal.addData3(world_up)
-            color.addData4(track_color)
-        
-        tris = GeomTriangles(Geom.UHStatic)
-        
-        # Create triangles connecting each segment
-        for i in range(num_vertices - 1):
-            idx = i * 2
-            
-            # First triangle (left_i, right_i, left_{i+1})
-            tris.addVertices(idx, idx + 1, idx + 2)
-            
-            # Second triangle (right_i, right_{i+1}, left_{i+1})
-            tris.addVertices(idx + 1, idx + 3, idx + 2)
-        
-        tris.closePrimitive()
+        # 2 vertices per cross-section (left and right edge), in the regular track color
+        num_sections = len(points)
+        vertices = np.stack([road_left, road_right], axis=1).reshape(-1, 3)
+        vdata = make_vertex_data('road_geom', format, {
+            'vertex': vertices, 'normal': tuple(world_up), 'color': tuple(track_color)
+        })
+        # Triangles connecting each segment
         geom = Geom(vdata)
-        geom.addPrimitive(tris)
+        geom.addPrimitive(make_primitive(strip_indices(num_sections, 2, 0, 1)))
         
         node = GeomNode('road_geom_node')
         node.addGeom(geom)
@@ -556,20 +433,41 @@ def create_track(game_root):
     # Ensure track is at Z=0
     track_node.setPos(0, 0, 0)
 
-    # --- Place a tree at the starting line ---
-    tree = create_tree(Vec3(273.61, -136.40, 0.50))
-    tree.reparentTo(track_node)
-    tree = create_tree(Vec3(296.24, 40.10, 0.50))
-    tree.reparentTo(track_node)
-    tree = create_tree(Vec3(284.63, 169.95, 0.50))
-    tree.reparentTo(track_node)
-    tree = create_tree(Vec3(52.04, 187.09, 0.50))
-    tree.reparentTo(track_node)
+    return track_curve_points, footprints
 
-    building = create_building(Vec3(294.69, -107.00, 0.50))
-    building.reparentTo(track_node)
+def load_cached_track(key):
+    """
+    Loads a track generated by an earlier launch: the Track node from its .bam file
+    and the centerline and barrier footprints from the .npz file beside it.
 
-    return track_node, track_curve_points, track_points
+    Returns:
+        tuple or None: (track NodePath, track_curve_points, footprints), or None when
+                       nothing usable is cached for this key
+    """
+    try:
+        with np.load(get_cache_path('track', key, 'npz')) as data:
+            curve = data['curve_points']
+            footprints = data['footprints']
+        with open(get_cache_path('track', key, 'bam'), 'rb') as bam_file:
+            track_node = NodePath.decodeFromBamStream(bam_file.read())
+    except (OSError, KeyError, ValueError):
+        return None
+    if track_node.isEmpty():
+        return None
+    return track_node, [Point3(*p) for p in curve.tolist()], footprints
+
+def save_track_cache(key, track_node, track_curve_points, footprints):
+    """
+    Writes a generated track for load_cached_track. Must be called before Python
+    tags are set on the node, as they are not stored in .bam files.
+    """
+    try:
+        curve = np.array([(p.x, p.y, p.z) for p in track_curve_points], dtype=np.float32)
+        np.savez(get_cache_path('track', key, 'npz'), curve_points=curve, footprints=footprints)
+        with open(get_cache_path('track', key, 'bam'), 'wb') as bam_file:
+            bam_file.write(track_node.encodeToBamStream())
+    except OSError as e:
+        print(f"Warning: could not cache track: {e}")
 
 
 def debug_draw_spline(render, track_curve_points, track_points):
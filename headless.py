@@ -0,0 +1,315 @@
+import sys
+import math
+import time
+import argparse
+from direct.showbase.ShowBase import ShowBase
+from panda3d.core import Vec4, loadPrcFileData, CollisionTraverser, CollisionHandlerEvent, CollisionHandlerPusher
+from panda3d.core import TransformState, RenderState
+
+# No window, no audio and no frame pacing: the simulation runs as fast as the CPU allows
+loadPrcFileData('', 'window-type none')
+loadPrcFileData('', 'audio-library-name null')
+loadPrcFileData('', 'sync-video #f')
+
+import config
+from main import KartGame
+from game_objects.track import create_track
+from game_objects.kart import create_kart
+from physics.kart_physics import KartPhysics
+from physics.barrier_collision import AnalyticBarrierPusher
+from physics.track_index import get_track_index
+from game_logic.game_state import get_start_grid, create_ai_racers, remove_ai_racers, rank_racers
+from game_logic.game_loop import GameLoop
+from game_logic.kart_pool import KartPool
+from utils.progress_tracker import ProgressTracker
+from utils.racing_line import get_racing_line
+from utils.frame_profiler import FrameProfiler
+
+# Fixed simulation timestep in seconds
+DEFAULT_TIMESTEP = 1.0 / 60.0
+# Simulated time after which an unfinished race is stopped
+DEFAULT_MAX_RACE_TIME = 300.0
+# Kart colors used by the AI racers (same set as the start menu offers)
+AI_COLORS = [
+    Vec4(0, 0, 1, 1),
+    Vec4(0, 0.8, 0, 1),
+    Vec4(1, 1, 0, 1),
+    Vec4(0.8, 0, 0.8, 1),
+    Vec4(1, 0.5, 0, 1),
+]
+
+class Autopilot:
+    # Number of track points ahead of the kart that it steers towards
+    LOOKAHEAD_POINTS = 4
+    # Heading error (degrees) tolerated before steering
+    STEER_DEADBAND = 2.0
+    # Turn handling used for the player's speed profile
+    TURN_REDUCTION = 0.6
+
+    def __init__(self, physics, track_points):
+        """
+        Drives the player kart in headless races by setting the keys of its
+        KartPhysics, following the racing line at its recommended speed.
+        - physics: The player's KartPhysics
+        - track_points: The track centerline
+        """
+        self.physics = physics
+        self.kart = physics.kart
+        self.track_points = track_points
+        self.racing_line = get_racing_line(track_points)
+        self.track_index = get_track_index(track_points)
+        self.speed_profile, _ = self.racing_line.speed_profile(
+            physics.max_velocity, physics.max_velocity, self.TURN_REDUCTION, physics.braking_force
+        )
+        self.last_segment_index = None
+
+    def reset(self):
+        self.last_segment_index = None
+
+    def update(self):
+        """
+        Presses forward/brake and left/right for this step
+        """
+        kart_pos = self.kart.getPos()
+        segment_index, _, _ = self.track_index.closest_segment_near(
+            kart_pos.x, kart_pos.y, self.last_segment_index, ProgressTracker.SEARCH_WINDOW
+        )
+        self.last_segment_index = segment_index
+        target_index = (segment_index + self.LOOKAHEAD_POINTS) % len(self.track_points)
+        target = self.racing_line.points[target_index]
+
+        desired_heading = math.degrees(math.atan2(-(target[0] - kart_pos.x), target[1] - kart_pos.y))
+        heading_error = (desired_heading - self.kart.getH() + 180.0) % 360.0 - 180.0
+        self.physics.set_key("left", heading_error > self.STEER_DEADBAND)
+        self.physics.set_key("right", heading_error < -self.STEER_DEADBAND)
+
+        speed_limit = self.speed_profile[target_index]
+        self.physics.set_key("forward", self.physics.velocity < speed_limit)
+        self.physics.set_key("brake", self.physics.velocity > speed_limit + 5.0)
+
+class HeadlessRace(ShowBase):
+    # Collision responses are shared with the windowed game
+    on_kart_barrier_collision = KartGame.on_kart_barrier_collision
+    on_kart_barrier_contact = KartGame.on_kart_barrier_contact
+    on_kart_kart_collision = KartGame.on_kart_kart_collision
+
+    def __init__(self, timestep=DEFAULT_TIMESTEP, frame_profiler=None):
+        """
+        Builds the track, the player kart and the collision system once, without a
+        window. Races are then run with run_race(), any number of times.
+        - timestep: Fixed simulation step in seconds
+        - frame_profiler: Optional FrameProfiler timing the stages of each step
+        """
+        ShowBase.__init__(self)
+        self.timestep = timestep
+        self.frame_profiler = frame_profiler if frame_profiler is not None else FrameProfiler(enabled=False)
+
+        self.gameRoot = self.render.attachNewNode("GameRoot")
+        track_data = create_track(self.gameRoot)
+        self.track = track_data[0]
+        self.trackCurvePoints = track_data[1]
+        self.terrain_raster = self.track.getPythonTag('terrain_raster')
+        # Same anti-clockwise direction as the windowed game
+        self.trackCurvePoints.reverse()
+
+        self.kart, self.kart_collider = create_kart(self.gameRoot, self.loader, show_collider=False)
+
+        self.cTrav = CollisionTraverser('headless traverser')
+        self.collision_handler = CollisionHandlerEvent()
+        self.collision_handler.add_in_pattern('collision_%fn-into-%in')
+        self.pusher = CollisionHandlerPusher()
+        self.pusher.add_in_pattern('pusher_%fn-into-%in')
+        self.pusher.add_collider(self.kart_collider, self.kart)
+        self.cTrav.add_collider(self.kart_collider, self.pusher)
+        self.accept('pusher_kart_collision-into-barrier_collision', self.on_kart_barrier_collision)
+        self.accept('pusher_kart_collision-into-kart_collision', self.on_kart_kart_collision)
+        self.barrier_pusher = None
+        if config.BARRIER_COLLISION_MODE == "analytic":
+            self.barrier_pusher = AnalyticBarrierPusher(
+                self.track.getPythonTag('barrier_line'), self.trackCurvePoints, self.on_kart_barrier_contact
+            )
+            self.barrier_pusher.add_collider(self.kart_collider, self.kart)
+
+        self.physics = KartPhysics(self.kart, self.terrain_raster)
+        self.progress_tracker = ProgressTracker(self.kart, self.trackCurvePoints)
+        self.autopilot = Autopilot(self.physics, self.trackCurvePoints)
+        # Only used for its race position calculation
+        self.game_loop = GameLoop(self)
+
+        self.ai_karts = []
+        self.ai_controllers = []
+        self.ai_fleet = None
+        self.kart_pool = KartPool(self)
+
+    def setup_race(self, num_ai_karts, difficulty, laps, seed=None):
+        """
+        Places the player and a fresh set of AI karts on the starting grid
+        """
+        config.set_difficulty(difficulty)
+        config.LAPS_TO_FINISH = laps
+        remove_ai_racers(self)
+        # Forget contacts from the previous race so 'in' events start from scratch
+        self.pusher.clear()
+        if self.barrier_pusher is not None:
+            self.barrier_pusher.clear()
+
+        player_pos, ai_positions, look_at_point = get_start_grid(self.trackCurvePoints, self.track.getZ(), num_ai_karts)
+        self.kart.setPos(player_pos)
+        self.kart.lookAt(look_at_point)
+        create_ai_racers(self, AI_COLORS, ai_positions, look_at_point, seed)
+
+        self.physics.reset()
+        self.physics.current_terrain = 'road'
+        self.physics.previous_terrain = 'road'
+        self.physics.slowing_down_on_lawn = False
+        self.progress_tracker.reset()
+        self.autopilot.reset()
+        self.lawn_timer = 0.0
+        # Race timer in simulated seconds; AIController reads it for finish times
+        self.run_timer = True
+        self.timer_elapsed = 0.0
+
+    def step(self):
+        """
+        Advances the race by one fixed timestep: AI, player physics, collisions and
+        lap logic, in the same order as the windowed game loop.
+
+        Returns:
+            str or None: 'finished' or 'lawn' when the race ended this step
+        """
+        profiler = self.frame_profiler
+        with profiler.measure('frame'):
+            outcome = self._advance(profiler)
+        profiler.end_frame()
+        return outcome
+
+    def _advance(self, profiler):
+        """
+        Runs the stages of one step (see step), timing each with the profiler
+        """
+        dt = self.timestep
+        if self.ai_fleet is not None:
+            with profiler.measure('ai'):
+                self.ai_fleet.update(dt, update_track_state=False)
+            with profiler.measure('terrain'):
+                self.ai_fleet.update_track_state()
+        self.timer_elapsed += dt
+
+        with profiler.measure('physics'):
+            self.autopilot.update()
+            track_width = config.ROAD_WIDTH + (config.SAND_BORDER_WIDTH * 2)
+            self.physics.update(dt, self.track.getZ(), self.trackCurvePoints,
+                                config.ROAD_WIDTH, track_width, config.STRIPE_WIDTH)
+
+        if self.physics.current_terrain == 'lawn':
+            self.lawn_timer += dt
+            if self.lawn_timer >= config.MAX_LAWN_TIME:
+                return 'lawn'
+        else:
+            self.lawn_timer = 0.0
+
+        with profiler.measure('progress'):
+            self.progress_tracker.update()
+        if self.progress_tracker.current_lap >= config.LAPS_TO_FINISH:
+            return 'finished'
+
+        # Collisions are resolved after the move, as the collision task does each frame
+        with profiler.measure('collision'):
+            if self.barrier_pusher is not None:
+                self.barrier_pusher.update()
+            self.cTrav.traverse(self.render)
+            self.eventMgr.doEvents()
+        # Normally done by the frame loop, which headless races do not run
+        TransformState.garbageCollect()
+        RenderState.garbageCollect()
+        return None
+
+    def run_race(self, num_ai_karts=3, difficulty="regular", laps=1, max_time=DEFAULT_MAX_RACE_TIME, seed=None):
+        """
+        Simulates one complete race.
+
+        Args:
+            num_ai_karts: Number of AI opponents
+            difficulty: "easy", "regular" or "hard"
+            laps: Laps required to finish
+            max_time: Simulated seconds after which the race is stopped
+            seed: Seed for the race's random numbers (None for a random race)
+
+        Returns:
+            dict: 'outcome' ('finished', 'lawn' or 'timeout'), 'race_time' (simulated
+                  seconds), 'steps', 'wall_time', 'position' (player's final position)
+                  and 'rankings' (see rank_racers)
+        """
+        self.setup_race(num_ai_karts, difficulty, laps, seed)
+        started = time.perf_counter()
+        outcome = 'timeout'
+        steps = 0
+        max_steps = int(max_time / self.timestep)
+        while steps < max_steps:
+            steps += 1
+            result = self.step()
+            if result is not None:
+                outcome = result
+                break
+
+        finished = outcome == 'finished'
+        player_data = {
+            'name': 'Player',
+            'laps': self.progress_tracker.current_lap,
+            'progress': 1.0 if finished else self.progress_tracker.kart_progress,
+            'finish_time': self.timer_elapsed if finished else None,
+            'is_player': True
+        }
+        rankings = rank_racers(player_data, self.ai_karts)
+        self._check_ai_laps(laps)
+        return {
+            'outcome': outcome,
+            'race_time': self.timer_elapsed,
+            'steps': steps,
+            'wall_time': time.perf_counter() - started,
+            'position': player_data['position'],
+            'rankings': rankings,
+        }
+
+    def _check_ai_laps(self, laps):
+        """
+        Makes sure no AI kart was given a finish time before completing the race's
+        laps, as batch summaries of AI finish times would silently mix in shorter races
+
+        Raises:
+            RuntimeError: If an AI kart finished with fewer laps than required
+        """
+        for ai_kart in self.ai_karts:
+            if ai_kart.get('finish_time') is not None and ai_kart.get('current_lap', 0) < laps:
+                raise RuntimeError(f"{ai_kart.get('name', 'AI Racer')} finished after {ai_kart.get('current_lap', 0)} "
+                                   f"of {laps} laps")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run kart races headless with a fixed timestep.")
+    parser.add_argument('--races', type=int, default=1, help="Number of races to run")
+    parser.add_argument('--ai', type=int, default=3, help="Number of AI karts")
+    parser.add_argument('--difficulty', default="regular", choices=sorted(config.AI_SPEED_MODIFIERS))
+    parser.add_argument('--laps', type=int, default=1)
+    parser.add_argument('--timestep', type=float, default=DEFAULT_TIMESTEP)
+    parser.add_argument('--max-time', type=float, default=DEFAULT_MAX_RACE_TIME)
+    parser.add_argument('--seed', type=int, help="Seed of the first race (following races use seed + 1, ...)")
+    parser.add_argument('--profile', metavar='LOG', help="Time the stages of each step, appending their "
+                        "percentiles to LOG as JSON lines and printing them after the races")
+    args = parser.parse_args(argv)
+
+    profiler = None
+    if args.profile:
+        profiler = FrameProfiler(window=config.FRAME_PROFILER_WINDOW, log_path=args.profile)
+    race = HeadlessRace(timestep=args.timestep, frame_profiler=profiler)
+    for i in range(args.races):
+        seed = args.seed + i if args.seed is not None else None
+        result = race.run_race(args.ai, args.difficulty, args.laps, args.max_time, seed)
+        print(f"Race {i + 1}: {result['outcome']} in {result['race_time']:.2f}s simulated "
+              f"({result['steps']} steps, {result['wall_time']:.2f}s wall), position {result['position']}/{len(result['rankings'])}")
+    if profiler is not None:
+        print(profiler.format_table().expandtabs(10))
+        profiler.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
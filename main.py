@@ -11,6 +11,8 @@ loadPrcFileData('', 'win-size 1200 800')
 loadPrcFileData('', 'sync-video #t') # Try enabling vsync
 loadPrcFileData('', 'show-frame-rate-meter #t') # Show FPS meter
 
+import config
+
 # Import game utilities
 from utils.lighting import setup_lighting
 # from utils.camera import update_camera, setup_camera_transition # Moved to game_loop/game_state
@@ -23,17 +25,21 @@ from game_objects.starting_line import create_starting_line
 
 # Import physics
 from physics.kart_physics import KartPhysics
+from physics.barrier_collision import AnalyticBarrierPusher
 
 # Import UI
 from ui.menus import MenuManager
 from ui.minimap import Minimap
 from ui.hud_display import HUDDisplay
+from ui.ui_scheduler import UIScheduler
+from ui.profiler_overlay import ProfilerOverlay
 from ui.start_countdown import StartCountdown
 
 # Import new game logic components
 from game_logic.game_state import GameStateManager
 from game_logic.game_loop import GameLoop
 from utils.progress_tracker import ProgressTracker
+from utils.frame_profiler import FrameProfiler
 
 class KartGame(ShowBase):
     def __init__(self):
@@ -67,9 +73,10 @@ class KartGame(ShowBase):
 
         # --- Game Object Creation ---
         self.ground = create_ground(self.gameRoot, self.loader)
-        track_data = create_track(self.gameRoot)
+        track_data = create_track(self.gameRoot, self.win.getGsg() if self.win else None)
         self.track = track_data[0]
         self.trackCurvePoints = track_data[1]
+        self.terrain_raster = self.track.getPythonTag('terrain_raster')
         # Ensure anti-clockwise track direction for all racers
         # Reversing the point order if the original order is clockwise.
         # This assumes create_track might produce points in an order
@@ -107,12 +114,25 @@ class KartGame(ShowBase):
         # Usar o padrão de mensagem correto para o pusher
         self.accept('pusher_kart_collision-into-barrier_collision', self.on_kart_barrier_collision)
         self.accept('pusher_kart_collision-into-kart_collision', self.on_kart_kart_collision)
+
+        # Without barrier collision solids, the fence is handled from the karts' track position
+        self.barrier_pusher = None
+        if config.BARRIER_COLLISION_MODE == "analytic":
+            self.barrier_pusher = AnalyticBarrierPusher(
+                self.track.getPythonTag('barrier_line'), self.trackCurvePoints, self.on_kart_barrier_contact
+            )
+            self.barrier_pusher.add_collider(self.kart_collider, self.kart)
         
         # Enable this for debugging collisions
         # self.cTrav.showCollisions(self.render)
 
         # --- Core Components Initialization ---
-        self.physics = KartPhysics(self.kart)
+        # Frame profiler (off unless config.FRAME_PROFILER): times the stages of each frame
+        self.frame_profiler = FrameProfiler(
+            enabled=config.FRAME_PROFILER, window=config.FRAME_PROFILER_WINDOW, log_path=config.FRAME_PROFILER_LOG
+        )
+        self.frame_profiler.attach(self.taskMgr, globalClock)
+        self.physics = KartPhysics(self.kart, self.terrain_raster)
         self.progress_tracker = ProgressTracker(self.kart, self.trackCurvePoints)
         self.state_manager = GameStateManager(self)
         self.game_loop = GameLoop(self) # Handles the 'playing' state updates
@@ -121,8 +141,11 @@ class KartGame(ShowBase):
         self.menu_manager = MenuManager(self)
         self.menu_manager.create_start_menu(self.state_manager.start_game) # Use state manager
 
+        self.ui_scheduler = UIScheduler(self.taskMgr, profiler=self.frame_profiler)
         self.minimap = Minimap(self, self.trackCurvePoints, self.kart)
         self.hud_display = HUDDisplay(self)
+        if config.FRAME_PROFILER and config.FRAME_PROFILER_OVERLAY:
+            self.profiler_overlay = ProfilerOverlay(self, self.frame_profiler)
 
         # --- Countdown (block input until done) ---
         self.input_blocked = False
@@ -162,8 +185,13 @@ class KartGame(ShowBase):
         O CollisionHandlerPusher já cuida de impedir que o kart atravesse a barreira
         """
         # Identificar qual objeto kart colidiu
-        from_node_path = entry.getFromNodePath()
-        
+        self.on_kart_barrier_contact(entry.getFromNodePath())
+
+    def on_kart_barrier_contact(self, from_node_path):
+        """
+        Reacts to a kart (identified by its collider) hitting a barrier, from either
+        the collision pusher or the analytic barrier pusher
+        """
         # Se foi o kart do jogador
         if from_node_path == self.kart_collider:
             # Stop the kart instantly
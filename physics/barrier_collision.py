@@ -0,0 +1,169 @@
+import numpy as np
+from physics.track_index import get_track_index
+from physics.track_detection import find_closest_segments
+from utils.racing_line import get_racing_line
+
+# Length of centerline (world units) covered by one entry of the fence band table
+BAND_RESOLUTION = 0.25
+
+class BarrierLine:
+    def __init__(self, footprints):
+        """
+        Describes the barrier fence built along the track, for collision tests that
+        do not need the barrier collision solids.
+
+        Args:
+            footprints: (N, 4, 2) array with the X/Y corners of each barrier's collision box
+        """
+        self.footprints = np.asarray(footprints, dtype=np.float64).reshape(-1, 4, 2)
+
+class AnalyticBarrierPusher:
+    def __init__(self, barrier_line, track_curve_points, on_contact):
+        """
+        Keeps karts out of the barrier fence using their signed lateral distance
+        from the track centerline, instead of traversing the barrier collision
+        solids. Works like the CollisionHandlerPusher it replaces for barriers:
+        karts are pushed back out of the fence every frame, and on_contact is
+        called once when a kart starts touching it.
+
+        Each barrier is reduced to the stretch of centerline it runs along and the
+        band of lateral distances it occupies. These are baked once per centerline
+        into a table indexed by arc length, so a kart's test is a table lookup.
+
+        Args:
+            barrier_line: The track's BarrierLine
+            track_curve_points: List of points defining the track centerline (may
+                                be reversed after the pusher is created)
+            on_contact: Called with the kart's collider NodePath when it hits the fence
+        """
+        self.barrier_line = barrier_line
+        self.track_curve_points = track_curve_points
+        self.on_contact = on_contact
+        self.colliders = []
+        self.kart_nodes = []
+        self.half_extents = []
+        self.hint_indices = np.zeros(0, dtype=np.int64)
+        self.touching = np.zeros(0, dtype=bool)
+        self._layout_index = None
+
+    def add_collider(self, collider_np, kart_np):
+        """
+        Registers a kart; its size is taken from the CollisionBox of its collider
+        """
+        dimensions = collider_np.node().getSolid(0).getDimensions()
+        self.colliders.append(collider_np)
+        self.kart_nodes.append(kart_np)
+        self.half_extents.append((dimensions.x / 2.0, dimensions.y / 2.0))
+        self.hint_indices = np.append(self.hint_indices, -1)
+        self.touching = np.append(self.touching, False)
+
+    def remove_collider(self, collider_np):
+        """
+        Stops testing a kart
+        """
+        if collider_np not in self.colliders:
+            return
+        i = self.colliders.index(collider_np)
+        del self.colliders[i], self.kart_nodes[i], self.half_extents[i]
+        self.hint_indices = np.delete(self.hint_indices, i)
+        self.touching = np.delete(self.touching, i)
+
+    def clear(self):
+        """
+        Forgets current contacts, so the next touch calls on_contact again
+        """
+        self.hint_indices[:] = -1
+        self.touching[:] = False
+
+    def _update_layout(self, track_index):
+        """
+        Projects the barrier corners onto the current centerline: which side of the
+        track the fence is on, and each barrier's arc-length interval and lateral band
+        """
+        racing_line = get_racing_line(self.track_curve_points)
+        corners = self.barrier_line.footprints.reshape(-1, 2)
+        segment_indices, t, distance_sq = find_closest_segments(corners, track_index)
+        arc = _arc_positions(track_index, segment_indices, t).reshape(-1, 4)
+        lateral = _signed_lateral(corners, track_index, racing_line, segment_indices, t, distance_sq).reshape(-1, 4)
+        self.side = 1.0 if np.median(lateral) >= 0.0 else -1.0
+        lateral *= self.side
+
+        # Fence band per table entry: the nearest and farthest lateral distance of
+        # every barrier overlapping it (near is +inf where there is no barrier)
+        total = track_index.total_length
+        entries = int(np.ceil(total / BAND_RESOLUTION)) + 1
+        self.near_table = np.full(entries, np.inf)
+        self.far_table = np.full(entries, -np.inf)
+        for barrier_arc, near, far in zip(arc, lateral.min(axis=1), lateral.max(axis=1)):
+            start, end = barrier_arc.min(), barrier_arc.max()
+            if end - start > total / 2.0:
+                # Across the start of the loop: covers [end, total] and [0, start]
+                spans = [(end, total), (0.0, start)]
+            else:
+                spans = [(start, end)]
+            for span_start, span_end in spans:
+                first, last = int(span_start / BAND_RESOLUTION), int(span_end / BAND_RESOLUTION) + 1
+                self.near_table[first:last] = np.minimum(self.near_table[first:last], near)
+                self.far_table[first:last] = np.maximum(self.far_table[first:last], far)
+        self._layout_index = track_index
+
+    def update(self):
+        """
+        Pushes every kart that overlaps the fence back to the side it came from,
+        and reports karts that started touching it this frame
+        """
+        track_index = get_track_index(self.track_curve_points)
+        if not self.colliders or track_index is None or len(self.barrier_line.footprints) == 0:
+            return
+        if track_index is not self._layout_index:
+            self._update_layout(track_index)
+        racing_line = get_racing_line(self.track_curve_points)
+
+        positions = np.array([(node.getX(), node.getY()) for node in self.kart_nodes], dtype=np.float64)
+        headings = np.radians([node.getH() for node in self.kart_nodes])
+        segment_indices, t, distance_sq = find_closest_segments(positions, track_index, self.hint_indices)
+        self.hint_indices = segment_indices
+        lateral = self.side * _signed_lateral(positions, track_index, racing_line, segment_indices, t, distance_sq)
+        entry = (_arc_positions(track_index, segment_indices, t) / BAND_RESOLUTION).astype(np.int64)
+        near, far = self.near_table[entry], self.far_table[entry]
+
+        # Extent of each (rotated) kart box across the track
+        normals = racing_line.normals[segment_indices, :2]
+        kart_right = np.stack([np.cos(headings), np.sin(headings)], axis=1)
+        kart_forward = np.stack([-np.sin(headings), np.cos(headings)], axis=1)
+        half_extents = np.array(self.half_extents)
+        extent = (half_extents[:, 0] * np.abs(np.einsum('ij,ij->i', kart_right, normals)) +
+                  half_extents[:, 1] * np.abs(np.einsum('ij,ij->i', kart_forward, normals)))
+
+        contact = (lateral + extent > near) & (lateral - extent < far)
+        for i in np.nonzero(contact)[0]:
+            # Out through the nearer face of the fence, like the pusher would
+            if lateral[i] < (near[i] + far[i]) / 2.0:
+                push = near[i] - extent[i] - lateral[i]
+            else:
+                push = far[i] + extent[i] - lateral[i]
+            node = self.kart_nodes[i]
+            node.setX(node.getX() + normals[i, 0] * push * self.side)
+            node.setY(node.getY() + normals[i, 1] * push * self.side)
+
+        started = contact & ~self.touching
+        self.touching = contact
+        for i in np.nonzero(started)[0]:
+            self.on_contact(self.colliders[i])
+
+def _arc_positions(track_index, segment_indices, t):
+    """
+    Converts positions on segments into arc-length distances along the centerline
+    """
+    arc_lengths = track_index.segment_arrays()[3]
+    return arc_lengths[segment_indices] + (arc_lengths[segment_indices + 1] - arc_lengths[segment_indices]) * t
+
+def _signed_lateral(positions, track_index, racing_line, segment_indices, t, distance_sq):
+    """
+    Returns the distance of each position from the centerline, positive on the
+    right of the track direction and negative on its left
+    """
+    starts, deltas, _, _ = track_index.segment_arrays()
+    offsets = positions - (starts[segment_indices] + deltas[segment_indices] * t[:, None])
+    side = np.einsum('ij,ij->i', offsets, racing_line.normals[segment_indices, :2])
+    return np.where(side >= 0.0, 1.0, -1.0) * np.sqrt(distance_sq)
@@ -3,8 +3,15 @@ from direct.task import Task
 from physics.track_detection import is_kart_on_track, get_kart_terrain
 
 class KartPhysics:
-    def __init__(self, kart):
+    def __init__(self, kart, terrain_raster=None):
+        """
+        Sets up the physics model for a kart.
+        - kart: The kart NodePath moved by this model
+        - terrain_raster: Optional baked TerrainRaster; when given, the surface under
+          the kart is read from it instead of searching the track geometry
+        """
         self.kart = kart
+        self.terrain_raster = terrain_raster
         self.key_map = {
             "forward": False,
             "brake": False,
@@ -79,7 +86,10 @@ class KartPhysics:
             return
             
         # Check what terrain the kart is on
-        if track_curve_points:
+        if self.terrain_raster is not None:
+            kart_pos = self.kart.getPos()
+            self.current_terrain = self.terrain_raster.get_terrain(kart_pos.x, kart_pos.y)
+        elif track_curve_points:
             kart_pos = self.kart.getPos()
             self.current_terrain = get_kart_terrain(kart_pos, track_curve_points, road_width, track_width, stripe_width)
         else:
@@ -0,0 +1,108 @@
+import math
+import numpy as np
+from config import TERRAIN_RASTER_RESOLUTION
+from utils.disk_cache import hash_key, get_cache_path
+
+# Terrain codes stored in the raster
+LAWN, SAND, ROAD = 0, 1, 2
+TERRAIN_NAMES = ('lawn', 'sand', 'road')
+
+class TerrainRaster:
+    def __init__(self, grid, origin_x, origin_y, resolution):
+        """
+        A baked 2D grid of terrain codes covering the track area.
+
+        Args:
+            grid: uint8 array indexed [row (y), column (x)] holding LAWN, SAND or ROAD
+            origin_x, origin_y: World position of the grid's lower-left corner
+            resolution: Size of one cell in world units
+        """
+        self.grid = grid
+        self.origin_x = origin_x
+        self.origin_y = origin_y
+        self.resolution = resolution
+        self.rows, self.columns = grid.shape
+
+    def get_code(self, x, y):
+        """
+        Returns the terrain code at world position (x, y); outside the grid is lawn
+        """
+        column = math.floor((x - self.origin_x) / self.resolution)
+        row = math.floor((y - self.origin_y) / self.resolution)
+        if 0 <= row < self.rows and 0 <= column < self.columns:
+            return int(self.grid[row, column])
+        return LAWN
+
+    def get_terrain(self, x, y):
+        """
+        Returns 'road', 'sand' or 'lawn' for world position (x, y)
+        """
+        return TERRAIN_NAMES[self.get_code(x, y)]
+
+def compute_distance_field(track_curve_points, origin_x, origin_y, resolution, shape, max_distance):
+    """
+    Computes, for every cell center of a grid, the distance to the nearest
+    centerline segment. Each segment only touches the cells within max_distance
+    of it, so cells farther away keep the value max_distance.
+
+    Returns:
+        float32 array of the given shape (rows, columns)
+    """
+    rows, columns = shape
+    field = np.full(shape, max_distance, dtype=np.float32)
+    points = np.array([(p.x, p.y) for p in track_curve_points], dtype=np.float64)
+    for (ax, ay), (bx, by) in zip(points[:-1], points[1:]):
+        c0 = max(0, int((min(ax, bx) - max_distance - origin_x) / resolution))
+        c1 = min(columns, int((max(ax, bx) + max_distance - origin_x) / resolution) + 1)
+        r0 = max(0, int((min(ay, by) - max_distance - origin_y) / resolution))
+        r1 = min(rows, int((max(ay, by) + max_distance - origin_y) / resolution) + 1)
+        if c0 >= c1 or r0 >= r1:
+            continue
+        xs = origin_x + (np.arange(c0, c1) + 0.5) * resolution - ax
+        ys = origin_y + (np.arange(r0, r1) + 0.5) * resolution - ay
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+        if length_sq < 0.0001:
+            t = 0.0
+        else:
+            t = np.clip((xs[None, :] * dx + ys[:, None] * dy) / length_sq, 0.0, 1.0)
+        distance = np.hypot(xs[None, :] - dx * t, ys[:, None] - dy * t)
+        np.minimum(field[r0:r1, c0:c1], distance, out=field[r0:r1, c0:c1])
+    return field
+
+def build_terrain_raster(track_curve_points, road_width, track_width, stripe_width=1.0, resolution=TERRAIN_RASTER_RESOLUTION):
+    """
+    Bakes the terrain classification used by get_kart_terrain into a TerrainRaster
+    """
+    half_width = track_width / 2
+    origin_x = min(p.x for p in track_curve_points) - half_width - resolution
+    origin_y = min(p.y for p in track_curve_points) - half_width - resolution
+    columns = int(math.ceil((max(p.x for p in track_curve_points) + half_width + resolution - origin_x) / resolution))
+    rows = int(math.ceil((max(p.y for p in track_curve_points) + half_width + resolution - origin_y) / resolution))
+    field = compute_distance_field(track_curve_points, origin_x, origin_y, resolution, (rows, columns), half_width + resolution)
+    grid = np.full((rows, columns), LAWN, dtype=np.uint8)
+    grid[field <= half_width] = SAND
+    grid[field <= road_width / 2 + stripe_width] = ROAD
+    return TerrainRaster(grid, origin_x, origin_y, resolution)
+
+def load_or_build_terrain_raster(control_points, track_curve_points, road_width, track_width, stripe_width=1.0, resolution=TERRAIN_RASTER_RESOLUTION):
+    """
+    Returns the terrain raster for a track, loading it from the disk cache when a
+    raster was already baked for the same control points, widths and resolution.
+
+    Args:
+        control_points: The raw spline control points defining the track (cache key)
+        track_curve_points: The sampled centerline used to bake a new raster
+    """
+    key = hash_key(control_points, len(track_curve_points), road_width, track_width, stripe_width, resolution)
+    try:
+        with np.load(get_cache_path('terrain', key, 'npz')) as data:
+            return TerrainRaster(data['grid'], float(data['origin'][0]), float(data['origin'][1]), resolution)
+    except (OSError, KeyError, ValueError):
+        pass
+    raster = build_terrain_raster(track_curve_points, road_width, track_width, stripe_width, resolution)
+    try:
+        np.savez_compressed(get_cache_path('terrain', key, 'npz'), grid=raster.grid, origin=np.array([raster.origin_x, raster.origin_y]))
+    except OSError as e:
+        print(f"Warning: could not cache terrain raster: {e}")
+    return raster
@@ -1,4 +1,6 @@
-from panda3d.core import Vec3, Point3
+import numpy as np
+from physics.track_index import get_track_index
+from physics.terrain_raster import LAWN, SAND, ROAD
 
 def get_kart_terrain(kart_pos, track_curve_points, road_width, track_width, stripe_width=1.0):
     """
@@ -14,57 +16,12 @@ def get_kart_terrain(kart_pos, track_curve_points, road_width, track_width, stri
     Returns:
         str: 'road', 'sand', or 'lawn'
     """
-    # Only consider X and Y for distance calculation (ignore height/Z)
-    kart_pos_2d = Point3(kart_pos.x, kart_pos.y, 0)
-    
-    # Find the closest segment on the track and the perpendicular distance to it
-    min_distance = float('inf')
-    closest_point = None
-    
-    # Process the track as segments between consecutive points
-    num_points = len(track_curve_points)
-    if num_points < 2:
+    track_index = get_track_index(track_curve_points)
+    if track_index is None:
         return 'lawn'  # Not enough points to form a track
-    
-    for i in range(num_points - 1):
-        p1 = Point3(track_curve_points[i].x, track_curve_points[i].y, 0)
-        p2 = Point3(track_curve_points[i+1].x, track_curve_points[i+1].y, 0)
-        
-        # Calculate perpendicular distance from kart to this segment
-        segment_vec = p2 - p1
-        segment_length_squared = segment_vec.lengthSquared()
-        
-        # Handle extremely short segments
-        if segment_length_squared < 0.0001:
-            distance = (p1 - kart_pos_2d).length()
-            if distance < min_distance:
-                min_distance = distance
-                closest_point = p1
-            continue
-            
-        # Find the projection of kart position onto the segment
-        t = max(0, min(1, (kart_pos_2d - p1).dot(segment_vec) / segment_length_squared))
-        projection = p1 + segment_vec * t
-        
-        # Calculate the perpendicular distance
-        distance = (projection - kart_pos_2d).length()
-        
-        if distance < min_distance:
-            min_distance = distance
-            closest_point = projection
-    
-    # Also check distance to track endpoints to handle cases near the start/end
-    # This helps with circular tracks where the first and last points might be far apart
-    first_point = Point3(track_curve_points[0].x, track_curve_points[0].y, 0)
-    last_point = Point3(track_curve_points[-1].x, track_curve_points[-1].y, 0)
-    
-    first_distance = (first_point - kart_pos_2d).length()
-    if first_distance < min_distance:
-        min_distance = first_distance
-    
-    last_distance = (last_point - kart_pos_2d).length()
-    if last_distance < min_distance:
-        min_distance = last_distance
+
+    # Only the segments near the kart are visited; anything beyond the sand is lawn
+    min_distance = track_index.distance_to_centerline(kart_pos.x, kart_pos.y, track_width / 2)
     
     # Determine terrain based on the perpendicular distance
     # The road includes the stripes for physics
@@ -96,3 +53,107 @@ def is_kart_on_track(kart_pos, track_curve_points, road_width, track_width=None,
         
     terrain = get_kart_terrain(kart_pos, track_curve_points, road_width, track_width, stripe_width)
     return terrain != 'lawn'  # True if road or sand, False if lawn
+
+def _closest_segments(positions, candidates, track_index):
+    """
+    Finds, for each position, the closest of its candidate segments.
+    
+    Args:
+        positions: (N, 2) array of X/Y positions
+        candidates: (N, K) array of segment indices to test for each position
+        track_index: The TrackSpatialIndex holding the segment arrays
+    
+    Returns:
+        tuple: (segment_indices, t, distance_sq, column) arrays of length N, where
+               column is the position of the chosen segment within candidates
+    """
+    starts, deltas, length_sq, _ = track_index.segment_arrays()
+    relative = positions[:, None, :] - starts[candidates]
+    segment_deltas = deltas[candidates]
+    segment_length_sq = length_sq[candidates]
+    valid = segment_length_sq >= 0.0001
+    t = np.einsum('nkd,nkd->nk', relative, segment_deltas) / np.where(valid, segment_length_sq, 1.0)
+    t = np.where(valid, np.clip(t, 0.0, 1.0), 0.0)
+    offsets = relative - segment_deltas * t[:, :, None]
+    distance_sq = np.einsum('nkd,nkd->nk', offsets, offsets)
+    rows = np.arange(len(positions))
+    column = np.argmin(distance_sq, axis=1)
+    return candidates[rows, column], t[rows, column], distance_sq[rows, column], column
+
+def find_closest_segments(positions, track_index, hint_indices=None, window=8):
+    """
+    Finds the closest centerline segment of many positions at once.
+    
+    Args:
+        positions: (N, 2) array of X/Y positions
+        track_index: The TrackSpatialIndex of the centerline
+        hint_indices: Optional (N,) closest segments from a previous query. Positions
+                      with a hint (>= 0) only test `window` segments on each side of
+                      it; positions without one, or whose window result is implausible,
+                      are searched against the whole track.
+        window: Number of segments searched on each side of a hint
+    
+    Returns:
+        tuple: (segment_indices, t, distance_sq) arrays of length N
+    """
+    count = len(positions)
+    num_segments = len(track_index.segments)
+    segment_indices = np.full(count, -1)
+    t = np.zeros(count)
+    distance_sq = np.full(count, np.inf)
+    if hint_indices is not None:
+        hinted = np.nonzero(np.asarray(hint_indices) >= 0)[0]
+        if len(hinted):
+            offsets = np.arange(-window, window + 1)
+            candidates = (np.asarray(hint_indices)[hinted, None] + offsets[None, :]) % num_segments
+            found, found_t, found_sq, column = _closest_segments(positions[hinted], candidates, track_index)
+            plausible = (column > 0) & (column < 2 * window) & (found_sq <= track_index.margin ** 2)
+            keep = hinted[plausible]
+            segment_indices[keep], t[keep], distance_sq[keep] = found[plausible], found_t[plausible], found_sq[plausible]
+    
+    unresolved = np.nonzero(segment_indices < 0)[0]
+    if len(unresolved):
+        candidates = np.broadcast_to(np.arange(num_segments), (len(unresolved), num_segments))
+        found, found_t, found_sq, _ = _closest_segments(positions[unresolved], candidates, track_index)
+        segment_indices[unresolved], t[unresolved], distance_sq[unresolved] = found, found_t, found_sq
+    return segment_indices, t, distance_sq
+
+def get_karts_track_state(positions, track_curve_points, road_width, track_width, stripe_width=1.0, hint_indices=None, window=8):
+    """
+    Classifies the terrain and finds the track progress of many karts in one
+    vectorized pass over the cached segment arrays of the track index.
+    
+    Args:
+        positions: (N, 2) array-like of kart X/Y positions
+        track_curve_points: List of points defining the track centerline
+        road_width: Width of the road part of the track
+        track_width: Total width of the track (road + sand borders)
+        stripe_width: Width of one stripe (default 1.0)
+        hint_indices: Optional (N,) closest segments from the previous query. Karts
+                      with a hint (>= 0) only test `window` segments on each side of
+                      it; karts without one, or whose window result is implausible,
+                      are searched against the whole track.
+        window: Number of segments searched on each side of a hint
+    
+    Returns:
+        tuple: (terrain_codes, segment_indices, progress) arrays of length N, where
+               terrain_codes hold LAWN, SAND or ROAD from physics.terrain_raster and
+               progress is the arc-length progress along the track (0.0 to 1.0)
+    """
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+    count = len(positions)
+    track_index = get_track_index(track_curve_points)
+    if track_index is None or count == 0:
+        return np.full(count, LAWN, dtype=np.uint8), np.full(count, -1), np.zeros(count)
+    
+    segment_indices, t, distance_sq = find_closest_segments(positions, track_index, hint_indices, window)
+    
+    arc_lengths = track_index.segment_arrays()[3]
+    segment_lengths = arc_lengths[segment_indices + 1] - arc_lengths[segment_indices]
+    progress = (arc_lengths[segment_indices] + segment_lengths * t) / max(track_index.total_length, 1e-9)
+    
+    distance = np.sqrt(distance_sq)
+    terrain_codes = np.full(count, LAWN, dtype=np.uint8)
+    terrain_codes[distance <= track_width / 2] = SAND
+    terrain_codes[distance <= (road_width / 2) + stripe_width] = ROAD
+    return terrain_codes, segment_indices, progress
@@ -0,0 +1,182 @@
+import math
+import numpy as np
+from config import ROAD_WIDTH, SAND_BORDER_WIDTH
+from utils.track_cache import TrackDataCache
+
+# Default grid cell size in world units
+DEFAULT_CELL_SIZE = 20.0
+
+class TrackSpatialIndex:
+    def __init__(self, track_curve_points, cell_size=DEFAULT_CELL_SIZE, margin=None):
+        """
+        Builds a uniform grid over the track centerline segments so that
+        nearest-segment queries only visit the few segments around a position.
+
+        Args:
+            track_curve_points: List of points defining the track centerline
+            cell_size: Size of one grid cell in world units
+            margin: Distance around each segment registered in the grid.
+                    Queries are exact for anything closer than this distance.
+        """
+        if margin is None:
+            margin = ROAD_WIDTH / 2 + SAND_BORDER_WIDTH
+        self.cell_size = cell_size
+        self.margin = margin
+        self.segments = []
+        self.grid = {}
+        points = [(p.x, p.y) for p in track_curve_points]
+        for i in range(len(points) - 1):
+            self._add_segment(i, points[i], points[i + 1])
+        self.arc_lengths = [0.0]
+        for segment in self.segments:
+            self.arc_lengths.append(self.arc_lengths[-1] + math.sqrt(segment[4]))
+        self.total_length = self.arc_lengths[-1]
+        self._segment_arrays = None
+
+    def _add_segment(self, index, start, end):
+        """
+        Stores one segment and registers it in every cell its padded bounds overlap
+        """
+        ax, ay = start
+        dx, dy = end[0] - ax, end[1] - ay
+        self.segments.append((ax, ay, dx, dy, dx * dx + dy * dy))
+        min_cx, min_cy = self._cell(min(ax, end[0]) - self.margin, min(ay, end[1]) - self.margin)
+        max_cx, max_cy = self._cell(max(ax, end[0]) + self.margin, max(ay, end[1]) + self.margin)
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                self.grid.setdefault((cx, cy), []).append(index)
+
+    def segment_arrays(self):
+        """
+        Returns the segments as NumPy arrays for vectorized queries, built on first use.
+
+        Returns:
+            tuple: (starts (S, 2), deltas (S, 2), length_sq (S,), arc_lengths (S + 1,))
+        """
+        if self._segment_arrays is None:
+            data = np.array(self.segments, dtype=np.float64).reshape(-1, 5)
+            self._segment_arrays = (data[:, 0:2], data[:, 2:4], data[:, 4], np.array(self.arc_lengths))
+        return self._segment_arrays
+
+    def _cell(self, x, y):
+        """
+        Returns the grid cell coordinates containing the world position (x, y)
+        """
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def candidate_segments(self, x, y):
+        """
+        Returns the indices of the segments registered in the cell containing (x, y)
+        """
+        return self.grid.get(self._cell(x, y), ())
+
+    def segment_distance_sq(self, index, x, y):
+        """
+        Computes the squared distance from (x, y) to one segment
+
+        Returns:
+            tuple: (distance_sq, t) where t is the projection parameter in [0, 1]
+        """
+        ax, ay, dx, dy, length_sq = self.segments[index]
+        px, py = x - ax, y - ay
+        if length_sq < 0.0001:
+            return px * px + py * py, 0.0
+        t = max(0.0, min(1.0, (px * dx + py * dy) / length_sq))
+        ex, ey = px - dx * t, py - dy * t
+        return ex * ex + ey * ey, t
+
+    def _closest_of(self, indices, x, y):
+        """
+        Returns (index, t, distance_sq) of the closest segment among the given indices
+        """
+        best = (-1, 0.0, float('inf'))
+        for i in indices:
+            dist_sq, t = self.segment_distance_sq(i, x, y)
+            if dist_sq < best[2]:
+                best = (i, t, dist_sq)
+        return best
+
+    def closest_segment(self, x, y, max_distance=None):
+        """
+        Finds the centerline segment closest to (x, y).
+
+        Args:
+            x, y: World position to query (Z is ignored)
+            max_distance: Optional distance beyond which the caller does not care
+                          about the exact result. When it fits inside the grid
+                          margin, positions far from the track return early.
+
+        Returns:
+            tuple: (segment_index, t, distance_sq); segment_index is -1 when
+                   nothing lies within max_distance
+        """
+        best = self._closest_of(self.candidate_segments(x, y), x, y)
+        if best[2] <= self.margin * self.margin:
+            return best
+        if max_distance is not None and max_distance <= self.margin:
+            return (-1, 0.0, float('inf'))
+        return self._closest_of(range(len(self.segments)), x, y)
+
+    def closest_segment_in_window(self, x, y, center_index, window):
+        """
+        Finds the closest segment among the segments within `window` positions of
+        center_index, wrapping around the track loop.
+
+        Returns:
+            tuple: (segment_index, t, distance_sq, offset) where offset is the signed
+                   distance in segments from center_index to the result
+        """
+        num_segments = len(self.segments)
+        best = (-1, 0.0, float('inf'), 0)
+        for offset in range(-window, window + 1):
+            i = (center_index + offset) % num_segments
+            dist_sq, t = self.segment_distance_sq(i, x, y)
+            if dist_sq < best[2]:
+                best = (i, t, dist_sq, offset)
+        return best
+
+    def closest_segment_near(self, x, y, hint_index, window):
+        """
+        Finds the closest segment, searching only a window around hint_index when
+        possible. Falls back to closest_segment when there is no hint or when the
+        window result is implausible (on the window edge or outside the margin).
+
+        Returns:
+            tuple: (segment_index, t, distance_sq)
+        """
+        if hint_index is not None:
+            index, t, dist_sq, offset = self.closest_segment_in_window(x, y, hint_index, window)
+            if abs(offset) < window and dist_sq <= self.margin * self.margin:
+                return index, t, dist_sq
+        return self.closest_segment(x, y)
+
+    def progress_at(self, segment_index, t):
+        """
+        Converts a position on a segment into arc-length progress along the track.
+
+        Returns:
+            float: Distance travelled along the centerline divided by its total length (0.0 to 1.0)
+        """
+        if self.total_length <= 0.0:
+            return 0.0
+        segment_length = self.arc_lengths[segment_index + 1] - self.arc_lengths[segment_index]
+        return (self.arc_lengths[segment_index] + segment_length * t) / self.total_length
+
+    def distance_to_centerline(self, x, y, max_distance=None):
+        """
+        Returns the distance from (x, y) to the centerline, or infinity when the
+        position is farther than max_distance (see closest_segment)
+        """
+        return math.sqrt(self.closest_segment(x, y, max_distance)[2])
+
+# Indexes of the last centerline lists queried
+_index_cache = TrackDataCache(TrackSpatialIndex)
+
+def get_track_index(track_curve_points):
+    """
+    Returns the spatial index for a centerline list, building it on first use.
+    The index is rebuilt if the list was modified in place (e.g. reversed).
+    """
+    if len(track_curve_points) < 2:
+        return None
+    return _index_cache.get(track_curve_points)
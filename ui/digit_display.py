@@ -0,0 +1,159 @@
+from panda3d.core import NodePath, TextNode
+
+# Characters of the patterns standing for a digit: zero-padded or not
+PADDED_DIGIT = '0'
+DIGIT = '#'
+
+class DigitDisplay:
+    def __init__(self, parent, pattern, pos=(0, 0), scale=0.07, font=None, fg=(1, 1, 1, 1), shadow=(0, 0, 0, 0),
+                 shadow_offset=(0.04, 0.04)):
+        """
+        A line of text with numeric fields (e.g. "Time: 00:00", "Speed: ### km/h")
+        drawn from glyphs built once. The static parts of the pattern and the
+        digits 0-9 are generated when the display is created; each digit slot
+        holds an instance of every digit glyph and shows only the current one, so
+        changing a value swaps which cards are shown instead of generating text.
+
+        Args:
+            parent: NodePath to attach the display to
+            pattern: The text, with runs of '0' for zero-padded fields (always
+                     showing every digit) and runs of '#' for fields without leading
+                     zeros (the text after them moves left to close the gap)
+            pos: (x, z) of the start of the text's baseline, as for OnscreenText
+            scale: Size of the text
+            font: The font to use (None for the default font)
+            fg: Text color
+            shadow: Shadow color (transparent for no shadow)
+            shadow_offset: Offset of the shadow, in text units
+        """
+        self.root = parent.attachNewNode('digit_display')
+        self.root.setPos(pos[0], 0, pos[1])
+        self.root.setScale(scale)
+
+        text_node = TextNode('digit_display_text')
+        text_node.setFont(font if font is not None else TextNode.getDefaultFont())
+        text_node.setAlign(TextNode.ALeft)
+        text_node.setTextColor(*fg)
+        if shadow[3] != 0:
+            text_node.setShadowColor(*shadow)
+            text_node.setShadow(*shadow_offset)
+
+        def generate(text):
+            text_node.setText(text)
+            return NodePath(text_node.generate()), text_node.calcWidth(text)
+
+        glyphs = [generate(str(digit)) for digit in range(10)]
+        # Every digit takes the width of the widest one, so values do not jitter
+        self.digit_width = max(width for _, width in glyphs)
+
+        # Segments of the pattern: static text, or a field with one slot per digit
+        self.segments = []
+        self.fields = []
+        for text, is_field in _split_pattern(pattern):
+            segment_np = self.root.attachNewNode('segment')
+            if not is_field:
+                text_np, width = generate(text)
+                text_np.reparentTo(segment_np)
+                self.segments.append({'node': segment_np, 'width': width})
+                continue
+            field = {'node': segment_np, 'padded': text[0] == PADDED_DIGIT, 'slots': [], 'digits': len(text)}
+            for i in range(len(text)):
+                slot_np = segment_np.attachNewNode('slot')
+                slot_np.setX(i * self.digit_width)
+                cards = []
+                for glyph_np, width in glyphs:
+                    card_np = slot_np.attachNewNode('digit')
+                    # Centered in the slot
+                    card_np.setX((self.digit_width - width) / 2)
+                    glyph_np.instanceTo(card_np)
+                    card_np.hide()
+                    cards.append(card_np)
+                field['slots'].append({'node': slot_np, 'cards': cards, 'shown': None})
+            self.segments.append(field)
+            self.fields.append(field)
+        self.values = None
+        self.set_values(*([0] * len(self.fields)))
+        self._layout()
+
+    def set_values(self, *values):
+        """
+        Shows new values in the numeric fields, in the order of the pattern.
+        Only the digit cards that change are swapped; values too large for their
+        field show as all nines.
+        """
+        if values == self.values:
+            return
+        self.values = values
+        relayout = False
+        for field, value in zip(self.fields, values):
+            slots = field['slots']
+            value = min(max(int(value), 0), 10 ** len(slots) - 1)
+            # Digits from the last slot back; without padding, leading zeros are blank
+            digits = 0
+            for slot in reversed(slots):
+                digit = value % 10
+                value //= 10
+                if field['padded'] or digits == 0 or digit != 0 or value != 0:
+                    digits += 1
+                    self._show_digit(slot, digit)
+                else:
+                    self._show_digit(slot, None)
+            if digits != field['digits']:
+                field['digits'] = digits
+                relayout = True
+        if relayout:
+            self._layout()
+
+    def _show_digit(self, slot, digit):
+        """
+        Shows one digit's card in a slot (None to leave it blank)
+        """
+        if slot['shown'] == digit:
+            return
+        if slot['shown'] is not None:
+            slot['cards'][slot['shown']].hide()
+        if digit is not None:
+            slot['cards'][digit].show()
+        slot['shown'] = digit
+
+    def _layout(self):
+        """
+        Places the segments one after the other; unpadded fields only take the
+        width of the digits they show, which are moved to the start of the field
+        """
+        x = 0.0
+        for segment in self.segments:
+            segment['node'].setX(x)
+            if 'slots' in segment:
+                blank = len(segment['slots']) - segment['digits']
+                for i, slot in enumerate(segment['slots']):
+                    slot['node'].setX((i - blank) * self.digit_width)
+                x += segment['digits'] * self.digit_width
+            else:
+                x += segment['width']
+
+    def show(self):
+        """
+        Shows the display
+        """
+        self.root.show()
+
+    def hide(self):
+        """
+        Hides the display
+        """
+        self.root.hide()
+
+def _split_pattern(pattern):
+    """
+    Splits a pattern into (text, is_field) runs: numeric fields are runs of the
+    same digit character, everything else is static text
+    """
+    runs = []
+    for char in pattern:
+        is_field = char in (PADDED_DIGIT, DIGIT)
+        if runs and runs[-1][1] == is_field and (not is_field or runs[-1][0][0] == char):
+            runs[-1][0] += char
+        else:
+            runs.append([char, is_field])
+    return [(text, is_field) for text, is_field in runs]
@@ -1,6 +1,7 @@
 from direct.gui.OnscreenText import OnscreenText
 from direct.gui.DirectGui import DirectFrame
 from panda3d.core import TextNode
+from ui.digit_display import DigitDisplay
 import config  # Import the config module directly instead of just LAPS_TO_FINISH
 
 class HUDDisplay:
@@ -18,29 +19,23 @@ class HUDDisplay:
             pos=(-1.1, 0, 0.860),  # (x, y, z)
             parent=self.base.aspect2d,
         )
-        # Timer text (on top, inside frame)
-        self.timer_text = OnscreenText(
-            text="Time: 00:00",
+        # Timer and speed (on top, inside frame): they change often, so their digits
+        # are swapped between pre-built glyphs instead of regenerating the text
+        self.timer_display = DigitDisplay(
+            self.bg_frame,
+            "Time: 00:00",
             pos=(-0.25, -0.005),
             scale=0.07,
             fg=(1, 1, 1, 1),
-            bg=(0, 0, 0, 0),
-            align=TextNode.ALeft,
-            mayChange=True,
             shadow=(0, 0, 0, 0.5),
-            parent=self.bg_frame,
         )
-        # Speed text (below timer, inside frame)
-        self.speed_text = OnscreenText(
-            text="Speed: 0 km/h",
+        self.speed_display = DigitDisplay(
+            self.bg_frame,
+            "Speed: ### km/h",
             pos=(-0.25, -0.1),
             scale=0.07,
             fg=(1, 1, 1, 1),
-            bg=(0, 0, 0, 0),
-            align=TextNode.ALeft,
-            mayChange=True,
             shadow=(0, 0, 0, 0.5),
-            parent=self.bg_frame,
         )
         # Position text (below speed, inside frame)
         self.position_text = OnscreenText(
@@ -67,10 +62,30 @@ class HUDDisplay:
             parent=self.bg_frame,
         )
         self.hide()
+
+        # Displayed values, set by update
+        self.velocity = 0
+        self.timer_seconds = 0
+        self.position = 1
+        self.total_racers = 1
+        self.current_lap = 0
+        self.total_laps = None
+        # Each text is regenerated only when it changes, checked HUD_REFRESH_RATE times per second
+        scheduler = self.base.ui_scheduler
+        scheduler.watch('hud_timer', self._timer_value, self._show_timer, rate=config.HUD_REFRESH_RATE,
+                        stage='hud')
+        scheduler.watch('hud_speed', self._speed_value, self.speed_display.set_values, rate=config.HUD_REFRESH_RATE,
+                        stage='hud')
+        scheduler.watch('hud_position', self._position_label, self.position_text.setText, rate=config.HUD_REFRESH_RATE,
+                        stage='hud')
+        scheduler.watch('hud_lap', self._lap_label, self.lap_text.setText, rate=config.HUD_REFRESH_RATE,
+                        stage='hud')
         
     def update(self, velocity, timer_seconds=None, position=None, total_racers=None, current_lap=0, total_laps=None):
         """
-        Updates the HUD display with current game information
+        Updates the HUD display with current game information. The values are only
+        recorded here; the texts are refreshed by the UI scheduler, and only when
+        the text they show changes.
         
         Args:
             velocity: The current velocity of the kart
@@ -80,33 +95,54 @@ class HUDDisplay:
             current_lap: (int) Current lap number. Default 0 (not started yet).
             total_laps: (int or None) Total number of laps. If None, uses config value.
         """
-        # Speed
-        speed_kmh = abs(int(velocity * 3.6))
-        self.speed_text.setText(f"Speed: {speed_kmh} km/h")
-        
-        # Timer
+        self.velocity = velocity
         if timer_seconds is not None:
-            mins = int(timer_seconds // 60)
-            secs = int(timer_seconds % 60)
-            self.timer_text.setText(f"Time: {mins:02d}:{secs:02d}")
-        
-        # Position
+            self.timer_seconds = timer_seconds
         if position is not None and total_racers is not None:
-            self.position_text.setText(f"Position: {position}/{total_racers}")
-        
-        # Lap count (display current lap + 1 to show "Lap 1" at start)
-        display_lap = current_lap + 1
-        if total_laps is None:
-            total_laps = config.LAPS_TO_FINISH  # Access config directly
-        self.lap_text.setText(f"Lap: {display_lap}/{total_laps}")
+            self.position = position
+            self.total_racers = total_racers
+        self.current_lap = current_lap
+        self.total_laps = total_laps
+
+    def _timer_value(self):
+        """
+        Returns the elapsed time as (minutes, seconds)
+        """
+        return divmod(int(self.timer_seconds), 60)
+
+    def _show_timer(self, value):
+        """
+        Shows a (minutes, seconds) value on the timer
+        """
+        self.timer_display.set_values(*value)
+
+    def _speed_value(self):
+        """
+        Returns the speed in km/h
+        """
+        return abs(int(self.velocity * 3.6))
+
+    def _position_label(self):
+        """
+        Returns the text of the race position
+        """
+        return f"Position: {self.position}/{self.total_racers}"
+
+    def _lap_label(self):
+        """
+        Returns the text of the lap counter
+        """
+        # Display current lap + 1 to show "Lap 1" at start
+        total_laps = self.total_laps if self.total_laps is not None else config.LAPS_TO_FINISH
+        return f"Lap: {self.current_lap + 1}/{total_laps}"
         
     def show(self):
         """
         Shows the HUD display
         """
         self.bg_frame.show()
-        self.timer_text.show()
-        self.speed_text.show()
+        self.timer_display.show()
+        self.speed_display.show()
         self.position_text.show()
         self.lap_text.show()
         
@@ -115,7 +151,7 @@ class HUDDisplay:
         Hides the HUD display
         """
         self.bg_frame.hide()
-        self.timer_text.hide()
-        self.speed_text.hide()
+        self.timer_display.hide()
+        self.speed_display.hide()
         self.position_text.hide()
         self.lap_text.hide()
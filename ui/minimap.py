@@ -1,8 +1,60 @@
-from panda3d.core import NodePath, Vec3, Vec4, Point3, CardMaker, Texture, PNMImage
+import numpy as np
+from panda3d.core import NodePath, Vec3, Vec4, Point3, CardMaker, Texture, PNMImage, TransparencyAttrib
 from direct.gui.DirectGui import DirectFrame
+from config import MINIMAP_TEXTURE_SIZE, MINIMAP_SHOW_ROAD, MINIMAP_REFRESH_RATE, ROAD_WIDTH, SAND_BORDER_WIDTH
+from physics.terrain_raster import compute_distance_field
+from utils.disk_cache import hash_key, get_cache_path
+
+# Line and marker sizes are given in pixels of a minimap texture of this size,
+# and scaled with the texture so they look the same at any resolution
+REFERENCE_TEXTURE_SIZE = 256
+# Width of the track centerline, in pixels of a REFERENCE_TEXTURE_SIZE texture
+MINIMAP_LINE_WIDTH = 3
+
+def _polyline_mask(points, shape, radius):
+    """
+    Marks the pixels of an image within radius of a polyline. The polyline is
+    sampled every half pixel and a disc of pixels is stamped on every pixel it
+    crosses, all in a few array operations.
+
+    Args:
+        points: (N, 2) array of (x, y) pixel coordinates (x along columns, y along rows)
+        shape: (rows, columns) of the image
+        radius: Radius of the line, in pixels
+
+    Returns:
+        bool array of the given shape
+    """
+    rows, columns = shape
+    starts, ends = points[:-1], points[1:]
+    steps = np.maximum(np.ceil(np.hypot(*(ends - starts).T) * 2).astype(int), 1)
+    segment = np.repeat(np.arange(len(starts)), steps)
+    t = (np.arange(steps.sum()) - np.repeat(np.cumsum(steps) - steps, steps)) / steps[segment]
+    samples = np.vstack([starts[segment] + (ends - starts)[segment] * t[:, None], points[-1:]])
+    # Pixels crossed by the line (kept one pixel outside the image, so discs reach into it)
+    crossed = np.clip(np.floor(samples).astype(int), -1, [columns, rows])
+    crossed = np.unique(crossed[:, 1] * (columns + 2) + crossed[:, 0] + columns + 3)
+    crossed_x = crossed % (columns + 2) - 1
+    crossed_y = crossed // (columns + 2) - 1
+
+    reach = int(np.ceil(radius))
+    disc_y, disc_x = np.mgrid[-reach:reach + 1, -reach:reach + 1]
+    in_disc = disc_x * disc_x + disc_y * disc_y <= radius * radius
+    x = (crossed_x[:, None] + disc_x[in_disc][None, :]).reshape(-1)
+    y = (crossed_y[:, None] + disc_y[in_disc][None, :]).reshape(-1)
+    inside = (x >= 0) & (x < columns) & (y >= 0) & (y < rows)
+    mask = np.zeros(shape, dtype=bool)
+    mask[y[inside], x[inside]] = True
+    return mask
+
+def _to_bytes(color):
+    """
+    Converts the RGB part of a 0-1 color to 0-255 bytes
+    """
+    return np.round(np.array(tuple(color)[:3]) * 255).astype(np.uint8)
 
 class Minimap:
-    def __init__(self, base, track_curve_points, kart):
+    def __init__(self, base, track_curve_points, kart, texture_size=MINIMAP_TEXTURE_SIZE, show_road=MINIMAP_SHOW_ROAD):
         """
         Create a minimap for the game that shows the track and kart position
         
@@ -10,6 +62,9 @@ class Minimap:
             base: The main game instance (ShowBase)
             track_curve_points: List of points that define the track centerline
             kart: The kart NodePath to track on the minimap
+            texture_size: Resolution of the minimap texture, in pixels per side
+            show_road: Whether to fill the road and sand bands instead of drawing
+                       only the centerline
         """
         self.base = base
         self.track_curve_points = track_curve_points
@@ -20,18 +75,29 @@ class Minimap:
         self.map_padding = 0.0  # No padding from right edge
         self.track_color = Vec4(0.3, 0.3, 0.3, 1)  # Gray for track
         self.bg_color = Vec4(0.8, 0.8, 0.8, 0.7)  # Light gray, semi-transparent
+        self.road_color = Vec4(0.55, 0.55, 0.55, 1)  # Road band (with show_road)
+        self.sand_color = Vec4(0.85, 0.78, 0.55, 1)  # Sand bands (with show_road)
+        self.map_tex_size = texture_size  # Texture resolution
+        self.show_road = show_road
         
         # Create the minimap frame
         self._create_minimap_frame()
         
-        # Create texture for drawing the track and kart
+        # Create texture for drawing the track
         self._create_minimap_texture()
+
+        # Kart markers: small cards moved over the track texture every frame
+        self._create_marker_texture()
+        self.player_marker = self._create_marker(marker_size=4)
+        self.player_marker_color = None
+        self.ai_markers = []
+        self.ai_marker_colors = []  # Color last set on each AI marker
         
         # Initially hide the minimap (will be shown during gameplay)
         self.minimap_frame.hide()
         
-        # Set up task to update minimap
-        self.base.taskMgr.add(self.update_minimap, "update_minimap_task")
+        # Move the markers MINIMAP_REFRESH_RATE times per second
+        self.base.ui_scheduler.add('minimap', self.update_minimap, rate=MINIMAP_REFRESH_RATE)
 
     def _create_minimap_frame(self):
         """
@@ -57,25 +123,32 @@ class Minimap:
 
     def _create_minimap_texture(self):
         """
-        Create a texture to draw the track and kart position
+        Create a texture with the track, drawn once. The kart markers are separate
+        cards on top of it (see _create_marker), so the texture is never redrawn
+        or uploaded again while racing.
         """
-        # Create a texture to render the minimap
-        self.map_tex_size = 256  # Texture resolution
-        self.map_texture = Texture("minimap_texture")
-        self.map_image = PNMImage(self.map_tex_size, self.map_tex_size)
-        self.map_image.fill(self.bg_color[0], self.bg_color[1], self.bg_color[2])
-        self.map_image.alphaFill(self.bg_color[3])
-        
         # Find track bounds for scaling
         self._find_track_bounds()
-        
-        # Draw the track on the texture
-        self._draw_track()
-        
+
+        # Draw the track into an array (or load it from the cache) and upload it in one copy
+        image = self._load_or_draw_track()
+        self.map_texture = Texture("minimap_texture")
+        self.map_texture.setup2dTexture(self.map_tex_size, self.map_tex_size, Texture.T_unsigned_byte, Texture.F_rgb8)
+        # The image's first row is the top of the minimap, the texture's is the bottom,
+        # and Panda stores the channels as BGR
+        self.map_texture.setRamImage(np.ascontiguousarray(image[::-1, :, ::-1]).tobytes())
+
         # Apply the texture to the card
-        self.map_texture.load(self.map_image)
         self.minimap_card.setTexture(self.map_texture)
-    
+
+    def set_texture_size(self, texture_size):
+        """
+        Change the resolution of the minimap texture, redrawing the track
+        (e.g. 512 or 1024 pixels for large displays)
+        """
+        self.map_tex_size = texture_size
+        self._create_minimap_texture()
+
     def _find_track_bounds(self):
         """
         Find the min/max coordinates of the track for scaling
@@ -108,37 +181,57 @@ class Minimap:
     
     def _draw_track(self):
         """
-        Draw the track outline on the minimap texture
+        Draw the track into an RGB image array (rows go down the minimap) with
+        NumPy, instead of drawing each segment pixel by pixel: the centerline is
+        stamped along its whole length at once (see _polyline_mask), and the road
+        and sand bands are filled by distance to the centerline
+        (see physics.terrain_raster.compute_distance_field).
+
+        Returns:
+            (map_tex_size, map_tex_size, 3) uint8 array
         """
-        # Clear the image
-        self.map_image.fill(self.bg_color[0], self.bg_color[1], self.bg_color[2])
-        self.map_image.alphaFill(self.bg_color[3])
-        
-        # Convert track points to texture coordinates
-        for i in range(len(self.track_curve_points) - 1):
-            p1 = self.track_curve_points[i]
-            p2 = self.track_curve_points[i + 1]
-            
-            # Convert world coordinates to texture coordinates
-            x1, y1 = self._world_to_texture_coords(p1.getX(), p1.getY())
-            x2, y2 = self._world_to_texture_coords(p2.getX(), p2.getY())
-            
-            # Draw a line between points using Bresenham's line algorithm
-            self._draw_line(
-                int(x1), int(y1), int(x2), int(y2),
-                self.track_color[0], self.track_color[1], self.track_color[2]
-            )
-        
-        # Connect last point to first point to close the loop
-        p1 = self.track_curve_points[-1]
-        p2 = self.track_curve_points[0]
-        x1, y1 = self._world_to_texture_coords(p1.getX(), p1.getY())
-        x2, y2 = self._world_to_texture_coords(p2.getX(), p2.getY())
-        self._draw_line(
-            int(x1), int(y1), int(x2), int(y2),
-            self.track_color[0], self.track_color[1], self.track_color[2]
-        )
-    
+        shape = (self.map_tex_size, self.map_tex_size)
+        image = np.empty(shape + (3,), dtype=np.uint8)
+        image[:] = _to_bytes(self.bg_color)
+        # The track's centerline is a closed loop
+        points = list(self.track_curve_points) + [self.track_curve_points[0]]
+
+        if self.show_road:
+            # Size of a texture pixel in world units; row r, column c of the image is
+            # centered on world (origin_x + (c + 0.5) * pixel_size, origin_y + (r + 0.5) * pixel_size)
+            pixel_size = 1.0 / self.scale
+            origin_x = self.center_x - self.map_tex_size / 2 * pixel_size
+            origin_y = self.center_y - self.map_tex_size / 2 * pixel_size
+            track_half_width = ROAD_WIDTH / 2 + SAND_BORDER_WIDTH
+            distance = compute_distance_field(points, origin_x, origin_y, pixel_size, shape, track_half_width + pixel_size)
+            image[distance <= track_half_width] = _to_bytes(self.sand_color)
+            image[distance <= ROAD_WIDTH / 2] = _to_bytes(self.road_color)
+
+        tex_x, tex_y = self._world_to_texture_coords(np.array([p.x for p in points]), np.array([p.y for p in points]))
+        line_radius = MINIMAP_LINE_WIDTH / 2 * self.map_tex_size / REFERENCE_TEXTURE_SIZE
+        image[_polyline_mask(np.column_stack([tex_x, tex_y]), shape, line_radius)] = _to_bytes(self.track_color)
+        return image
+
+    def _load_or_draw_track(self):
+        """
+        Returns the track image (see _draw_track), loading it from the disk cache
+        when it was already drawn for the same track, resolution and colors
+        """
+        key = hash_key(self.track_curve_points, self.map_tex_size, MINIMAP_LINE_WIDTH, self.show_road,
+                       tuple(self.bg_color), tuple(self.track_color), tuple(self.road_color), tuple(self.sand_color),
+                       ROAD_WIDTH, SAND_BORDER_WIDTH)
+        try:
+            with np.load(get_cache_path('minimap', key, 'npz')) as data:
+                return data['image']
+        except (OSError, KeyError, ValueError):
+            pass
+        image = self._draw_track()
+        try:
+            np.savez_compressed(get_cache_path('minimap', key, 'npz'), image=image)
+        except OSError as e:
+            print(f"Warning: could not cache minimap: {e}")
+        return image
+
     def _world_to_texture_coords(self, world_x, world_y):
         """
         Convert world coordinates to texture coordinates
@@ -153,108 +246,90 @@ class Minimap:
         
         return tex_x, tex_y
         
-    def _draw_line(self, x0, y0, x1, y1, r, g, b):
+    def _world_to_card_coords(self, world_x, world_y):
         """
-        Draw a line using Bresenham's line algorithm
+        Convert world coordinates to coordinates on the minimap card, matching the
+        texture pixels the track was drawn on (the image's rows go down the card)
         """
-        # Ensure coordinates are within texture bounds
-        x0 = max(0, min(x0, self.map_tex_size - 1))
-        y0 = max(0, min(y0, self.map_tex_size - 1))
-        x1 = max(0, min(x1, self.map_tex_size - 1))
-        y1 = max(0, min(y1, self.map_tex_size - 1))
-        
-        # Set line width for better visibility
-        line_width = 2
-        
-        # Implementation of Bresenham's line algorithm
-        dx = abs(x1 - x0)
-        dy = abs(y1 - y0)
-        sx = 1 if x0 < x1 else -1
-        sy = 1 if y0 < y1 else -1
-        err = dx - dy
-        
-        while True:
-            # Draw a thicker line (square of pixels)
-            for tx in range(-line_width//2, line_width//2 + 1):
-                for ty in range(-line_width//2, line_width//2 + 1):
-                    px = x0 + tx
-                    py = y0 + ty
-                    if 0 <= px < self.map_tex_size and 0 <= py < self.map_tex_size:
-                        self.map_image.setXel(px, py, r, g, b)
-            
-            if x0 == x1 and y0 == y1:
-                break
-                
-            e2 = 2 * err
-            if e2 > -dy:
-                err -= dy
-                x0 += sx
-            if e2 < dx:
-                err += dx
-                y0 += sy
-    
-    def _draw_kart_marker(self, temp_image, position, color, marker_size=3):
+        tex_x, tex_y = self._world_to_texture_coords(world_x, world_y)
+        pixel_size = 2 * self.map_size / self.map_tex_size
+        return -self.map_size + tex_x * pixel_size, self.map_size - tex_y * pixel_size
+
+    def _create_marker_texture(self, size=32):
         """
-        Draw a kart marker at the given position with the specified color
-        
+        Create the white disc texture shared by all kart markers (tinted by their color)
+        """
+        image = PNMImage(size, size, 4)
+        image.fill(1, 1, 1)
+        radius = size / 2
+        for x in range(size):
+            for y in range(size):
+                dx, dy = x + 0.5 - radius, y + 0.5 - radius
+                image.setAlpha(x, y, 1.0 if dx*dx + dy*dy <= radius*radius else 0.0)
+        self.marker_texture = Texture("minimap_marker")
+        self.marker_texture.load(image)
+
+    def _create_marker(self, marker_size=3):
+        """
+        Create a kart marker: a disc card over the minimap, moved to the kart's
+        position every frame
+
         Args:
-            temp_image: The PNMImage to draw on
-            position: (x, y) tuple with texture coordinates
-            color: Vec4 color to use for the marker
-            marker_size: Size of the marker in pixels
-        """
-        kart_x, kart_y = position
-        for dx in range(-marker_size, marker_size + 1):
-            for dy in range(-marker_size, marker_size + 1):
-                if dx*dx + dy*dy <= marker_size*marker_size:  # Circle equation
-                    # Draw pixel if it's within the image bounds
-                    pixel_x = int(kart_x + dx)
-                    pixel_y = int(kart_y + dy)
-                    if (0 <= pixel_x < self.map_tex_size and 
-                        0 <= pixel_y < self.map_tex_size):
-                        temp_image.setXel(pixel_x, pixel_y, 
-                                        color[0], color[1], color[2])
-    
-    def update_minimap(self, task):
+            marker_size: Radius of the marker in pixels of a REFERENCE_TEXTURE_SIZE map
+
+        Returns:
+            NodePath: The marker card, hidden until placed
+        """
+        half_size = (marker_size + 0.5) * 2 * self.map_size / REFERENCE_TEXTURE_SIZE
+        cm = CardMaker('minimap_marker')
+        cm.setFrame(-half_size, half_size, -half_size, half_size)
+        marker = self.minimap_card.attachNewNode(cm.generate())
+        marker.setTexture(self.marker_texture)
+        marker.setTransparency(TransparencyAttrib.MAlpha)
+        marker.hide()
+        return marker
+
+    def _place_marker(self, marker, kart_node):
+        """
+        Move a marker to a kart's position on the minimap, hiding it while the
+        kart is outside the area the minimap covers
         """
-        Update the kart markers on the minimap
+        card_x, card_z = self._world_to_card_coords(kart_node.getX(), kart_node.getY())
+        if abs(card_x) > self.map_size or abs(card_z) > self.map_size:
+            marker.hide()
+            return
+        marker.setPos(card_x, 0, card_z)
+        marker.show()
+
+    def update_minimap(self):
+        """
+        Update the kart markers on the minimap (run by the UI scheduler)
         """
         # Only update if the minimap is visible
         if not self.minimap_frame.isHidden():
-            # Get a copy of the current map image with the track
-            temp_image = PNMImage(self.map_image)
-            
             # Get the player kart's actual color
             player_kart_color = self.get_player_kart_color()
-            
-            # Convert player kart position to texture coordinates
-            player_kart_pos = self._world_to_texture_coords(
-                self.kart.getX(), self.kart.getY()
-            )
-            
-            # Draw player kart marker (slightly larger than AI karts)
-            self._draw_kart_marker(temp_image, player_kart_pos, player_kart_color, marker_size=4)
-            
-            # Draw AI kart markers if they exist
-            if hasattr(self.base, 'ai_karts') and self.base.ai_karts:
-                for ai_kart in self.base.ai_karts:
-                    # Get the kart node and color from the ai_kart data
-                    kart_node = ai_kart['node']
-                    kart_color = ai_kart['color']
-                    
-                    # Convert AI kart position to texture coordinates
-                    ai_kart_pos = self._world_to_texture_coords(
-                        kart_node.getX(), kart_node.getY()
-                    )
-                    
-                    # Draw the AI kart marker
-                    self._draw_kart_marker(temp_image, ai_kart_pos, kart_color, marker_size=3)
-            
-            # Apply the updated image to the texture
-            self.map_texture.load(temp_image)
-        
-        return task.cont
-    
+            if player_kart_color != self.player_marker_color:
+                self.player_marker.setColor(player_kart_color)
+                self.player_marker_color = player_kart_color
+
+            # Player kart marker (slightly larger than AI karts)
+            self._place_marker(self.player_marker, self.kart)
+
+            # AI kart markers, created as more AI karts join the race
+            ai_karts = getattr(self.base, 'ai_karts', None) or []
+            while len(self.ai_markers) < len(ai_karts):
+                self.ai_markers.append(self._create_marker(marker_size=3))
+                self.ai_marker_colors.append(None)
+            for i, (marker, ai_kart) in enumerate(zip(self.ai_markers, ai_karts)):
+                # Markers are reused from race to race, so the color is only set when it changes
+                if ai_kart['color'] != self.ai_marker_colors[i]:
+                    marker.setColor(ai_kart['color'])
+                    self.ai_marker_colors[i] = ai_kart['color']
+                self._place_marker(marker, ai_kart['node'])
+            for marker in self.ai_markers[len(ai_karts):]:
+                marker.hide()
+
     def get_player_kart_color(self):
         """
         Get the player kart's actual color from the kart model
@@ -0,0 +1,80 @@
+from direct.gui.OnscreenText import OnscreenText
+from direct.gui.DirectGui import DirectFrame
+from panda3d.core import TextNode
+from utils.frame_profiler import PERCENTILES
+
+# Refreshes of the overlay per second
+OVERLAY_REFRESH_RATE = 2
+# Size of the overlay's text, and width of its stage name and number columns
+OVERLAY_TEXT_SCALE = 0.04
+OVERLAY_NAME_WIDTH = 0.34
+OVERLAY_COLUMN_WIDTH = 0.15
+
+class ProfilerOverlay:
+    def __init__(self, base, profiler):
+        """
+        Shows the frame profiler's rolling percentiles of each stage in the top
+        right corner of the screen, under the frame rate meter: one line per
+        stage, with a column per percentile (and the maximum), in milliseconds
+        Args:
+            base: The ShowBase instance (game); provides a2dTopRight and ui_scheduler
+            profiler: The FrameProfiler to report
+        """
+        self.profiler = profiler
+        headers = [f"p{p}" for p in PERCENTILES] + ["max"]
+        width = OVERLAY_NAME_WIDTH + OVERLAY_COLUMN_WIDTH * len(headers)
+        self.frame = DirectFrame(
+            parent=base.a2dTopRight,
+            frameColor=(0, 0, 0, 0.6),
+            frameSize=(-width - 0.04, 0, 0, 0),
+            pos=(-0.02, 0, -0.1),
+        )
+        # Stage names on the left, then the numbers right-aligned in their columns
+        self.columns = [self._create_column(-width, TextNode.ALeft, "stage (ms)")]
+        for i, header in enumerate(headers):
+            x = -width + OVERLAY_NAME_WIDTH + OVERLAY_COLUMN_WIDTH * (i + 1)
+            self.columns.append(self._create_column(x, TextNode.ARight, header))
+        base.ui_scheduler.watch('profiler_overlay', self.profiler.get_percentiles, self._show_percentiles,
+                                rate=OVERLAY_REFRESH_RATE)
+
+    def _create_column(self, x, align, header):
+        """
+        Creates the text of one column of the table, starting with its header
+        """
+        column = OnscreenText(
+            text=header,
+            pos=(x - 0.02, -0.05),
+            scale=OVERLAY_TEXT_SCALE,
+            fg=(1, 1, 1, 1),
+            align=align,
+            mayChange=True,
+            parent=self.frame,
+        )
+        column.header = header
+        return column
+
+    def _show_percentiles(self, stats):
+        """
+        Writes the statistics of every stage in the columns, and fits the
+        background to the number of lines
+        """
+        names = list(stats)
+        self.columns[0].setText("\n".join([self.columns[0].header] + names))
+        keys = [f"p{p}" for p in PERCENTILES] + ["max"]
+        for column, key in zip(self.columns[1:], keys):
+            column.setText("\n".join([column.header] + [f"{stats[name][key]:.2f}" for name in names]))
+        frame_size = list(self.frame['frameSize'])
+        frame_size[2] = -(len(names) + 1) * OVERLAY_TEXT_SCALE - 0.04
+        self.frame['frameSize'] = frame_size
+
+    def show(self):
+        """
+        Shows the overlay
+        """
+        self.frame.show()
+
+    def hide(self):
+        """
+        Hides the overlay
+        """
+        self.frame.hide()
@@ -0,0 +1,88 @@
+from panda3d.core import ClockObject
+from utils.frame_profiler import FrameProfiler
+
+# Task sort of the scheduler: after the game loop and the collision traversal
+# (sort 30) have moved the karts, before the frame is rendered (sort 50)
+UI_SCHEDULER_SORT = 40
+
+# Last value of a watch that was never applied (differs from any value)
+_NOT_APPLIED = object()
+
+class UIScheduler:
+    def __init__(self, task_mgr, task_name="ui_scheduler_task", profiler=None):
+        """
+        Runs the updates of the on-screen widgets (minimap, HUD) from a single
+        task, each at its own refresh rate instead of every frame. Watched values
+        are only applied to their widget when they change, so e.g. a text is not
+        regenerated while the number it shows stays the same.
+
+        Args:
+            task_mgr: The task manager to run the scheduler task on
+            task_name: Name of the scheduler task
+            profiler: Optional FrameProfiler timing each widget's updates (see add)
+        """
+        self.widgets = {}  # Name -> widget entry (see add)
+        self.profiler = profiler if profiler is not None else FrameProfiler(enabled=False)
+        self.clock = ClockObject.getGlobalClock()
+        task_mgr.add(self.update, task_name, sort=UI_SCHEDULER_SORT)
+
+    def add(self, name, update, rate=None, stage=None):
+        """
+        Schedules update() to be called at most rate times per second.
+
+        Args:
+            name: Unique name of the widget (replaces a widget of the same name)
+            update: Function called with no arguments
+            rate: Updates per second; None for every frame
+            stage: Frame profiler stage the updates are timed in (default: name)
+        """
+        self.widgets[name] = {
+            'update': update,
+            'interval': 1.0 / rate if rate else 0.0,
+            'next_time': 0.0,
+            'stage': stage or name,
+        }
+
+    def watch(self, name, get_value, apply, rate=None, stage=None):
+        """
+        Schedules get_value() to be called at most rate times per second, and
+        apply(value) only when the value differs from the last one applied.
+
+        Args:
+            name: Unique name of the widget (replaces a widget of the same name)
+            get_value: Function returning the value to display (e.g. a formatted string)
+            apply: Function displaying a value (e.g. an OnscreenText's setText)
+            rate: Checks per second; None for every frame
+            stage: Frame profiler stage the checks are timed in (default: name)
+        """
+        last = [_NOT_APPLIED]
+
+        def update():
+            value = get_value()
+            if value != last[0]:
+                last[0] = value
+                apply(value)
+
+        self.add(name, update, rate, stage)
+
+    def remove(self, name):
+        """
+        Stops updating a widget
+        """
+        self.widgets.pop(name, None)
+
+    def update(self, task):
+        """
+        Runs the updates that are due this frame
+        """
+        now = self.clock.getFrameTime()
+        for widget in list(self.widgets.values()):
+            if now < widget['next_time']:
+                continue
+            # Keep a steady rate, but do not try to catch up on skipped updates
+            widget['next_time'] += widget['interval']
+            if widget['next_time'] <= now:
+                widget['next_time'] = now + widget['interval']
+            with self.profiler.measure(widget['stage']):
+                widget['update']()
+        return task.cont
@@ -0,0 +1,37 @@
+import os
+import hashlib
+from config import CACHE_DIR
+
+def hash_key(*parts):
+    """
+    Builds a short stable hash from any number of values (numbers, strings, point lists).
+    Points are rounded so that float noise does not invalidate a cache entry.
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(repr(_normalize(part)).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def _normalize(value):
+    """
+    Converts Panda3D vectors and nested sequences into plain rounded tuples
+    """
+    if hasattr(value, 'x') and hasattr(value, 'y') and hasattr(value, 'z'):
+        return (round(value.x, 4), round(value.y, 4), round(value.z, 4))
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    return value
+
+def get_cache_path(name, key, extension):
+    """
+    Returns the path of a cache file, creating the cache directory if needed.
+
+    Args:
+        name: Kind of cached data (e.g. 'terrain')
+        key: Hash identifying the cached content (see hash_key)
+        extension: File extension without the dot
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, f"{name}_{key}.{extension}")
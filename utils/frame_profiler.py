@@ -0,0 +1,201 @@
+import json
+import time
+import numpy as np
+
+# Percentiles of each stage's time per frame, shown on the overlay and written to the log
+PERCENTILES = (50, 95, 99)
+# Task sorts of the hooks added by FrameProfiler.attach: around the collision
+# traversal (ShowBase's collisionLoop, sort 30) and after rendering (igLoop, sort 50)
+COLLISION_START_SORT = 29
+COLLISION_STOP_SORT = 31
+END_FRAME_SORT = 55
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'started')
+
+    def __init__(self, profiler, name):
+        """
+        Times one stage of the frame, as a context manager or with start()/stop();
+        its time adds up until the end of the frame
+        """
+        self.profiler = profiler
+        self.name = name
+        self.started = None
+
+    def start(self):
+        """
+        Starts timing the stage
+        """
+        self.started = time.perf_counter()
+
+    def stop(self):
+        """
+        Stops timing the stage, adding the time since start() to the frame
+        """
+        if self.started is not None:
+            self.profiler.frame_times[self.name] += time.perf_counter() - self.started
+            self.started = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+class _NoStage:
+    """
+    Stand-in for _Stage when profiling is off: does nothing
+    """
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NO_STAGE = _NoStage()
+
+class FrameProfiler:
+    def __init__(self, enabled=True, window=300, log_path=None, log_interval=1.0):
+        """
+        Times the stages of each frame (AI, physics, collisions, UI...) and keeps
+        the time of each stage over the last frames, to report rolling percentiles
+        on screen (see ui.profiler_overlay) and as JSON lines in a log file.
+
+        Args:
+            enabled: Whether to profile; when False, measure() returns a stage that
+                     does nothing, so instrumented code costs almost nothing
+            window: Number of frames the percentiles are computed over
+            log_path: File to append the percentiles to, as one JSON object per line
+                      (None for no log)
+            log_interval: Seconds between two log lines
+        """
+        self.enabled = enabled
+        self.window = window
+        self.stages = {}  # Stage name -> _Stage, in the order they were first measured
+        self.frame_times = {}  # Stage name -> seconds spent in the current frame
+        self.history = {}  # Stage name -> milliseconds per frame over the last frames (ring buffer)
+        self.frames = 0
+        self.log_interval = log_interval
+        self.next_log_time = time.perf_counter() + log_interval
+        self.log_file = open(log_path, 'a') if enabled and log_path else None
+
+    def measure(self, name):
+        """
+        Returns the timer of a stage, to use as `with profiler.measure('physics'):`
+        (or with its start() and stop() methods when the stage spans several tasks)
+        """
+        if not self.enabled:
+            return _NO_STAGE
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = _Stage(self, name)
+            self.frame_times[name] = 0.0
+            self.history[name] = np.zeros(self.window)
+        return stage
+
+    def add_time(self, name, seconds):
+        """
+        Adds a duration measured elsewhere (e.g. the whole frame) to a stage
+        """
+        if self.enabled:
+            self.measure(name)
+            self.frame_times[name] += seconds
+
+    def end_frame(self):
+        """
+        Records the time of every stage in the frame that just ended (0 for the
+        stages that did not run), and writes a log line when one is due
+        """
+        if not self.enabled:
+            return
+        slot = self.frames % self.window
+        for name, seconds in self.frame_times.items():
+            self.history[name][slot] = seconds * 1000.0
+            self.frame_times[name] = 0.0
+        self.frames += 1
+        if self.log_file is not None and time.perf_counter() >= self.next_log_time:
+            self.next_log_time = time.perf_counter() + self.log_interval
+            self.write_log()
+
+    def get_percentiles(self):
+        """
+        Returns the rolling statistics of every stage over the last frames.
+
+        Returns:
+            dict: Stage name -> {'p50': ..., 'p95': ..., 'p99': ..., 'max': ...},
+                  in milliseconds per frame
+        """
+        count = min(self.frames, self.window)
+        if count == 0:
+            return {}
+        stats = {}
+        for name, history in self.history.items():
+            values = np.percentile(history[:count], PERCENTILES)
+            stats[name] = {f"p{p}": round(float(v), 3) for p, v in zip(PERCENTILES, values)}
+            stats[name]['max'] = round(float(history[:count].max()), 3)
+        return stats
+
+    def format_table(self):
+        """
+        Returns the percentiles as a text table, one line per stage
+        """
+        lines = ["stage\t" + "\t".join(f"p{p}" for p in PERCENTILES) + "\tmax (ms)"]
+        for name, stats in self.get_percentiles().items():
+            lines.append(name + "\t" + "\t".join(f"{stats[f'p{p}']:.2f}" for p in PERCENTILES) + f"\t{stats['max']:.2f}")
+        return "\n".join(lines)
+
+    def write_log(self):
+        """
+        Appends the current percentiles to the log file as one JSON line
+        """
+        record = {'time': round(time.time(), 3), 'frames': self.frames, 'window': min(self.frames, self.window),
+                  'stages': self.get_percentiles()}
+        self.log_file.write(json.dumps(record) + "\n")
+        self.log_file.flush()
+
+    def close(self):
+        """
+        Writes a last log line and closes the log file
+        """
+        if self.log_file is not None:
+            self.write_log()
+            self.log_file.close()
+            self.log_file = None
+
+    def attach(self, task_mgr, clock):
+        """
+        Adds the tasks that time the collision traversal and close each frame
+        (recording the whole frame's time as the 'frame' stage)
+
+        Args:
+            task_mgr: The task manager running the game
+            clock: The global ClockObject, for the frame time
+        """
+        if not self.enabled:
+            return
+        collision = self.measure('collision')
+
+        def start_collision(task):
+            collision.start()
+            return task.cont
+
+        def stop_collision(task):
+            collision.stop()
+            return task.cont
+
+        def end_frame(task):
+            self.add_time('frame', clock.getDt())
+            self.end_frame()
+            return task.cont
+
+        task_mgr.add(start_collision, 'frame_profiler_collision_start', sort=COLLISION_START_SORT)
+        task_mgr.add(stop_collision, 'frame_profiler_collision_stop', sort=COLLISION_STOP_SORT)
+        task_mgr.add(end_frame, 'frame_profiler_end_frame', sort=END_FRAME_SORT)
@@ -0,0 +1,82 @@
+import numpy as np
+from panda3d.core import Geom, GeomEnums, GeomVertexData, GeomTriangles
+
+# NumPy type of each Panda numeric type used by the game's vertex formats
+NUMPY_TYPES = {
+    GeomEnums.NT_float32: np.float32,
+    GeomEnums.NT_uint8: np.uint8,
+    GeomEnums.NT_uint16: np.uint16,
+    GeomEnums.NT_uint32: np.uint32,
+}
+
+def _array_dtype(array_format):
+    """
+    Returns a structured NumPy dtype matching the row layout of a vertex array format
+    """
+    names, formats, offsets = [], [], []
+    for i in range(array_format.getNumColumns()):
+        column = array_format.getColumn(i)
+        names.append(column.getName().getName())
+        formats.append((NUMPY_TYPES[column.getNumericType()], (column.getNumComponents(),)))
+        offsets.append(column.getStart())
+    return np.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': array_format.getStride()})
+
+def make_vertex_data(name, vertex_format, columns, usage=Geom.UHStatic):
+    """
+    Creates a GeomVertexData and fills it from NumPy arrays, writing each column
+    in one bulk copy through the vertex array's memoryview instead of row by row
+    with a GeomVertexWriter.
+
+    Args:
+        name: Name of the vertex data
+        vertex_format: A single-array GeomVertexFormat (e.g. GeomVertexFormat.getV3n3c4())
+        columns: Dict of column name ('vertex', 'normal', 'color', ...) to an array of
+                 shape (rows, components) or (components,) for a value shared by all rows.
+                 Colors are given as floats from 0 to 1, as for GeomVertexWriter.
+        usage: Geom usage hint
+
+    Returns:
+        GeomVertexData: The filled vertex data
+    """
+    columns = {column_name: np.asarray(values, dtype=np.float32) for column_name, values in columns.items()}
+    rows = max(len(values) for values in columns.values() if values.ndim == 2)
+    vdata = GeomVertexData(name, vertex_format, usage)
+    vdata.uncleanSetNumRows(rows)
+    array_format = vertex_format.getArray(0)
+    view = np.frombuffer(memoryview(vdata.modifyArray(0)).cast('B'), dtype=_array_dtype(array_format))
+    for column_name, values in columns.items():
+        column = array_format.getColumn(column_name)
+        if column.getNumericType() == GeomEnums.NT_uint8 and column.getContents() == GeomEnums.C_color:
+            # Same conversion as GeomVertexWriter: scale to 0..255 and truncate
+            values = (values * np.float32(255.0)).astype(np.uint8)
+        view[column_name] = values
+    return vdata
+
+def make_primitive(indices, primitive_type=GeomTriangles, usage=Geom.UHStatic):
+    """
+    Creates a primitive with fixed-size parts (GeomTriangles, GeomLines, ...) from
+    an array of vertex indices, copied in one go through the index array's memoryview
+
+    Args:
+        indices: Array of vertex indices, e.g. (T, 3) for triangles; it is flattened
+        primitive_type: The GeomPrimitive class to create
+        usage: Geom usage hint
+
+    Returns:
+        GeomPrimitive: The filled primitive
+    """
+    indices = np.asarray(indices).reshape(-1)
+    primitive = primitive_type(usage)
+    if len(indices) == 0:
+        return primitive
+    # 16-bit indices when they fit, as addVertices would choose
+    if indices.max() < 0xffff:
+        primitive.setIndexType(GeomEnums.NT_uint16)
+        index_type = np.uint16
+    else:
+        primitive.setIndexType(GeomEnums.NT_uint32)
+        index_type = np.uint32
+    handle = primitive.modifyVertices()
+    handle.uncleanSetNumRows(len(indices))
+    np.frombuffer(memoryview(handle).cast('B'), dtype=index_type)[:] = indices
+    return primitive
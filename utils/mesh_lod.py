@@ -0,0 +1,145 @@
+import numpy as np
+from panda3d.core import Geom, GeomEnums, GeomVertexData, GeomPrimitive, LODNode, NodePath, Point3
+from utils.mesh_arrays import NUMPY_TYPES, make_primitive
+
+def _triangle_indices(primitive):
+    """
+    Returns the (T, 3) vertex indices of a triangle primitive (strips and fans are
+    decomposed into triangles)
+    """
+    triangles = primitive.decompose()
+    if triangles.isIndexed():
+        indices = np.frombuffer(memoryview(triangles.getVertices()).cast('B'), dtype=NUMPY_TYPES[triangles.getIndexType()])
+    else:
+        indices = np.arange(triangles.getFirstVertex(), triangles.getFirstVertex() + triangles.getNumVertices())
+    return indices.reshape(-1, 3)
+
+def decimate_geom(geom, cell_size):
+    """
+    Simplifies a triangle Geom by vertex clustering: the vertices are grouped by
+    the cell of a grid of cell_size they fall in, each group is merged into one
+    vertex at their average position (keeping the other columns of the group's
+    first vertex), and triangles that collapse or repeat are dropped.
+
+    Args:
+        geom: The Geom to simplify (not modified)
+        cell_size: Size of the clustering grid cells, in the Geom's coordinates
+
+    Returns:
+        Geom or None: The simplified Geom, the Geom itself if it is not made of
+                      triangles (or its positions are not 32-bit floats), or None
+                      if no triangle is left
+    """
+    vdata = geom.getVertexData()
+    vertex_format = vdata.getFormat()
+    if (geom.getPrimitiveType() != GeomPrimitive.PT_polygons or
+            vertex_format.getColumn('vertex').getNumericType() != GeomEnums.NT_float32):
+        return geom
+    triangles = np.concatenate([_triangle_indices(geom.getPrimitive(i)) for i in range(geom.getNumPrimitives())])
+    # Rows are copied as raw bytes, so any column type is kept as it is
+    arrays = [
+        np.frombuffer(memoryview(vdata.getArray(i)).cast('B'), dtype=np.dtype((np.void, vertex_format.getArray(i).getStride())))
+        for i in range(vertex_format.getNumArrays())
+    ]
+    vertex_array = vertex_format.getArrayWith('vertex')
+    vertex_column = vertex_format.getColumn('vertex')
+    vertex_dtype = np.dtype({'names': ['vertex'], 'formats': [(np.float32, (vertex_column.getNumComponents(),))],
+                             'offsets': [vertex_column.getStart()], 'itemsize': vertex_format.getArray(vertex_array).getStride()})
+    positions = arrays[vertex_array].view(vertex_dtype)['vertex'][:, :3].astype(np.float64)
+
+    _, cluster = np.unique(np.floor(positions / cell_size).astype(np.int64), axis=0, return_inverse=True)
+    cluster = cluster.reshape(-1)
+    num_clusters = cluster.max() + 1 if len(cluster) else 0
+    clustered = cluster[triangles]
+    clustered = clustered[(clustered[:, 0] != clustered[:, 1]) & (clustered[:, 1] != clustered[:, 2]) &
+                          (clustered[:, 0] != clustered[:, 2])]
+    # Same three clusters in the same winding: keep one
+    rotation = np.argmin(clustered, axis=1)[:, None]
+    canonical = np.take_along_axis(clustered, (rotation + np.arange(3)) % 3, axis=1)
+    _, first_triangles = np.unique(canonical, axis=0, return_index=True)
+    clustered = clustered[np.sort(first_triangles)]
+    if len(clustered) == 0:
+        return None
+
+    used = np.unique(clustered)
+    remap = np.full(num_clusters, -1)
+    remap[used] = np.arange(len(used))
+    first_vertex = np.full(num_clusters, len(positions))
+    np.minimum.at(first_vertex, cluster, np.arange(len(positions)))
+    sums = np.zeros((num_clusters, 3))
+    np.add.at(sums, cluster, positions)
+    centers = sums / np.bincount(cluster, minlength=num_clusters)[:, None]
+
+    new_vdata = GeomVertexData(vdata.getName(), vertex_format, Geom.UHStatic)
+    new_vdata.uncleanSetNumRows(len(used))
+    for i, rows in enumerate(arrays):
+        view = np.frombuffer(memoryview(new_vdata.modifyArray(i)).cast('B'), dtype=rows.dtype)
+        view[:] = rows[first_vertex[used]]
+        if i == vertex_array:
+            view.view(vertex_dtype)['vertex'][:, :3] = centers[used]
+    new_geom = Geom(new_vdata)
+    new_geom.addPrimitive(make_primitive(remap[clustered]))
+    return new_geom
+
+def decimated_copy(model_np, cell_size):
+    """
+    Returns a copy of a model with every GeomNode's Geoms simplified by
+    decimate_geom (the model itself is not modified)
+    """
+    copy_np = model_np.copyTo(NodePath('decimated'))
+    for geom_np in copy_np.findAllMatches('**/+GeomNode'):
+        geom_node = geom_np.node()
+        for i in reversed(range(geom_node.getNumGeoms())):
+            geom = geom_node.getGeom(i)
+            simplified = decimate_geom(geom, cell_size)
+            if simplified is None:
+                geom_node.removeGeom(i)
+            elif simplified is not geom:
+                geom_node.setGeom(i, simplified)
+    return copy_np
+
+def make_lod(name, levels, center=None):
+    """
+    Wraps models of decreasing detail in an LODNode that shows one of them
+    depending on the camera distance.
+
+    Args:
+        name: Name of the LODNode
+        levels: List of (NodePath, distance) from the most to the least detailed;
+                each model is shown from the previous level's distance up to its own
+        center: Point the camera distance is measured from, in the node's coordinates
+
+    Returns:
+        NodePath: The LODNode, with the level models reparented under it
+    """
+    lod_np = NodePath(LODNode(name))
+    if center is not None:
+        lod_np.node().setCenter(Point3(*center))
+    near = 0.0
+    for level_np, far in levels:
+        lod_np.node().addSwitch(far, near)
+        level_np.reparentTo(lod_np)
+        near = far
+    return lod_np
+
+def add_lod(model_np, lod_levels, center=None):
+    """
+    Moves the children of a model under an LODNode, with decimated copies of them
+    as the lower levels of detail. The model's own node (e.g. its ModelRoot) stays.
+
+    Args:
+        model_np: The model to add levels of detail to
+        lod_levels: List of (cell_size, distance) from the most to the least
+                    detailed; a cell_size of None keeps the full model
+        center: Point the camera distance is measured from (see make_lod)
+
+    Returns:
+        NodePath: The LODNode
+    """
+    detail_np = NodePath('detail')
+    model_np.getChildren().reparentTo(detail_np)
+    levels = [(detail_np if cell_size is None else decimated_copy(detail_np, cell_size), distance)
+              for cell_size, distance in lod_levels]
+    lod_np = make_lod('lod', levels, center)
+    lod_np.reparentTo(model_np)
+    return lod_np
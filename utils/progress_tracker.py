@@ -1,8 +1,10 @@
-import math
-from panda3d.core import Vec3
 import config
+from physics.track_index import get_track_index
 
 class ProgressTracker:
+    # Number of segments searched on each side of last frame's closest segment
+    SEARCH_WINDOW = 8
+
     def __init__(self, kart, track_curve_points):
         self.kart = kart
         self.trackCurvePoints = track_curve_points
@@ -11,6 +13,7 @@ class ProgressTracker:
         self.lap_completed = False
         self.has_left_start_line = False  # Flag for leaving the start area after race start
         self.current_lap = 0  # Track the number of laps completed
+        self.last_segment_index = None  # Closest segment found last frame (None forces a full search)
 
     def reset(self):
         self.kart_progress = 0.0
@@ -18,61 +21,57 @@ class ProgressTracker:
         self.lap_completed = False
         self.has_left_start_line = False
         self.current_lap = 0
-
-    def _point_segment_distance_sq(self, p, a, b):
-        """Calculate the squared distance from point p to line segment (a, b)."""
-        l2 = (b - a).lengthSquared()
-        if l2 == 0.0:
-            return (p - a).lengthSquared()
-        t = (p - a).dot(b - a) / l2
-        t = max(0, min(1, t))
-        vector_ab = Vec3(b - a)
-        scalar_t = float(t)
-        scaled_vector = vector_ab * scalar_t
-        projection = a + scaled_vector
-        return (p - projection).lengthSquared()
+        self.last_segment_index = None
 
     def calculate_kart_progress(self):
-        """Calculates the kart's progress along the track spline (0.0 to 1.0)."""
+        """
+        Calculates the kart's progress along the track spline (0.0 to 1.0) as the
+        arc length of its projection onto the centerline.
+        Only a small window around last frame's closest segment is searched; a full
+        indexed search runs on the first frame, after a reset, or when the window
+        result is implausible (kart teleported or left the track area).
+        """
         kart_pos = self.kart.getPos()
-        min_dist_sq = float('inf')
-        closest_segment_index = -1
-        num_segments = len(self.trackCurvePoints) - 1
+        track_index = get_track_index(self.trackCurvePoints)
 
-        if num_segments < 1:
+        if track_index is None:
             return 0.0
 
-        for i in range(num_segments):
-            p1 = self.trackCurvePoints[i]
-            p2 = self.trackCurvePoints[i+1]
-            dist_sq = self._point_segment_distance_sq(kart_pos, p1, p2)
-            if dist_sq < min_dist_sq:
-                min_dist_sq = dist_sq
-                closest_segment_index = i
+        closest_segment_index, t, _ = track_index.closest_segment_near(
+            kart_pos.x, kart_pos.y, self.last_segment_index, self.SEARCH_WINDOW
+        )
 
         if closest_segment_index == -1:
              return self.kart_progress # Keep last progress if error
 
-        progress = float(closest_segment_index) / num_segments
-        return progress
+        self.last_segment_index = closest_segment_index
+        return track_index.progress_at(closest_segment_index, t)
 
     def update(self):
         previous_progress = self.kart_progress
         self.kart_progress = self.calculate_kart_progress()
+
+        # Before the kart has crossed the start line it sits at the end of the
+        # centerline; report no progress so standings at the start stay correct
+        if not self.has_left_start_line and self.kart_progress > 0.5:
+            self.kart_progress = 0.0
         
         # Detect direction and progress changes
         progress_change = self.kart_progress - previous_progress
         
         # Handle wrap-around at start/finish line
-        if previous_progress > 0.9 and self.kart_progress < 0.1:
+        wrapped_forward = previous_progress > 0.9 and self.kart_progress < 0.1
+        if wrapped_forward:
             # Moving forward across the start/finish line (end to start)
             progress_change = (1.0 - previous_progress) + self.kart_progress
         elif previous_progress < 0.1 and self.kart_progress > 0.9:
             # Moving backward across the start/finish line (start to end)
             progress_change = -(previous_progress + (1.0 - self.kart_progress))
         
-        # Going forward on the track (correct direction)
-        going_forward = progress_change > 0
+        # Going forward on the track (correct direction). The centerline is open at
+        # the start line, so a kart in the gap projects to exactly 1.0 and then 0.0:
+        # a forward wrap counts as forward even when the change is zero
+        going_forward = progress_change > 0 or wrapped_forward
         
         # Track maximum progress reached during this lap attempt
         # Only update when moving in the correct direction
@@ -0,0 +1,125 @@
+import numpy as np
+from utils.spline import tangent_catmull_rom, normalize_rows
+from utils.track_cache import TrackDataCache
+
+# Turn factor below which the AI brakes hard (instead of just easing off) for a turn
+SHARP_TURN_FACTOR = 0.6
+# Turn factor above which a point counts as a straight
+STRAIGHT_FACTOR = 0.95
+# Distance behind and ahead of a point over which its turn is measured
+TURN_LOOKAHEAD = 10.0
+# Slowest recommended speed, as a fraction of the kart's target speed
+MIN_SPEED_FACTOR = 0.3
+
+class RacingLine:
+    def __init__(self, track_points):
+        """
+        Precomputes per-point track geometry used by the AI, so that nothing has
+        to be derived from the track points while driving.
+
+        Args:
+            track_points: List of points the AI drives through (the track centerline)
+
+        Attributes:
+            points: (N, 3) array of the track points
+            tangents: (N, 3) unit Catmull-Rom tangents at each point
+            normals: (N, 3) unit 'right' vectors (tangent x up) used for path offsets
+            curvature: (N,) turn angle per unit length at each point (radians / unit)
+            turn_factors: (N,) 0 (hairpin) to 1 (straight), from the track directions into and out of each point
+            spacing: (N,) distance from each point to the next (the last wraps to the first)
+        """
+        self.points = np.array([(p.x, p.y, p.z) for p in track_points], dtype=np.float64).reshape(-1, 3)
+        count = len(self.points)
+        self._speed_profiles = {}
+        if count < 2:
+            self.tangents = np.tile((0.0, 1.0, 0.0), (count, 1))
+            self.normals = np.tile((1.0, 0.0, 0.0), (count, 1))
+            self.curvature = np.zeros(count)
+            self.turn_factors = np.ones(count)
+            self.spacing = np.zeros(count)
+            return
+
+        # Catmull-Rom tangents at the knots (t = 0), with the ends extrapolated linearly
+        padded = np.concatenate([
+            [2.0 * self.points[0] - self.points[1]],
+            self.points,
+            [2.0 * self.points[-1] - self.points[-2], 3.0 * self.points[-1] - 2.0 * self.points[-2]],
+        ])
+        self.tangents = normalize_rows(tangent_catmull_rom(padded[:-3], padded[1:-2], padded[2:-1], padded[3:], 0.0))
+
+        right = np.stack([self.tangents[:, 1], -self.tangents[:, 0], np.zeros(count)], axis=1)
+        flat = np.einsum('ij,ij->i', right, right) < 0.001
+        right[flat] = (1.0, 0.0, 0.0)
+        self.normals = normalize_rows(right)
+
+        # Turns are measured between the chords to the points TURN_LOOKAHEAD behind and
+        # ahead along the loop, since neighbouring samples are too close to show a turn
+        self.spacing = np.linalg.norm(np.roll(self.points, -1, axis=0) - self.points, axis=1)
+        arc = np.concatenate([[0.0], np.cumsum(self.spacing)])
+        loop = np.vstack([self.points, self.points[:1]])
+        behind = _point_at(loop, arc, (arc[:-1] - TURN_LOOKAHEAD) % arc[-1])
+        ahead = _point_at(loop, arc, (arc[:-1] + TURN_LOOKAHEAD) % arc[-1])
+        incoming = normalize_rows(self.points - behind)
+        outgoing = normalize_rows(ahead - self.points)
+        cosine = np.clip(np.einsum('ij,ij->i', incoming, outgoing), -1.0, 1.0)
+        self.turn_factors = (1.0 + cosine) / 2.0
+        self.curvature = np.arccos(cosine) / TURN_LOOKAHEAD
+
+    def speed_profile(self, target_speed, max_speed, turn_reduction, braking):
+        """
+        Returns the recommended speed at each point for one set of AI parameters.
+        Turn speeds follow the AI's turn handling; a backward pass then lowers the
+        points before each turn so the kart can brake down in time at `braking`.
+        Profiles are cached per parameter set.
+
+        Args:
+            target_speed: The kart's cruising speed
+            max_speed: Speed cap on straights
+            turn_reduction: Difficulty-based speed reduction on turns (0 to 1)
+            braking: Deceleration available before turns (units per second²)
+
+        Returns:
+            tuple: (speeds, brake_zone) arrays of length N, where brake_zone marks the
+                   points at which the AI should brake hard rather than coast down
+        """
+        key = (target_speed, max_speed, turn_reduction, braking)
+        profile = self._speed_profiles.get(key)
+        if profile is not None:
+            return profile
+
+        factors = self.turn_factors
+        corner_speeds = target_speed * (1.0 - turn_reduction * (1.0 - factors ** 2))
+        straight = factors > STRAIGHT_FACTOR
+        corner_speeds[straight] = np.minimum(corner_speeds[straight] * 1.1, max_speed)
+        corner_speeds = np.maximum(corner_speeds, target_speed * MIN_SPEED_FACTOR)
+
+        # v² = v_next² + 2·a·d, twice around the loop so braking carries over the start line
+        speeds = corner_speeds.copy()
+        count = len(speeds)
+        for step in range(2 * count - 1, -1, -1):
+            i = step % count
+            following = speeds[(i + 1) % count]
+            speeds[i] = min(speeds[i], (following * following + 2.0 * braking * self.spacing[i]) ** 0.5)
+
+        brake_zone = (factors < SHARP_TURN_FACTOR) | (speeds < corner_speeds)
+        profile = (speeds, brake_zone)
+        self._speed_profiles[key] = profile
+        return profile
+
+# Racing lines of the last track point lists queried
+_racing_line_cache = TrackDataCache(RacingLine)
+
+def get_racing_line(track_points):
+    """
+    Returns the racing line for a track point list, building it on first use.
+    The table is rebuilt if the list was modified in place (e.g. reversed).
+    """
+    if not track_points:
+        return None
+    return _racing_line_cache.get(track_points)
+
+def _point_at(points, arc, distances):
+    """
+    Interpolates points at the given arc-length distances along a polyline
+    """
+    return np.stack([np.interp(distances, arc, points[:, axis]) for axis in range(points.shape[1])], axis=1)
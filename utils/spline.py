@@ -1,4 +1,5 @@
 import math
+import numpy as np
 from panda3d.core import Vec3, Point3
 
 def eval_catmull_rom(p0, p1, p2, p3, t):
@@ -21,3 +22,46 @@ def tangent_catmull_rom(p0, p1, p2, p3, t):
     return ((-p0 + p2) + 
             (p0 * 4.0 - p1 * 10.0 + p2 * 8.0 - p3 * 2.0) * t + 
             (-p0 * 3.0 + p1 * 9.0 - p2 * 9.0 + p3 * 3.0) * t2) * 0.5
+
+def sample_catmull_rom(control_points, t):
+    """
+    Evaluates every segment of a Catmull-Rom spline at the parameters t in one
+    NumPy pass. Works in float32 with the same operations as eval_catmull_rom and
+    tangent_catmull_rom on Panda vectors, so the samples are identical to theirs.
+
+    Args:
+        control_points: (M, 3) array of control points; segment k runs between
+                        points k + 1 and k + 2 (points k and k + 3 shape it)
+        t: (S,) array of parameters in [0, 1]
+
+    Returns:
+        tuple: (points, tangents), each of shape (M - 3, S, 3), float32
+    """
+    control = np.asarray(control_points, dtype=np.float32)
+    t = np.asarray(t, dtype=np.float64)
+    # The powers of t are taken in double precision, as Python floats are
+    t1, t2, t3 = (np.asarray(power, dtype=np.float32)[None, :, None] for power in (t, t * t, t * t * t))
+    p0, p1, p2, p3 = (control[k:len(control) - 3 + k, None, :] for k in range(4))
+    points = (p1 * 2.0 +
+              (-p0 + p2) * t1 +
+              (p0 * 2.0 - p1 * 5.0 + p2 * 4.0 - p3) * t2 +
+              (-p0 + p1 * 3.0 - p2 * 3.0 + p3) * t3) * 0.5
+    tangents = ((-p0 + p2) +
+                (p0 * 4.0 - p1 * 10.0 + p2 * 8.0 - p3 * 2.0) * t1 +
+                (-p0 * 3.0 + p1 * 9.0 - p2 * 9.0 + p3 * 3.0) * t2) * 0.5
+    return points, tangents
+
+def normalize_rows(vectors):
+    """
+    Normalizes each row of an (N, 3) array like Vec3.normalize() does
+    (multiplying by the reciprocal length); zero-length rows are left unchanged.
+    Float arrays keep their precision; anything else is converted to float32.
+    """
+    vectors = np.asarray(vectors)
+    if vectors.dtype.kind != 'f':
+        vectors = vectors.astype(np.float32)
+    length_sq = vectors[:, 0] * vectors[:, 0] + vectors[:, 1] * vectors[:, 1] + vectors[:, 2] * vectors[:, 2]
+    nonzero = length_sq != 0.0
+    scale = np.ones(len(vectors), dtype=vectors.dtype)
+    scale[nonzero] = vectors.dtype.type(1.0) / np.sqrt(length_sq[nonzero])
+    return vectors * scale[:, None]
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+# Point lists a TrackDataCache keeps data for (the game and a headless race only use one)
+TRACK_CACHE_SIZE = 4
+
+class TrackDataCache:
+    def __init__(self, build, max_entries=TRACK_CACHE_SIZE):
+        """
+        Keeps data derived from a track point list (spatial index, racing line...)
+        for the last few lists it was asked for, so the per-frame callers that only
+        hold the list get the same object back.
+
+        Each entry keeps a reference to its list, so the list cannot be freed and
+        its id reused by another list while the entry exists, and the oldest
+        entries are dropped beyond max_entries.
+
+        Args:
+            build: Function building the data from a point list
+            max_entries: Number of point lists to keep data for
+        """
+        self.build = build
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # id of the point list -> (point list, signature, data)
+
+    def get(self, points):
+        """
+        Returns the data for a point list, building it on first use.
+        The data is rebuilt if the list was modified in place (e.g. reversed).
+        """
+        key = id(points)
+        signature = _signature(points)
+        entry = self.entries.get(key)
+        if entry is None or entry[0] is not points or entry[1] != signature:
+            entry = (points, signature, self.build(points))
+            self.entries[key] = entry
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        self.entries.move_to_end(key)
+        return entry[2]
+
+    def clear(self):
+        """
+        Drops every entry
+        """
+        self.entries.clear()
+
+def _signature(points):
+    """
+    Cheap summary of a point list's content: its length and its first, middle
+    and last points
+    """
+    if not points:
+        return (0,)
+    return (len(points),) + tuple((p.x, p.y) for p in (points[0], points[len(points) // 2], points[-1]))